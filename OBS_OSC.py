@@ -9,17 +9,54 @@
 #  https://www.claudeheintzdesign.com/lx/opensource.html
 #
 
+import os
 import socket
+import selectors
+import asyncio
+import concurrent.futures
 import threading
 import time
-from select import select
-import math
 import struct
-import obspython as obs
+import heapq
+import itertools
+import json
+import math
+import traceback
+import re
+import sys
+import ctypes
+import ctypes.util
+import mmap
+import marshal
+from array import array
+from collections import OrderedDict, deque
+try:
+    import obspython as obs
+except ImportError:
+    obs = None      # outside OBS, in the front end process (tools/osc_frontend.py)
 
 
 OBS_OSC_PORT = 17999
 OBS_OSC_AUTO_START = 1
+OBS_OSC_BACKEND = "threaded"     # "threaded" or "asyncio"
+OBS_OSC_MAX_PACKET = 8192        # largest datagram received without truncation
+OBS_OSC_RCVBUF_KB = 0            # socket SO_RCVBUF in KB, 0 leaves the system default
+OBS_SCENE_TRANSITION_DELAY = 0.2 # seconds between selecting a scene and its transition
+OBS_GO_PREVIEW_TIMEOUT = 5.0     # seconds past the transition duration to wait for it to finish
+OBS_OSC_FEEDBACK = ""            # feedback targets "host:port, host:port"
+OBS_OSC_FEEDBACK_RATE = 30       # maximum feedback bundles per second
+OBS_OSC_METERS = ""              # sources to meter "Mic, Music"
+OBS_OSC_METER_RATE = 30          # meter bundles per second
+OBS_OSC_TCP_PORT = 0             # OSC over TCP port, 0 for none
+OBS_OSC_TCP_FRAMING = "slip"     # "slip" (OSC 1.1) or "length" (OSC 1.0 size prefix)
+OBS_OSC_ENDPOINTS = []           # additional endpoints, see parse_endpoint
+OBS_OSC_CAPTURE = ""             # file received packets are appended to, "" for none
+OBS_OSC_QUEUE = 1024             # dispatch queue size, 0 dispatches on the receiving thread
+OBS_OSC_OVERFLOW = "drop-oldest" # full queue: "drop-oldest", "drop-newest" or "block"
+OBS_OSC_FRONTEND = ""            # command ring of an OSC front end process, "" to receive OSC here
+OBS_OSC_WATCHDOG_MS = 2000       # ms between listener liveness checks
+OBS_OSC_TRACE = False            # record spans for a Chrome trace (see OSCTracer)
+OBS_OSC_TRACE_FILE = ""          # file traces are written to, "" for obs_osc_trace.json in the home folder
 
 #########################################
 #
@@ -31,6 +68,7 @@ OBS_OSC_AUTO_START = 1
 #   Most OSC triggers require a 1.0 float argument [1.0] so that
 #   they are compatible with TouchOSC type buttons which
 #   send 1.0 when pressed and 0.0 when released.
+#   A true (T) or impulse (I) argument also counts as [1.0]
 #
 #   Arguments in the messages reference are noted with brackets []
 #
@@ -90,10 +128,23 @@ OBS_OSC_AUTO_START = 1
 #       (index 1 in obspython)
 #       following the transition, the third scene is set to preview 
 #
+#   /obs/scene/NN/item/name/visible  [1|0]
+#       shows [1] or hides [0] the item named name (the name of its
+#       source) in scene NN
+#
+#   /obs/scene/NN/item/name/position  [x, y]
+#   /obs/scene/NN/item/name/scale  [x, y] or [s]
+#   /obs/scene/NN/item/name/rotation  [degrees]
+#       moves, scales or rotates the item named name in scene NN
+#
+#       the item changes to a scene that arrive together (in a bundle)
+#       are applied to it as one update
+#
 #   /obs/go  [1.0]
 #       transitions to the current previewed scene using the current transition
 #       following the transition, the scene following the former preview scene
 #       in the scene list is selected for preview
+#       as soon as the transition signals that it has finished
 #
 #   /obs/recording/start  [1.0]
 #       starts recording
@@ -107,525 +158,4897 @@ OBS_OSC_AUTO_START = 1
 #   /obs/streaming/stop  [1.0]
 #       stops streaming
 #
-#########################################
-
-
-#########################################
+#   /obs/source/NN/volume  [V.V]
+#       sets the volume of the source named NN (0.0 - 1.0)
 #
-#   OSCListener
-#       implements basic OSC UDP receiving and parsing
+#   /obs/source/volume  [NN, V.V, MM, V.V, ...]
+#       sets the volume of one or more sources, given as name/value pairs
 #
-#   start_listening(port)
-#       starts a thread that listenes for UDP packets on the specified port
+#   /obs/source/NN/fade  [V.V, MS, curve]
+#       fades the volume of the source named NN to V.V over MS milliseconds
+#       (default 1000).  curve is "linear" (default), "exp" or "db"
+#       (or 0, 1, 2).  the fade runs inside OBS, one step every frame
 #
-#   stop_listening()
-#       terminates the listen loop/thread
+#   /obs/source/NN/fade/cancel  [1.0]
+#       stops the fade of source NN where it is
 #
-#   dispatch_message()
-#       is called when an OSC message is received, after
-#       its addressPattern and args[] are extracted
-#       obspython methods are called based on the addressPattern
+#   /obs/fade/cancel  [1.0]
+#       stops all fades
+#
+#   /obs/cue/cancel  [1.0]
+#       cancels the remaining steps of a scene start/go cue
+#       (a newer scene, go or transition message also replaces them)
+#
+#   /obs/subscribe  [PPPP]
+#       sends feedback to the sender's address on int port PPPP
+#       (or on the port the message came from if there is no int argument)
+#
+#   /obs/unsubscribe  [PPPP]
+#       stops feedback to the sender's address
+#
+#   /obs/stats  [PPPP]
+#       replies to the sender (on int port PPPP if given) with a bundle of
+#       /obs/stats/... messages: packets, messages, bundles, unmatched,
+#       decode errors by reason, messages per route and the receive and
+#       dispatch latency percentiles [p50, p90, p99, max] in microseconds
+#
+#   /obs/stats/reset  [1.0]
+#       clears the statistics
+#
+#   /obs/debug/trace  [1.0 | 0.0]
+#       turns tracing on [1.0] or off [0.0].  while on, the time spent
+#       receiving, decoding, dispatching and in each obspython call is
+#       recorded (the last OSC_TRACE_SPANS spans are kept)
+#
+#   /obs/debug/trace/write  [1.0]
+#       writes the spans recorded to the trace file set in the script
+#       properties as Chrome trace events (chrome://tracing or
+#       ui.perfetto.dev)
+#
+#   -------------------------------------------
+#
+#   Feedback:
+#   subscribers and the targets set in the script properties are sent
+#   the current state when they subscribe, then each change.  Changes are
+#   coalesced into bundles sent at most OBS_OSC_FEEDBACK_RATE times a second
+#
+#   /obs/program/scene  [name]
+#   /obs/preview/scene  [name]
+#   /obs/transition/current  [name]
+#   /obs/recording/active  [1|0]
+#   /obs/streaming/active  [1|0]
+#   /obs/source/NN/volume  [V.V]
+#
+#   Meters:
+#   the sources listed in the script properties are metered and their
+#   levels sent to the feedback targets OBS_OSC_METER_RATE times a second,
+#   all meters in one bundle.  values are dB, peaks are held between sends
+#
+#   /obs/source/NN/meter  [magnitude, peak, input_peak]
+#
+#   -------------------------------------------
+#
+#   OSC bundles (#bundle) are supported, including nested bundles.
+#   A bundle with the timetag "immediately" is dispatched as soon as it
+#   is received, a bundle with a future NTP timetag is held and dispatched
+#   at that time.  The messages in a bundle are dispatched together,
+#   no other message is dispatched between them.
+#
+#   Scenes and transitions may also be addressed by name in place of NN
+#       /obs/scene/Intro/go  /obs/transition/Fade/select
+#   a name that is all digits is taken as a number
+#
+#   OSC can also be received over TCP on OBS_OSC_TCP_PORT, framed with
+#   SLIP (OSC 1.1) or an int32 size prefix (OSC 1.0), from any number
+#   of clients at once
+#
+#   Additional endpoints, each a UDP or TCP port on all or one interface,
+#   optionally joining a multicast group, are served by the same listener
+#   thread.  They are listed in the script properties as
+#       [udp|tcp] [INTERFACE:]PORT [GROUP|slip|length]
+#   for example
+#       18000                       udp port 18000 on all interfaces
+#       udp 192.168.1.20:18001      udp port 18001 on one interface
+#       udp 18002 239.1.2.3         join multicast group 239.1.2.3 on port 18002
+#       tcp 18003 length            tcp port 18003 with size prefix framing
+#
+#   Address patterns may use OSC wildcards  * ? [a-z] [!a-z] {a,b}
+#       /obs/source/*/volume [V.V]  sets the volume of every source
+#       /obs/source/{Mic,Music}/volume [V.V]  sets two sources
+#   a wildcard in place of a scene or transition NN expands to numbers
 #
 #########################################
 
-class OSCListener:
-    
-    def __init__(self):
-        self.listen_thread = None 
 
 #########################################
 #
-#   start_listening creates the listening socket
-#   and creates a thread that runs the listen() method
+#   OSCMessage
+#       a decoded OSC message: its address pattern and argument list
 #
 #########################################
-    
-    def start_listening(self, port):
-        self.udpsocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.udpsocket.bind(('',port))
-        self.udpsocket.setblocking(False)
-        self.udpsocket.settimeout(1)
-        self.listening = True
-        if self.listen_thread is None:
-            self.listen_thread = threading.Thread(target=self.listen)
-            self.listen_thread.daemon = True
-            self.listen_thread.start()
+
+class OSCMessage:
+    __slots__ = ('address', 'args')
+
+    def __init__(self, address, args):
+        self.address = address
+        self.args = args
 
 #########################################
 #
-#   stop_listening sets a flag which will cause the listen loop to end on the next pass
+#   OSCBundle
+#       a decoded OSC bundle: its NTP timetag and its elements
+#       which are OSCMessage or nested OSCBundle objects
 #
 #########################################
-            
-    def stop_listening(self):
-        self.listening = False
-        self.udpsocket.close()
-        self.udpsocket = None
-        
+
+class OSCBundle:
+    __slots__ = ('timetag', 'elements')
+
+    def __init__(self, timetag, elements):
+        self.timetag = timetag
+        self.elements = elements
+
 #########################################
 #
-#   listen contains a loop that runs while the self.listening flag is True
-#   listen uses select to determine if there is data available from the port
-#   if there is, packet_received is called
-#   if not, the thread sleeps for a tenth of a second
+#   ntp_to_monotonic(timetag)
+#       converts a 64 bit NTP timetag (seconds since 1900 in the high
+#       32 bits, fraction in the low 32) to a time.monotonic() value
 #
 #########################################
-        
-    def listen(self):
-        input = [self.udpsocket]
 
-        while self.listening:
-            if self.udpsocket != None and self.udpsocket.fileno() >= 0:
-                inputready,outputready,exceptready = select(input,[],[],0)
-                if ( len(inputready) == 1 ):
-                    self.data,addr = self.udpsocket.recvfrom(256)
-                    self.msglen = len(self.data)
-                    self.packet_received()
-                else:
-                    time.sleep(0.1)
-            else:
-                self.listening = false
-    
-        self.listen_thread = None
+OSC_BUNDLE_TAG = b'#bundle\0'
+OSC_IMMEDIATELY = 1
+NTP_UNIX_OFFSET = 2208988800
+osc_timetag = struct.Struct('>Q')
+osc_int32 = struct.Struct('>i')
+
+def ntp_to_monotonic(timetag):
+    seconds = (timetag >> 32) - NTP_UNIX_OFFSET + (timetag & 0xFFFFFFFF) / 4294967296.0
+    return time.monotonic() + (seconds - time.time())
 
 #########################################
 #
-#   packet_received
-#   calls process_message_at for each complete OSC message
-#   contained in the packet
+#   OSCImpulse
+#       the value of an OSC 1.1 impulse (I) argument, a bang with no data
+#       OSC_IMPULSE is its only instance
 #
 #########################################
-    
-    def packet_received(self):
-        dataindex = 0
-        while ( (dataindex >= 0 ) and ( dataindex < self.msglen ) ):
-            dataindex = self.process_message_at(dataindex);
+
+class OSCImpulse:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "OSC_IMPULSE"
+
+OSC_IMPULSE = OSCImpulse()
 
 #########################################
 #
-#   process_message_at
-#   extracts the addressPattern and argument list from the OSC message
+#   osc_decode_plan(tags)
+#       returns the decode plan for the type tag string tags
+#       (bytes without the leading comma) or None if a tag is not
+#       supported or the array brackets don't match
 #
-#   currently the only supported arguments are floats and integers and strings
+#       a plan is a list of (unpacker, size, reader) steps.  consecutive
+#       fixed size tags (OSC_FIXED_TAGS) are merged into one precompiled
+#       struct.Struct unpacker of size bytes and reader is None.
+#       every other tag is a step with the reader function from
+#       OSC_TAG_READERS, an array [...] is one step whose reader
+#       decodes the array's own plan into a list
 #
-#   returns the index at the end of the complete message
+#       plans are cached, controllers send very few distinct type tag strings
 #
 #########################################
 
-    def process_message_at(self, si):
-        oi = 0;
-        dl = 0;
-        zl = self.next_zero(si)
-        
-        #insure that string will terminate with room for 4 bytes of type definition
-        if zl + 4 < self.msglen: 
-            addressPattern = self.string_from_index(si)
-            if addressPattern.startswith('/'):
-                # determine the current index for the type character
-                tl = self.next_index_for_string(addressPattern,si)
-                
-                # determine the current index for the data location
-                dl = self.next_index_for_index(self.next_zero(tl))
-                
-                # if there's space for at least one argument, start a loop extracting
-                # arguments defined in the type string an adding them to the args list
-                if dl+4 <= self.msglen:
-                    if self.data[tl] == ord(','):
-                        tl += 1
-                    args = []
-                    done = False
-                    while ( not done) and ( (dl+4) <= self.msglen ):
-                        if self.data[tl] == 0:
-                            done = True
-                        elif self.data[tl] == ord('f'):
-                            a = struct.unpack_from('>f', self.data, dl)
-                            args.append(float(a[0]))
-                            dl += 4
-                        elif self.data[tl] == ord('i'):
-                            a = struct.unpack_from('>i', self.data, dl)
-                            args.append(int(a[0]))
-                        elif self.data[tl] == ord('s'):
-                            es = self.next_zero(dl)
-                            if es <= self.msglen:
-                                a = self.string_from_index(dl)
-                                args.append(a)
-                                dl = self.next_index_for_index(es)
-                            else:
-                                done = True
-                                oi = -1
-                        else:   #unrecognized argument don't know length
-                            done = True
-                            oi = -1
-                        tl += 1
-                    
-                    # when done with the argument extraction loop, call dispatch_message
-                    self.dispatch_message(addressPattern, args)
-
-                else: # <- no arguments but an address pattern
-                    oi = -1
-                    self.dispatch_message(addressPattern, [])
+OSC_SLASH = ord('/')
+OSC_COMMA = ord(',')
+OSC_ARRAY_OPEN = ord('[')
+OSC_ARRAY_CLOSE = ord(']')
+OSC_FIXED_TAGS = {
+    ord('i'): 'i',      # int32
+    ord('f'): 'f',      # float32
+    ord('h'): 'q',      # int64
+    ord('d'): 'd',      # float64
+    ord('t'): 'Q',      # timetag, as the 64 bit NTP value
+    ord('r'): 'I',      # RGBA color, as a 32 bit int
+    ord('m'): '4s',     # MIDI message, as bytes (port id, status, data1, data2)
+}
+OSC_PLAN_CACHE_SIZE = 256
+osc_plans = {}
+
+def osc_decode_plan(tags):
+    plan = osc_plans.get(tags)
+    if plan is None:
+        plan, i = osc_build_plan(tags, 0, False)
+        if plan is None:
+            return None
+        if len(osc_plans) >= OSC_PLAN_CACHE_SIZE:
+            osc_plans.clear()
+        osc_plans[tags] = plan
+    return plan
+
+#########################################
+#
+#   osc_build_plan(tags, i, in_array)
+#       builds the plan for tags from index i up to the end,
+#       or up to the ] that closes the array if in_array
+#       returns (plan or None, index after the last tag used)
+#
+#########################################
+
+def osc_build_plan(tags, i, in_array):
+    plan = []
+    run = ''
+    while i < len(tags):
+        tag = tags[i]
+        i += 1
+        if tag in OSC_FIXED_TAGS:
+            run += OSC_FIXED_TAGS[tag]
+            continue
+        if run:
+            unpacker = struct.Struct('>' + run)
+            plan.append((unpacker, unpacker.size, None))
+            run = ''
+        if tag == OSC_ARRAY_CLOSE:
+            return (plan if in_array else None), i
+        if tag == OSC_ARRAY_OPEN:
+            items, i = osc_build_plan(tags, i, True)
+            if items is None:
+                return None, i
+            plan.append((None, 0, osc_array_reader(items)))
+        elif tag in OSC_TAG_READERS:
+            plan.append((None, 0, OSC_TAG_READERS[tag]))
         else:
-            oi = -1
-            
-        if oi != -1:
-            oi = dl     #dl could point to another message within the packet
-        
-        return oi   
+            return None, i
+    if in_array:
+        return None, i      # no closing ]
+    if run:
+        unpacker = struct.Struct('>' + run)
+        plan.append((unpacker, unpacker.size, None))
+    return plan, i
 
 #########################################
 #
-#   next_zero
-#   searches for the next null character in the data starting at index si
+#   osc_decode_args(plan, data, view, dl, end, args)
+#       appends the arguments starting at index dl to args
+#       returns the index following them or -1 if they run past end
 #
 #########################################
-        
-    def next_zero(self, si):
-        i = si
-        notfound = True
-        s = ''
-        while notfound and i<self.msglen:
-            if self.data[i] == 0:
-                notfound = False
-            else:
-                i += 1
-        return i
+
+def osc_decode_args(plan, data, view, dl, end, args):
+    for unpacker, size, reader in plan:
+        if reader is None:                  # run of fixed size numbers
+            if dl + size > end:
+                return -1
+            args.extend(unpacker.unpack_from(data, dl))
+            dl += size
+        else:
+            dl = reader(data, view, dl, end, args)
+            if dl < 0:
+                return -1
+    return dl
 
 #########################################
 #
-#   next_index_for_string
-#   determines a 4 byte padded index for the
-#   length of the string starting from si
+#   readers for the tags that are not fixed size numbers
+#       reader(data, view, dl, end, args) appends the argument at dl
+#       to args and returns the index following it, -1 if truncated
+#
+#   strings are located with bytes.find and decoded straight from
+#   the memoryview.  a blob is returned as a memoryview of the packet,
+#   valid only until its message has been dispatched
 #
 #########################################
-        
-    def next_index_for_string(self, s, start):
-        ml = math.trunc(len(s) / 4) + 1;
-        return start + (ml*4);
-        
+
+def osc_read_string(data, view, dl, end, args):
+    es = data.find(b'\0', dl, end)
+    if es < 0:
+        return -1
+    args.append(str(view[dl:es], 'utf-8', 'replace'))
+    return (es + 4) & ~3
+
+def osc_read_blob(data, view, dl, end, args):
+    if dl + 4 > end:
+        return -1
+    size = osc_int32.unpack_from(data, dl)[0]
+    dl += 4
+    if size < 0 or dl + size > end:
+        return -1
+    args.append(view[dl:dl + size])
+    return dl + ((size + 3) & ~3)
+
+def osc_read_char(data, view, dl, end, args):
+    if dl + 4 > end:
+        return -1
+    args.append(chr(data[dl + 3]))
+    return dl + 4
+
+def osc_constant_reader(value):
+    def read_constant(data, view, dl, end, args):
+        args.append(value)
+        return dl
+    return read_constant
+
+def osc_array_reader(plan):
+    def read_array(data, view, dl, end, args):
+        items = []
+        args.append(items)
+        return osc_decode_args(plan, data, view, dl, end, items)
+    return read_array
+
+OSC_TAG_READERS = {
+    ord('s'): osc_read_string,
+    ord('S'): osc_read_string,                  # symbol
+    ord('b'): osc_read_blob,
+    ord('c'): osc_read_char,
+    ord('T'): osc_constant_reader(True),
+    ord('F'): osc_constant_reader(False),
+    ord('N'): osc_constant_reader(None),
+    ord('I'): osc_constant_reader(OSC_IMPULSE),
+}
+
 #########################################
 #
-#   next_index_for_index 
-#   determines a 4 byte padded index starting from i
+#   osc_own_args(args)
+#       replaces blob memoryviews in args (and its arrays) with bytes
+#       for arguments that are kept after their packet's buffer is reused
 #
 #########################################
-        
-    def next_index_for_index(self, i):
-        ml = math.trunc(i / 4) + 1;
-        return ml*4;
+
+def osc_own_args(args):
+    for i, arg in enumerate(args):
+        if isinstance(arg, memoryview):
+            args[i] = arg.tobytes()
+        elif isinstance(arg, list):
+            osc_own_args(arg)
 
 #########################################
 #
-#   string_from_index
-#   extracts a null terminated string starting at index si
+#   osc_encode_string(s)
+#       a null terminated string padded to a multiple of 4 bytes
+#
+#   osc_encode_message(address, args)
+#       encodes the arguments of an OSC message by their python type
+#       float f, int i (h if it doesn't fit in 32 bits), bool T/F,
+#       None N, OSC_IMPULSE I, bytes-like b, list as an array [...]
+#       and anything else as a string s
+#
+#   osc_encode_bundles(messages, max_size)
+#       packs encoded messages into as few immediate bundles as
+#       possible without any bundle exceeding max_size bytes
+#       (a single message larger than max_size gets its own bundle)
 #
 #########################################
-        
-    def string_from_index(self, si):
-        i = si
-        noterm = True
-        s = ''
-        while noterm and i<len(self.data):
-            if self.data[i] == 0:
-                noterm = False
+
+def osc_encode_string(s):
+    b = s.encode('utf-8') + b'\0'
+    return b + b'\0' * (-len(b) % 4)
+
+def osc_encode_message(address, args):
+    data = []
+    tags = osc_encode_args(args, data)
+    return osc_encode_string(address) + osc_encode_string(',' + tags) + b''.join(data)
+
+def osc_encode_args(args, data):
+    tags = ''
+    for arg in args:
+        if isinstance(arg, float):
+            tags += 'f'
+            data.append(struct.pack('>f', arg))
+        elif isinstance(arg, bool):
+            tags += 'T' if arg else 'F'
+        elif isinstance(arg, int):
+            if -0x80000000 <= arg <= 0x7FFFFFFF:
+                tags += 'i'
+                data.append(osc_int32.pack(arg))
             else:
-                s +=  chr(self.data[i])
-                i += 1
-        return s
- 
- #########################################
+                tags += 'h'
+                data.append(struct.pack('>q', arg))
+        elif arg is None:
+            tags += 'N'
+        elif arg is OSC_IMPULSE:
+            tags += 'I'
+        elif isinstance(arg, (bytes, bytearray, memoryview)):
+            blob = bytes(arg)
+            tags += 'b'
+            data.append(osc_int32.pack(len(blob)) + blob + b'\0' * (-len(blob) % 4))
+        elif isinstance(arg, list):
+            tags += '[' + osc_encode_args(arg, data) + ']'
+        else:
+            tags += 's'
+            data.append(osc_encode_string(str(arg)))
+    return tags
+
+def osc_encode_bundles(messages, max_size):
+    header = OSC_BUNDLE_TAG + osc_timetag.pack(OSC_IMMEDIATELY)
+    bundles = []
+    elements = []
+    size = len(header)
+    for message in messages:
+        if elements and size + 4 + len(message) > max_size:
+            bundles.append(header + b''.join(elements))
+            elements = []
+            size = len(header)
+        elements.append(osc_int32.pack(len(message)) + message)
+        size += 4 + len(message)
+    if elements:
+        bundles.append(header + b''.join(elements))
+    return bundles
+
+#########################################
 #
-#   check_arg_one()
-#       Check for a single float argument equal to 1.0.
+#   OSCStreamFramer
+#       reassembles OSC packets from a TCP byte stream
 #
-#       used for actions controlled by a push button
-#       that sends 1.0 when pressed
-#       0.0 when released
+#   slip True:  OSC 1.1 SLIP framing, packets end with END (0xC0)
+#               ESC (0xDB) ESC_END (0xDC) stands for an END byte and
+#               ESC ESC_ESC (0xDD) for an ESC byte within a packet
+#   slip False: OSC 1.0 framing, each packet is preceded by its int32 size
+#
+#   feed(data) appends received bytes and returns the complete packets,
+#   or None if the stream is corrupt (a frame longer than max_size,
+#   whether it arrives in one read or across several).
+#   frames are located with find/unpack_from and the consumed bytes are
+#   removed from the buffer once per feed, never byte by byte
 #
 #########################################
-       
-    def check_arg_one(self, args):
-        if len(args) == 1:
-            if args[0] == 1.0:
-                return True
-        return False
+
+SLIP_END = 0xC0
+SLIP_ESC = 0xDB
+
+class OSCStreamFramer:
+
+    def __init__(self, slip, max_size):
+        self.slip = slip
+        self.max_size = max_size
+        self.buffer = bytearray()
+        self.scanned = 0
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer.extend(data)
+        if self.slip:
+            packets = self.slip_frames(buffer)
+        else:
+            packets = self.sized_frames(buffer)
+        if packets is not None and len(buffer) > self.max_size + 4:
+            return None
+        return packets
+
+    def slip_frames(self, buffer):
+        packets = []
+        start = 0
+        end = buffer.find(SLIP_END, self.scanned)
+        while end >= 0:
+            if end - start > self.max_size + 4:
+                return None
+            if end > start:
+                frame = bytes(buffer[start:end])
+                if SLIP_ESC in frame:
+                    frame = frame.replace(b'\xdb\xdc', b'\xc0').replace(b'\xdb\xdd', b'\xdb')
+                packets.append(frame)
+            start = end + 1
+            end = buffer.find(SLIP_END, start)
+        if start:
+            del buffer[:start]
+        self.scanned = len(buffer)
+        return packets
+
+    def sized_frames(self, buffer):
+        packets = []
+        start = 0
+        while len(buffer) - start >= 4:
+            size = osc_int32.unpack_from(buffer, start)[0]
+            if size < 0 or size > self.max_size:
+                return None
+            if len(buffer) - start - 4 < size:
+                break
+            packets.append(bytes(buffer[start+4:start+4+size]))
+            start += 4 + size
+        if start:
+            del buffer[:start]
+        return packets
+
+############################################
+#^^^^^^^^^^ end class OSCStreamFramer ^^^^^^
+############################################
+
 
 #########################################
 #
-#  dispatch_message
-#  called when OSC Message is received and processed
+#   OSCScheduler
+#       a heap based timer queue run by its own thread
+#
+#   call_at(when, callback, *args)
+#       calls callback(*args) at time.monotonic() value when
+#       returns an entry that can be passed to cancel()
+#
+#   call_at_precise(when, callback, *args)
+#       the same for an entry that must run on time (a timetagged bundle)
+#
+#   the thread waits on a condition until the earliest entry is due.
+#   for a precise entry it wakes OSC_SCHEDULER_SPIN early and yields in
+#   a short loop for the rest of the time, so it runs within a fraction
+#   of a millisecond of when.  other entries (meter ticks, feedback
+#   flushes, cue steps) never spin
 #
 #########################################
 
-    def dispatch_message(self, addressPattern, args):
-        # break addressPattern into parts
-        parts = addressPattern.split('/')
-               
-        if len(parts) > 2:
-            if parts[1] == "obs":                       #/obs/...
-                
-                if  parts[2] == "source":               # /obs/source/...
-                    self.dispatch_obs_source(parts, args)
-                
-                elif parts[2] == "transition":          # /obs/transition/...
-                    self.dispatch_obs_transition(parts, args)
-                
-                elif parts[2] == "scene":               # /obs/scene/...
-                    self.dispatch_obs_scene(parts, args)
-                
-                elif parts[2] == "go":                   # /obs/go
-                    self.dispatch_obs_go(parts, args)
-                
-                elif parts[2] == "recording":            # /obs/recording/...
-                    self.dispatch_obs_recording(parts, args)
-                
-                elif parts[2] == "streaming":            # /obs/streaming/...
-                    self.dispatch_obs_streaming(parts, args)
+OSC_SCHEDULER_SPIN = 0.002
+
+class OSCScheduler:
+
+    def __init__(self):
+        self.queue = []
+        self.condition = threading.Condition()
+        self.sequence = 0
+        self.running = False
+        self.thread = None
 
 #########################################
 #
-#  dispatch_obs_source(self, parts, args)
-#  /obs/source/...
+#   start / stop the scheduler thread
+#   entries still pending when stop is called are discarded
 #
 #########################################
 
-    def dispatch_obs_source(self, parts, args): 
-        if len(parts) == 4:
-            if  parts[3] == "volume":       # /obs/source/volume [NN, V.V]
-                if len(args) == 2:
-                    source_volume(args[0], args[1])
-        if len(parts) == 5:
-            if  parts[4] == "volume":       # /obs/source/NN/volume [V.V]
-                if len(args) == 1:
-                    source_volume(parts[3], args[0]) 
-    
+    def start(self):
+        with self.condition:
+            self.running = True
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run)
+                self.thread.daemon = True
+                self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            del self.queue[:]
+            self.condition.notify()
+        thread = self.thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(1.0)
+
 #########################################
 #
-#  dispatch_obs_transition(self, parts, args)
-#  /obs/transition/...
+#   call_at / call_later add an entry to the queue
+#   the thread is only notified if the new entry is now the earliest
 #
-#########################################                   
-    def dispatch_obs_transition(self, parts, args):
-        if len(parts) == 4: 
-            if parts[3] == "start":         # /obs/transition/start [1.0]
-                if self.check_arg_one(args):
-                    transition()
-            elif parts[3] == "duration":    # /obs/transition/duration [DD]
-                    set_transition_duration(int(args[0]))
-    
-        if len(parts) == 5:                 # /obs/transition/NN/start [1.0]
-            if parts[4] == "start":
-                if self.check_arg_one(args):
-                    transition(int(parts[3])-1)
-            elif parts[4] == "select":      # /obs/transition/NN/select [1.0]
-                if self.check_arg_one(args):    
-                    set_transition(int(parts[3])-1)
-            elif parts[4] == "duration":   # /obs/transition/NN/duration [DD]
-                set_transition_duration(int(args[0]), int(parts[3])-1)
-            elif parts[3] == "duration":   # /obs/transition/duration/DD [1.0]
-                if self.check_arg_one(args): 
-                    set_transition_duration(int(parts[4]))
-    
+#########################################
+
+    def call_at(self, when, callback, *args):
+        return self.add(when, False, callback, args)
+
+    def call_at_precise(self, when, callback, *args):
+        return self.add(when, True, callback, args)
+
+    def call_later(self, delay, callback, *args):
+        return self.add(time.monotonic() + delay, False, callback, args)
+
+    def add(self, when, precise, callback, args):
+        with self.condition:
+            self.sequence += 1
+            entry = [when, self.sequence, callback, args, precise]
+            heapq.heappush(self.queue, entry)
+            if self.queue[0] is entry:
+                self.condition.notify()
+        return entry
+
 #########################################
 #
-#  dispatch_obs_scene(self, parts, args)
-#  /obs/scene/...
+#   cancel marks an entry so that it is discarded when it comes due
 #
-#########################################                   
-    def dispatch_obs_scene(self, parts, args):
-        if self.check_arg_one(args):
-            if len(parts) == 5:
-                if parts[4] == "preview":       # /obs/scene/n/preview
-                    set_preview(int(parts[3])-1)
-                elif parts[4] == "start":       # /obs/scene/n/start
-                    set_preview(int(parts[3])-1)
-                    time.sleep(0.2)
-                    transition()
-                elif parts[4] == "go":          # /obs/scene/n/go
-                    set_preview(int(parts[3])-1)
-                    time.sleep(0.2)
-                    go()
-            elif len(parts) == 7:
-                if parts[4] == "transition":
-                    if parts[6] == "start":
-                        set_preview(int(parts[3])-1)
-                        time.sleep(0.2)
-                        transition(int(parts[5])-1)
-                    elif parts[6] == "go":
-                        set_preview(int(parts[3])-1)
-                        time.sleep(0.2)
-                        go(int(parts[5])-1)
-    
+#########################################
+
+    def cancel(self, entry):
+        entry[2] = None
+
 #########################################
 #
-#  dispatch_obs_go(self, parts, args)
-#  /obs/go [1.0]
+#   run is the scheduler thread's loop
 #
-#########################################                   
-    def dispatch_obs_go(self, parts, args):
-        if self.check_arg_one(args):
-            go()
-            
+#########################################
+
+    def run(self):
+        queue = self.queue
+        try:
+            while True:
+                with self.condition:
+                    while self.running:
+                        if queue:
+                            spin = OSC_SCHEDULER_SPIN if queue[0][4] else 0.0
+                            wait = queue[0][0] - time.monotonic()
+                            if wait <= spin:
+                                break
+                            self.condition.wait(wait - spin)
+                        else:
+                            self.condition.wait()
+                    if not self.running:
+                        break
+                    due = queue[0][0]
+                
+                # yield until a precise entry is due, without holding the lock
+                while time.monotonic() < due:
+                    time.sleep(0)
+                
+                ready = []
+                with self.condition:
+                    now = time.monotonic()
+                    while queue and queue[0][0] <= now:
+                        ready.append(heapq.heappop(queue))
+                for when, sequence, callback, args, precise in ready:
+                    if callback is not None:
+                        try:
+                            callback(*args)
+                        except Exception:
+                            traceback.print_exc()
+        finally:
+            self.thread = None
+
+############################################
+#^^^^^^^^^^ end class OSCScheduler ^^^^^^^^^
+############################################
+
+
 #########################################
 #
-#  dispatch_obs_recording(self, parts, args)
-#  /obs/recording/...
+#   OSCAddressSpace
+#       the compiled dispatch table, a trie of address segments
 #
-#########################################                   
-    def dispatch_obs_recording(self, parts, args):
-        if self.check_arg_one(args):
-            if len(parts) == 4:
-                if parts[3] == "start":       # /obs/recording/start
-                    obs.obs_frontend_recording_start()
-                if parts[3] == "stop":       # /obs/recording/stop
-                    obs.obs_frontend_recording_stop()
-    
+#   add(template, handler)
+#       registers handler for an address template such as
+#       /obs/scene/<scene>/preview.  a <name> segment is a parameter,
+#       the matching segment of a message address is passed to the
+#       handler as a positional argument after args
+#       templates and handlers map handlers to templates and back
+#
+#   add_parameter(name, values, tracked=False)
+#       values() returns the strings a wildcard in the
+#       parameter's position may expand to (scene numbers, source names)
+#       tracked means the owner of the values calls invalidate()
+#       when they change, so expansions can be cached
+#
+#   match(address)
+#       returns a tuple of (handler, params) for every route matched
+#       by the address, which may be an OSC 1.0 pattern using
+#       * ? [a-z] [!a-z] and {a,b}.  literal segments take priority
+#       over parameters.  results are kept in a bounded LRU cache
+#
+#   match is called from the receiving, dispatch and main threads and
+#   invalidate from OBS's signal handlers, lock guards the cache
+#
+#########################################
+
+OSC_MATCH_CACHE_SIZE = 1024
+OSC_WILDCARDS = re.compile(r'[*?\[{]')
+
+class OSCAddressNode:
+    __slots__ = ('children', 'param', 'param_name', 'handler')
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.param_name = None
+        self.handler = None
+
+class OSCAddressSpace:
+
+    def __init__(self):
+        self.root = OSCAddressNode()
+        self.templates = {}
+        self.handlers = {}
+        self.coalescing = {}
+        self.parameters = {}
+        self.cache = OrderedDict()
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.patterns = {}
+
+    def add(self, template, handler, coalesce=None):
+        node = self.root
+        for segment in template.split('/')[1:]:
+            if segment.startswith('<') and segment.endswith('>'):
+                if node.param is None:
+                    node.param = OSCAddressNode()
+                    node.param_name = segment[1:-1]
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, OSCAddressNode())
+        node.handler = handler
+        self.templates[handler] = template
+        self.handlers[template] = handler
+        if coalesce is not None:
+            self.coalescing[handler] = coalesce
+        self.invalidate()
+
+    def add_parameter(self, name, values, tracked=False):
+        self.parameters[name] = (values, tracked)
+        self.invalidate()
+
 #########################################
 #
-#  dispatch_obs_streaming(self, parts, args)
-#  /obs/streaming/...
+#   coalesce_key
+#   returns the key a message's value is queued under if every route
+#   it matches is a continuous value (added with a coalesce function
+#   that makes the key from the address and arguments)
+#   returns None for a discrete message, or if the key can't be
+#   hashed (an array where a name was expected)
 #
-#########################################                   
-    def dispatch_obs_streaming(self, parts, args):
-        if self.check_arg_one(args):
-            if len(parts) == 4:
-                if parts[3] == "start":       # /obs/streaming/start
-                    obs.obs_frontend_streaming_start()
-                if parts[3] == "stop":       # /obs/streaming/stop
-                    obs.obs_frontend_streaming_stop()            
+#########################################
 
-############################################
-#^^^^^^^^^^ end class OSCListener ^^^^^^^^^^
+    def coalesce_key(self, address, args):
+        key = None
+        for handler, params in self.match(address):
+            coalesce = self.coalescing.get(handler)
+            if coalesce is None:
+                return None
+            key = coalesce(address, args)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+#########################################
 #
-#           begin main section
-############################################
+#   invalidate
+#   empties the match cache, must be called when the values
+#   a parameter expands to have changed
+#
+#########################################
 
-# global OSCListener object
-oscin = None
+    def invalidate(self):
+        with self.lock:
+            self.cache.clear()
+            self.generation += 1
 
 #########################################
 #
-#  set_preview(idx)
-#  sets the OBS preview to scene with index idx if it exists
+#   match
+#   matches that expanded a wildcard through the values of a
+#   parameter that is not tracked are not cached.  the trie is
+#   matched without holding lock, a match made while invalidate
+#   was called is not cached
 #
 #########################################
 
-def set_preview(idx):
-    scenes = obs.obs_frontend_get_scenes()
-    if idx < len(scenes) and idx >= 0:
-        obs.obs_frontend_set_current_preview_scene(scenes[idx])
+    def match(self, address):
+        cache = self.cache
+        with self.lock:
+            found = cache.get(address)
+            if found is not None:
+                cache.move_to_end(address)
+                return found
+            generation = self.generation
+        found = []
+        dynamic = self.match_node(self.root, address.split('/')[1:], 0, [], found)
+        found = tuple(found)
+        if not dynamic:
+            with self.lock:
+                if generation == self.generation:
+                    cache[address] = found
+                    if len(cache) > OSC_MATCH_CACHE_SIZE:
+                        cache.popitem(last=False)
+        return found
 
 #########################################
 #
-#  set_transition(idx)
-#   selects the OBS transition with index idx if it exists
+#   match_node
+#   recursively matches segments[i:] below node, appending
+#   (handler, params) to found.  returns True if the values of
+#   a parameter that is not tracked were used to expand a wildcard
 #
 #########################################
 
-def set_transition(idx):
-    transitions = obs.obs_frontend_get_transitions()
-    if idx < len(transitions) and idx >= 0:
-        obs.obs_frontend_set_current_transition(transitions[idx])
+    def match_node(self, node, segments, i, params, found):
+        if i == len(segments):
+            if node.handler is not None:
+                found.append((node.handler, tuple(params)))
+            return False
+        segment = segments[i]
+        dynamic = False
+        if OSC_WILDCARDS.search(segment) is None:
+            child = node.children.get(segment)
+            count = len(found)
+            if child is not None:
+                dynamic = self.match_node(child, segments, i+1, params, found)
+            if node.param is not None and len(found) == count:
+                params.append(segment)
+                dynamic |= self.match_node(node.param, segments, i+1, params, found)
+                params.pop()
+            return dynamic
         
+        pattern = self.pattern(segment)
+        for name, child in node.children.items():
+            if pattern.match(name):
+                dynamic |= self.match_node(child, segments, i+1, params, found)
+        if node.param is not None:
+            parameter = self.parameters.get(node.param_name)
+            if parameter is not None:
+                values, tracked = parameter
+                dynamic |= not tracked
+                for value in values():
+                    if pattern.match(value):
+                        params.append(value)
+                        self.match_node(node.param, segments, i+1, params, found)
+                        params.pop()
+        return dynamic
+
 #########################################
 #
-#  set_transition_duration(idx)
-#   selects the OBS transition with index idx if it exists
+#   pattern
+#   returns the compiled regular expression for an OSC pattern segment
 #
 #########################################
 
-def set_transition_duration(d, idx=-1):
-    trans = None
-    if idx == -1:
-        trans = obs.obs_frontend_get_current_transition()
-    else:
-        transitions = obs.obs_frontend_get_transitions()
-        if idx < len(transitions) and idx >= 0:
-            trans = transitions[idx]
-    if trans != None:
-        obs.obs_transition_enable_fixed(trans, True, d)
-   
+    def pattern(self, segment):
+        compiled = self.patterns.get(segment)
+        if compiled is None:
+            if len(self.patterns) >= OSC_MATCH_CACHE_SIZE:
+                self.patterns.clear()
+            compiled = re.compile(osc_pattern_to_regex(segment) + r'\Z')
+            self.patterns[segment] = compiled
+        return compiled
+
+############################################
+#^^^^^^^^^^ end class OSCAddressSpace ^^^^^^
+############################################
+
 #########################################
 #
-#  nextScene()
-#   returns the next scene after the current preview scenes
-#   returns the first scene if reached the end of the list or otherwise
-#   (must have at least one scene or index error will throw)
+#   coalesce functions for OSCAddressSpace.add
+#       osc_key_address     one value per address
+#       osc_key_names       one value per address and set of names
+#                           in a [name, value, name, value...] list
+#       osc_key_volume      one value per /obs/source/<source>/...
+#                           address segment, shared by the source's
+#                           volume, fade and fade cancel so that they
+#                           stay in the order they were received
+#       osc_key_volume_pressed
+#                           osc_key_volume for a button press (1.0),
+#                           its release is discrete so it doesn't
+#                           replace the press
 #
-#########################################     
-def nextScene():
-    scenes = obs.obs_frontend_get_scenes()
-    if len(scenes) > 1:
-        c_scene = obs.obs_frontend_get_current_preview_scene()
-        if c_scene != None:
-            i = scenes.index(c_scene) + 1
-            if i < len(scenes):
-                return scenes[i]
-    return scenes[0]
-    
+#########################################
+
+def osc_key_address(address, args):
+    return address
+
+def osc_key_volume(address, args):
+    return ("volume", address.split('/')[3])
+
+def osc_key_volume_pressed(address, args):
+    if len(args) == 1 and (args[0] == 1.0 or args[0] is OSC_IMPULSE):
+        return osc_key_volume(address, args)
+    return None
+
+def osc_key_names(address, args):
+    return (address,) + tuple(args[0::2])
+
 #########################################
 #
-#   transition(idx)
-#       executes the transition with index idx
-#
-#   transition()
-#       executes the currently selected transition
+#   osc_pattern_to_regex(segment)
+#       translates one segment of an OSC address pattern to a regular
+#       expression.  an unterminated [ or { is matched literally
 #
 #########################################
-      
-def transition(idx = -1):
-    trans = None
-    if idx >= 0 :
-        set_transition(idx)
-    trans = obs.obs_frontend_get_current_transition()
-    mode = obs.OBS_TRANSITION_MODE_AUTO
-    duration = 0
-    p_scene = obs.obs_frontend_get_current_preview_scene()
-    obs.obs_transition_start(trans, mode, duration, p_scene)
-    obs.obs_frontend_set_current_scene(p_scene)
+
+def osc_pattern_to_regex(segment):
+    regex = ''
+    i = 0
+    while i < len(segment):
+        c = segment[i]
+        if c == '*':
+            regex += '.*'
+        elif c == '?':
+            regex += '.'
+        elif c == '[' and segment.find(']', i) > i:
+            j = segment.find(']', i)
+            body = segment[i+1:j]
+            negate = body.startswith('!')
+            if negate:
+                body = body[1:]
+            body = ''.join(ch if ch == '-' else re.escape(ch) for ch in body)
+            regex += '[' + ('^' if negate else '') + body + ']'
+            i = j
+        elif c == '{' and segment.find('}', i) > i:
+            j = segment.find('}', i)
+            choices = segment[i+1:j].split(',')
+            regex += '(?:' + '|'.join(re.escape(choice) for choice in choices) + ')'
+            i = j
+        else:
+            regex += re.escape(c)
+        i += 1
+    return regex
 
 #########################################
 #
-#  go()
-#   executes the currently selected transition
-#   then selects the next scene for preview
+#   OSCCueRunner
+#       runs the timed steps of a cue on an OSCScheduler so that
+#       the receive thread never waits for a cue to finish
 #
-#  go(idx)
-#   executes the transition with index idx
-#   then selects the next scene for preview
+#   start(*steps)
+#       cancels any steps still delayed and starts a new cue
+#       each step is a tuple (delay, callback, args...)
+#       delay is in seconds from now.  a step with delay 0 is
+#       posted at once, in order with the calls of the messages
+#       around it, and is not cancelled
 #
-######################################### 
-
-def go(idx = -1):
-    n_scene = nextScene()
-    transition(idx)
-    time.sleep(2)
-    obs.obs_frontend_set_current_preview_scene(n_scene)
+#   then(*steps)
+#       adds steps to the current cue, delays are from now
+#       (used by a step that schedules what follows it)
+#
+#   wait(transition, timeout, callback, *args)
+#       adds a step to the current cue that is due when transition
+#       finishes, or after timeout seconds (see OBSTransitionWait)
+#       the wait holds the reference to transition passed to it
+#
+#   cancel()
+#       cancels the steps of the current cue, the transitions
+#       waited for are released on OBS's main thread
+#
+#   close()
+#       cancels the current cue and releases the transitions at once
+#       (called on OBS's main thread when the listener stops)
+#
+#   when a step is due it is posted, post(None, ...), to run on
+#   OBS's main thread (see OBSCallQueue).  it runs there while
+#   holding lock, the listener's dispatch lock, so it never
+#   interleaves with message dispatch, and only if its cue
+#   has not been cancelled in the meantime
+#
+#########################################
+
+class OSCCueRunner:
+
+    def __init__(self, scheduler, lock, post):
+        self.scheduler = scheduler
+        self.lock = lock
+        self.post = post
+        self.entries = []
+        self.waits = []
+        self.entries_lock = threading.Lock()
+        self.cue = 0
+
+    def start(self, *steps):
+        self.cancel()
+        self.then(*steps)
+
+    def then(self, *steps):
+        with self.entries_lock:
+            now = time.monotonic()
+            for step in steps:
+                if step[0] <= 0:
+                    self.post(None, step[1], *step[2:])
+                    continue
+                entry = self.scheduler.call_at(now + step[0], self.run_step,
+                                               self.cue, step[1], step[2:])
+                self.entries.append(entry)
+
+    def wait(self, transition, timeout, callback, *args):
+        with self.entries_lock:
+            self.waits.append(OBSTransitionWait(transition, self.scheduler, self.post, timeout,
+                                                self.run_step, self.cue, callback, args))
+
+    def cancel(self):
+        for waiting in self.cancel_steps():
+            self.post(None, waiting.release)
+
+    def close(self):
+        for waiting in self.cancel_steps():
+            waiting.release()
+
+    def cancel_steps(self):
+        with self.entries_lock:
+            for entry in self.entries:
+                self.scheduler.cancel(entry)
+            waits = self.waits
+            self.entries = []
+            self.waits = []
+            self.cue += 1
+            return waits
+
+    def run_step(self, cue, callback, args):
+        if cue == self.cue:
+            self.post(None, self.apply_step, cue, callback, args)
+
+    def apply_step(self, cue, callback, args):
+        with self.lock:
+            if cue == self.cue:
+                callback(*args)
+
+############################################
+#^^^^^^^^^^ end class OSCCueRunner ^^^^^^^^^
+############################################
+
+
+#########################################
+#
+#   OSCFeedback
+#       sends OBS state to OSC clients
+#
+#   update(address, *args)
+#       records the current value for a feedback address.  only values
+#       that differ from what was last sent are queued, and queued values
+#       are sent together by flush, at most rate times a second
+#
+#   set_targets(targets) / subscribe(target) / unsubscribe(target)
+#       targets are (ip, port) tuples.  set_targets replaces the
+#       configured targets, subscribe adds a client and sends it
+#       the complete current state
+#
+#   the bundles for a flush are encoded once and sent to every target
+#
+#########################################
+
+OSC_FEEDBACK_MAX_BUNDLE = 1400     # stay inside a typical network MTU
+
+class OSCFeedback:
+
+    def __init__(self, scheduler, rate=OBS_OSC_FEEDBACK_RATE):
+        self.scheduler = scheduler
+        self.interval = 1.0 / max(rate, 1)
+        self.lock = threading.Lock()
+        self.state = {}
+        self.pending = {}
+        self.targets = []
+        self.subscribers = []
+        self.flush_entry = None
+        self.last_flush = 0.0
+        self.udpsocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udpsocket.setblocking(False)
+
+    def close(self):
+        with self.lock:
+            if self.flush_entry is not None:
+                self.scheduler.cancel(self.flush_entry)
+                self.flush_entry = None
+        self.udpsocket.close()
+
+    def set_rate(self, rate):
+        self.interval = 1.0 / max(rate, 1)
+
+#########################################
+#
+#   update queues a changed value and schedules a flush
+#   no sooner than interval after the previous one
+#
+#########################################
+
+    def update(self, address, *args):
+        with self.lock:
+            if address not in self.pending and self.state.get(address) == args:
+                return
+            self.pending[address] = args
+            if self.flush_entry is None:
+                when = max(time.monotonic(), self.last_flush + self.interval)
+                self.flush_entry = self.scheduler.call_at(when, self.flush)
+
+    def flush(self):
+        with self.lock:
+            self.flush_entry = None
+            self.last_flush = time.monotonic()
+            changed = []
+            for address, args in self.pending.items():
+                if self.state.get(address) != args:
+                    changed.append(osc_encode_message(address, args))
+                    self.state[address] = args
+            self.pending.clear()
+            targets = self.targets + self.subscribers
+        if changed and targets:
+            self.send(osc_encode_bundles(changed, OSC_FEEDBACK_MAX_BUNDLE), targets)
+
+    def send_all(self, packets):
+        with self.lock:
+            targets = self.targets + self.subscribers
+        self.send(packets, targets)
+
+    def send(self, packets, targets):
+        for packet in packets:
+            for target in targets:
+                try:
+                    self.udpsocket.sendto(packet, target)
+                except OSError:
+                    pass    # unreachable or full, the next change is sent anyway
+
+#########################################
+#
+#   targets and subscribers
+#
+#########################################
+
+    def set_targets(self, targets):
+        with self.lock:
+            self.targets = list(targets)
+            added = [target for target in self.targets if target not in self.subscribers]
+        for target in added:
+            self.send_state(target)
+
+    def subscribe(self, target):
+        with self.lock:
+            if target not in self.subscribers:
+                self.subscribers.append(target)
+        self.send_state(target)
+
+    def unsubscribe(self, target):
+        with self.lock:
+            if target in self.subscribers:
+                self.subscribers.remove(target)
+
+    def send_state(self, target):
+        with self.lock:
+            messages = [osc_encode_message(address, args) for address, args in self.state.items()]
+        if messages:
+            self.send(osc_encode_bundles(messages, OSC_FEEDBACK_MAX_BUNDLE), [target])
+
+############################################
+#^^^^^^^^^^ end class OSCFeedback ^^^^^^^^^^
+############################################
+
+#########################################
+#
+#   OSCHistogram
+#       fixed buckets of latencies in microseconds
+#
+#   buckets are log-linear (like an HDR histogram with 2 bits of
+#   precision): exact below 8us, then 4 buckets for each power of 2
+#   so each bucket is within 25% of the values it counts
+#
+#########################################
+
+OSC_HISTOGRAM_BUCKETS = 96      # top bucket starts at about 50 s
+
+class OSCHistogram:
+
+    def __init__(self):
+        self.counts = [0] * OSC_HISTOGRAM_BUCKETS
+        self.maximum = 0
+
+    def record(self, ns):
+        us = ns // 1000
+        if us > self.maximum:
+            self.maximum = us
+        if us < 8:
+            self.counts[us if us > 0 else 0] += 1
+        else:
+            e = us.bit_length() - 3
+            i = (e << 2) + (us >> e)
+            self.counts[i if i < OSC_HISTOGRAM_BUCKETS else OSC_HISTOGRAM_BUCKETS - 1] += 1
+
+    @staticmethod
+    def bucket_start(i):
+        if i < 8:
+            return i
+        e = (i >> 2) - 1
+        return ((i & 3) | 4) << e
+
+#########################################
+#
+#   percentile returns the start of the bucket that holds
+#   the given fraction of the recorded values
+#
+#########################################
+
+    def percentile(self, fraction):
+        counts = list(self.counts)
+        rank = fraction * sum(counts)
+        if rank == 0:
+            return 0
+        total = 0
+        for i, count in enumerate(counts):
+            total += count
+            if total >= rank and count:
+                return min(OSCHistogram.bucket_start(i), self.maximum)
+        return self.maximum
+
+    def summary(self):
+        return [float(self.percentile(0.5)), float(self.percentile(0.9)),
+                float(self.percentile(0.99)), float(self.maximum)]
+
+############################################
+#^^^^^^^^^^ end class OSCHistogram ^^^^^^^^^
+############################################
+
+#########################################
+#
+#   OSCMetrics
+#       counters and latency histograms of an OSCListener
+#
+#   packets, messages and bundles received, messages that matched
+#   no route, decode errors by reason and messages per route
+#   (keyed by handler, see OSCAddressSpace.templates)
+#   values replaced in and messages dropped from the dispatch queue
+#   obspython calls collapsed by the main thread queue (see OBSCallQueue)
+#
+#   latency histograms:
+#       receive     from packet_received to the start of dispatch
+#                   (decoding, queueing and waiting for the dispatch lock)
+#       dispatch    from the start of dispatch until the handlers
+#                   have returned (queueing their obspython calls)
+#       apply       from queueing an obspython call until it
+#                   is made on OBS's main thread
+#
+#   counters are updated without a lock by the dispatching threads,
+#   reset replaces them all at once
+#
+#########################################
+
+class OSCMetrics:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.packets = 0
+        self.messages = 0
+        self.bundles = 0
+        self.unmatched = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.collapsed = 0
+        self.errors = {}
+        self.routes = {}
+        self.receive = OSCHistogram()
+        self.dispatch = OSCHistogram()
+        self.apply = OSCHistogram()
+
+    def error(self, reason):
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+#########################################
+#
+#   messages_for returns the metrics as a list of (address, args)
+#   sent in reply to /obs/stats.  templates maps handlers to routes
+#
+#########################################
+
+    def messages_for(self, templates):
+        messages = [
+            ("/obs/stats/uptime", [float(time.time() - self.started)]),
+            ("/obs/stats/packets", [self.packets]),
+            ("/obs/stats/messages", [self.messages]),
+            ("/obs/stats/bundles", [self.bundles]),
+            ("/obs/stats/unmatched", [self.unmatched]),
+            ("/obs/stats/coalesced", [self.coalesced]),
+            ("/obs/stats/dropped", [self.dropped]),
+            ("/obs/stats/collapsed", [self.collapsed]),
+            ("/obs/stats/latency/receive", self.receive.summary()),
+            ("/obs/stats/latency/dispatch", self.dispatch.summary()),
+            ("/obs/stats/latency/apply", self.apply.summary()),
+        ]
+        for reason, count in list(self.errors.items()):
+            messages.append(("/obs/stats/error", [reason, count]))
+        for handler, count in list(self.routes.items()):
+            messages.append(("/obs/stats/route", [templates.get(handler, "?"), count]))
+        return messages
+
+    def report(self, templates):
+        lines = ["packets " + str(self.packets) + ", messages " + str(self.messages)
+                 + ", bundles " + str(self.bundles) + ", unmatched " + str(self.unmatched),
+                 "queue coalesced " + str(self.coalesced) + ", dropped " + str(self.dropped)
+                 + ", obs calls collapsed " + str(self.collapsed)]
+        for name, histogram in (("receive", self.receive), ("dispatch", self.dispatch), ("apply", self.apply)):
+            p50, p90, p99, most = histogram.summary()
+            lines.append(name + " latency us p50 " + str(int(p50)) + ", p90 " + str(int(p90))
+                         + ", p99 " + str(int(p99)) + ", max " + str(int(most)))
+        for reason, count in sorted(self.errors.items()):
+            lines.append("error " + reason + ": " + str(count))
+        counts = sorted(((templates.get(handler, "?"), count) for handler, count in list(self.routes.items())))
+        for template, count in counts:
+            lines.append(template + ": " + str(count))
+        return lines
+
+############################################
+#^^^^^^^^^^ end class OSCMetrics ^^^^^^^^^^^
+############################################
+
+#########################################
+#
+#   OSCTracer
+#       records spans in a preallocated ring and writes them
+#       as a Chrome trace-event file
+#
+#   a span is a name, the thread it ran on, its start and end in
+#   perf_counter_ns and an optional detail (the address of a message).
+#   the ring keeps the last OSC_TRACE_SPANS, older spans are overwritten,
+#   so tracing can stay on through a show and be written after a slow cue
+#
+#   traced(name, function, label) returns function wrapped to record a
+#   span for each call, with its first argument as the detail if label
+#   is given.  tracing is turned on by installing wrapped functions
+#   (see OSCListener.trace and OBSTracedModule) and off by removing
+#   them, so nothing is checked on the hot paths while it is off
+#
+#   write(path) writes complete ("X") events, one thread per
+#   thread that recorded spans, and returns the number of spans.
+#   spans recorded while writing may be written only in part
+#
+#########################################
+
+OSC_TRACE_SPANS = 1 << 16
+OSC_TRACE_METHODS = (           # OSCListener methods traced, (name, label of its detail)
+    ("listen_wakeup", None),
+    ("packet_received", None),
+    ("process_message_at", None),
+    ("dispatch_message", "address"),
+    ("dispatch_matched", None),
+)
+
+class OSCTracer:
+
+    def __init__(self, size=OSC_TRACE_SPANS):
+        self.size = size
+        self.names = [None] * size
+        self.details = [None] * size
+        self.begins = array('q', bytes(8 * size))
+        self.ends = array('q', bytes(8 * size))
+        self.threads = array('q', bytes(8 * size))
+        self.thread_names = {}
+        self.labels = {}                # span name to the label of its detail
+        self.counter = itertools.count()
+        self.recorded = 0
+
+    def span(self, name, begin, detail=None):
+        end = time.perf_counter_ns()
+        n = next(self.counter)          # atomic, each span gets its own slot
+        i = n % self.size
+        thread = threading.get_native_id()
+        if thread not in self.thread_names:
+            self.thread_names[thread] = threading.current_thread().name
+        self.names[i] = name
+        self.details[i] = detail
+        self.begins[i] = begin
+        self.ends[i] = end
+        self.threads[i] = thread
+        if n >= self.recorded:
+            self.recorded = n + 1
+
+    def traced(self, name, function, label=None):
+        span = self.span
+        clock = time.perf_counter_ns
+        if label is None:
+            def traced_call(*args, **kwargs):
+                begin = clock()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    span(name, begin)
+        else:
+            self.labels[name] = label
+            def traced_call(*args, **kwargs):
+                begin = clock()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    span(name, begin, args[0])
+        traced_call.__name__ = name
+        return traced_call
+
+    def write(self, path):
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "OBS_OSC"}}]
+        for thread, name in list(self.thread_names.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread,
+                           "args": {"name": name}})
+        count = 0
+        recorded = self.recorded
+        for n in range(max(recorded - self.size, 0), recorded):
+            i = n % self.size
+            name = self.names[i]
+            if name is None:
+                continue
+            begin = self.begins[i]
+            event = {"name": name, "ph": "X", "pid": pid, "tid": self.threads[i],
+                     "ts": begin / 1000.0, "dur": (self.ends[i] - begin) / 1000.0}
+            detail = self.details[i]
+            if detail is not None:
+                event["args"] = {self.labels.get(name, "detail"): str(detail)}
+            events.append(event)
+            count += 1
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return count
+
+############################################
+#^^^^^^^^^^ end class OSCTracer ^^^^^^^^^^^^
+############################################
+
+#########################################
+#
+#   OSCDispatchQueue
+#       a bounded queue between receiving and dispatching
+#       with its own dispatch thread
+#
+#   items are (callback, args) called on the dispatch thread
+#
+#   discrete items (triggers, bundles, anything that is not a
+#   continuous value) are dispatched first, in the order received
+#
+#   continuous values (faders) are kept by key, a newer value for the
+#   same key replaces the queued one in place.  they are dispatched
+#   after the discrete items in the order their keys were first queued
+#
+#   when size items are queued, overflow decides:
+#       "drop-oldest"   the oldest continuous value is dropped to make
+#                       room (the new item is dropped if there is none)
+#       "drop-newest"   the new item is dropped
+#       "block"         the receiving thread waits for room, leaving
+#                       packets in the socket's buffer
+#
+#   replaced and dropped items are counted in metrics
+#
+#########################################
+
+OSC_OVERFLOW_POLICIES = ("drop-oldest", "drop-newest", "block")
+
+class OSCDispatchQueue:
+
+    def __init__(self, size, overflow, metrics):
+        self.size = max(size, 1)
+        self.overflow = overflow
+        self.metrics = metrics
+        self.condition = threading.Condition()
+        self.discrete = deque()
+        self.continuous = OrderedDict()
+        self.blocked = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+#########################################
+#
+#   stop
+#   the dispatch thread dispatches what is queued, then exits
+#
+#########################################
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        thread = self.thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(1.0)
+        self.thread = None
+
+#########################################
+#
+#   put
+#   queues callback(*args), continuous under key if key is not None
+#   returns False if the queue is stopped, the caller should then
+#   dispatch the item itself
+#
+#########################################
+
+    def put(self, key, callback, args):
+        with self.condition:
+            if not self.running:
+                return False
+            if key is not None and key in self.continuous:
+                self.continuous[key] = (callback, args)
+                self.metrics.coalesced += 1
+                return True
+            if len(self.discrete) + len(self.continuous) >= self.size:
+                if not self.make_room():
+                    return self.running
+            if key is None:
+                self.discrete.append((callback, args))
+            else:
+                self.continuous[key] = (callback, args)
+            self.condition.notify()
+        return True
+
+#########################################
+#
+#   make_room
+#   applies the overflow policy while holding the condition's lock
+#   returns True if there is now room for the new item
+#
+#########################################
+
+    def make_room(self):
+        if self.overflow == "block":
+            self.blocked += 1
+            while self.running and len(self.discrete) + len(self.continuous) >= self.size:
+                self.condition.wait()
+            self.blocked -= 1
+            return self.running
+        self.metrics.dropped += 1
+        if self.overflow == "drop-oldest" and self.continuous:
+            self.continuous.popitem(last=False)
+            return True
+        return False
+
+    def run(self):
+        condition = self.condition
+        while True:
+            with condition:
+                while self.running and not self.discrete and not self.continuous:
+                    condition.wait()
+                if self.discrete:
+                    callback, args = self.discrete.popleft()
+                elif self.continuous:
+                    callback, args = self.continuous.popitem(last=False)[1]
+                else:
+                    return      # stopped and empty
+                if self.blocked:
+                    condition.notify_all()
+            try:
+                callback(*args)
+            except Exception:
+                traceback.print_exc()
+
+############################################
+#^^^^^^^^^^ end class OSCDispatchQueue ^^^^^
+############################################
+
+#########################################
+#
+#   OSC packet log
+#
+#   an append-only binary file of received packets
+#   the file starts with the 8 byte OSC_LOG_MAGIC, then for each packet
+#   a fixed 32 byte header followed by the packet's bytes:
+#
+#       uint64  time received, ns since the epoch
+#       uint32  packet length
+#       16 bytes sender address, IPv6 or IPv4-mapped (::ffff:a.b.c.d)
+#       uint16  sender port
+#       uint16  reserved, 0
+#
+#   all big-endian.  a record cut short (OBS quit mid-write) ends the log
+#
+#########################################
+
+OSC_LOG_MAGIC = b'OSCLOG\x00\x01'
+osc_log_record = struct.Struct('>QI16sHH')
+OSC_LOG_BUFFER = 1 << 16
+OSC_LOG_FLUSH = 1.0             # seconds between flushes to disk
+
+def osc_log_address(sender):
+    if sender is None:
+        return bytes(16), 0
+    try:
+        if ':' in sender[0]:
+            return socket.inet_pton(socket.AF_INET6, sender[0]), sender[1]
+        return b'\0' * 10 + b'\xff\xff' + socket.inet_aton(sender[0]), sender[1]
+    except (OSError, TypeError):
+        return bytes(16), 0
+
+def osc_log_sender(address, port):
+    if address == bytes(16) and port == 0:
+        return None
+    if address.startswith(b'\0' * 10 + b'\xff\xff'):
+        return (socket.inet_ntoa(address[12:]), port)
+    return (socket.inet_ntop(socket.AF_INET6, address), port)
+
+#########################################
+#
+#   OSCRecorder
+#       appends packets to an OSC packet log
+#
+#   record is called by the listener thread for every packet,
+#   it is one pack and one buffered write.  the scheduler flushes
+#   the file every OSC_LOG_FLUSH seconds so little is lost in a crash
+#
+#   raises OSError if path can't be opened or ValueError if it
+#   is not empty and not an OSC packet log
+#
+#########################################
+
+class OSCRecorder:
+
+    def __init__(self, path, scheduler):
+        self.path = path
+        self.file = open(path, 'ab', buffering=OSC_LOG_BUFFER)
+        if self.file.tell() == 0:
+            self.file.write(OSC_LOG_MAGIC)
+        else:
+            with open(path, 'rb') as existing:
+                if existing.read(len(OSC_LOG_MAGIC)) != OSC_LOG_MAGIC:
+                    self.file.close()
+                    raise ValueError(path + " is not an OSC packet log")
+        self.senders = {}
+        self.packets = 0
+        self.scheduler = scheduler
+        self.flush_entry = scheduler.call_later(OSC_LOG_FLUSH, self.flush)
+
+    def record(self, data, end, sender):
+        packed = self.senders.get(sender)
+        if packed is None:
+            packed = osc_log_address(sender)
+            if len(self.senders) < 256:
+                self.senders[sender] = packed
+        try:
+            self.file.write(osc_log_record.pack(time.time_ns(), end, packed[0], packed[1], 0) + data[:end])
+        except ValueError:
+            return      # closed by capture() on another thread
+        self.packets += 1
+
+    def flush(self):
+        try:
+            self.file.flush()
+        except (OSError, ValueError):
+            return      # closed
+        self.flush_entry = self.scheduler.call_later(OSC_LOG_FLUSH, self.flush)
+
+    def close(self):
+        self.scheduler.cancel(self.flush_entry)
+        self.file.close()
+
+############################################
+#^^^^^^^^^^ end class OSCRecorder ^^^^^^^^^^
+############################################
+
+#########################################
+#
+#   OSCLogReader
+#       reads an OSC packet log through mmap
+#
+#   iterating yields (time_ns, sender, packet) for each record
+#   packet is a memoryview of the mapped file, valid until close
+#
+#########################################
+
+class OSCLogReader:
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:          # empty file
+            self.file.close()
+            raise ValueError(path + " is not an OSC packet log")
+        if self.map[:len(OSC_LOG_MAGIC)] != OSC_LOG_MAGIC:
+            self.close()
+            raise ValueError(path + " is not an OSC packet log")
+        self.view = memoryview(self.map)
+
+    def __iter__(self):
+        data = self.map
+        view = self.view
+        end = len(data)
+        i = len(OSC_LOG_MAGIC)
+        while i + osc_log_record.size <= end:
+            time_ns, size, address, port, reserved = osc_log_record.unpack_from(data, i)
+            i += osc_log_record.size
+            if i + size > end:
+                return
+            yield time_ns, osc_log_sender(address, port), view[i:i + size]
+            i += size
+
+    def close(self):
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        self.map.close()
+        self.file.close()
+
+############################################
+#^^^^^^^^^^ end class OSCLogReader ^^^^^^^^^
+############################################
+
+#########################################
+#
+#   OSC command ring
+#
+#   a file mapped into memory by the OBS script and an OSC front end
+#   process (see OSCFrontEnd) that passes it the messages it receives
+#   as commands that are already decoded and routed
+#
+#   the file starts with a 32 byte header, native byte order:
+#
+#       8 bytes OSC_RING_MAGIC
+#       uint32  record size, OSC_RING_RECORD
+#       uint32  number of records, OSC_RING_SLOTS
+#       uint64  records written, only the front end writes it
+#       uint64  records read, only the script writes it
+#
+#   followed by the fixed size records.  the counters count records.
+#   a command starts at record n % OSC_RING_SLOTS with a uint32
+#   (n + 1) & 0xffffffff, written last so the reader can tell the command
+#   is complete, a uint32 length and the command, a marshalled tuple
+#   (address, routes, args, host, port, received).  a command longer than
+#   a record continues in the records that follow (wrapping to the first
+#   record at the end of the ring), so any command up to the size of the
+#   ring fits, a large packet's as well as a fader's
+#
+#       routes      ((template, params), ...) the message matched, or None
+#                   if the address is a pattern for the script to match
+#       args        the arguments, blobs as bytes and impulses as Ellipsis
+#       host, port  the sender, host "" if none
+#       received    time.perf_counter_ns() the packet arrived
+#                   (the same clock in both processes)
+#
+#########################################
+
+OSC_RING_MAGIC = b'OSCRING\x02'
+osc_ring_header = struct.Struct('=8sIIQQ')
+osc_ring_counter = struct.Struct('=Q')
+osc_ring_record = struct.Struct('=II')
+osc_ring_uint = struct.Struct('=I')
+OSC_RING_WRITTEN = 16           # offsets of the counters
+OSC_RING_READ = 24
+OSC_RING_RECORD = 256
+OSC_RING_SLOTS = 4096
+OSC_RING_WAIT = 0.1             # seconds the front end waits for room
+
+def osc_command_args(args):
+    return [Ellipsis if arg is OSC_IMPULSE else
+            arg.tobytes() if isinstance(arg, memoryview) else
+            osc_command_args(arg) if isinstance(arg, list) else arg for arg in args]
+
+def osc_command_values(args):
+    for i, arg in enumerate(args):
+        if arg is Ellipsis:
+            args[i] = OSC_IMPULSE
+        elif isinstance(arg, list):
+            osc_command_values(arg)
+
+#########################################
+#
+#   OSCCommandRing
+#       one end of an OSC command ring
+#
+#   the script creates the ring, create=True, making the file if it
+#   doesn't exist and skipping commands left in it.  the front end
+#   opens the existing file.  there is one writer and one reader,
+#   neither waits for the other
+#
+#   put(command) adds a command, returns False if the ring is full
+#   raises ValueError if the command is larger than the whole ring
+#
+#   take() returns the commands written since the last take
+#
+#   raises OSError if path can't be opened or ValueError if it
+#   is not an OSC command ring
+#
+#########################################
+
+class OSCCommandRing:
+
+    def __init__(self, path, create=False):
+        self.path = path
+        size = osc_ring_header.size + OSC_RING_SLOTS * OSC_RING_RECORD
+        self.file = open(path, 'a+b' if create else 'r+b')
+        self.file.seek(0, 2)
+        if create and self.file.tell() != size:
+            self.file.truncate(size)
+        elif self.file.tell() < size:
+            self.file.close()
+            raise ValueError(path + " is not an OSC command ring")
+        self.map = mmap.mmap(self.file.fileno(), size)
+        magic, record, slots, written, read = osc_ring_header.unpack_from(self.map, 0)
+        valid = magic == OSC_RING_MAGIC and record == OSC_RING_RECORD and slots == OSC_RING_SLOTS
+        if create:
+            if not valid:
+                written = 0
+            osc_ring_header.pack_into(self.map, 0, OSC_RING_MAGIC, OSC_RING_RECORD, OSC_RING_SLOTS,
+                                      written, written)
+        elif not valid:
+            self.close()
+            raise ValueError(path + " is not an OSC command ring")
+
+    def put(self, command):
+        size = len(command)
+        records = (osc_ring_record.size + size + OSC_RING_RECORD - 1) // OSC_RING_RECORD
+        if records > OSC_RING_SLOTS:
+            raise ValueError("command too large")
+        data = self.map
+        written = osc_ring_counter.unpack_from(data, OSC_RING_WRITTEN)[0]
+        if written + records - osc_ring_counter.unpack_from(data, OSC_RING_READ)[0] > OSC_RING_SLOTS:
+            return False
+        i = osc_ring_header.size + (written % OSC_RING_SLOTS) * OSC_RING_RECORD
+        start = i + osc_ring_record.size
+        room = osc_ring_header.size + OSC_RING_SLOTS * OSC_RING_RECORD - start
+        if size <= room:
+            data[start:start + size] = command
+        else:
+            data[start:start + room] = command[:room]
+            data[osc_ring_header.size:osc_ring_header.size + size - room] = command[room:]
+        osc_ring_uint.pack_into(data, i + 4, size)
+        osc_ring_uint.pack_into(data, i, (written + 1) & 0xffffffff)
+        osc_ring_counter.pack_into(data, OSC_RING_WRITTEN, written + records)
+        return True
+
+    def take(self):
+        data = self.map
+        written = osc_ring_counter.unpack_from(data, OSC_RING_WRITTEN)[0]
+        read = osc_ring_counter.unpack_from(data, OSC_RING_READ)[0]
+        end = osc_ring_header.size + OSC_RING_SLOTS * OSC_RING_RECORD
+        commands = []
+        while read < written:
+            i = osc_ring_header.size + (read % OSC_RING_SLOTS) * OSC_RING_RECORD
+            sequence, size = osc_ring_record.unpack_from(data, i)
+            if sequence != (read + 1) & 0xffffffff:
+                break       # not complete yet, taken next time
+            start = i + osc_ring_record.size
+            if start + size <= end:
+                commands.append(data[start:start + size])
+            else:
+                commands.append(data[start:end] + data[osc_ring_header.size:osc_ring_header.size + start + size - end])
+            read += (osc_ring_record.size + size + OSC_RING_RECORD - 1) // OSC_RING_RECORD
+        osc_ring_counter.pack_into(data, OSC_RING_READ, read)
+        return commands
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+############################################
+#^^^^^^^^^^ end class OSCCommandRing ^^^^^^^
+############################################
+
+
+#########################################
+#
+#   OSCEndpoint
+#       one socket the listener receives on and its statistics
+#
+#   proto is "udp" or "tcp".  interface is the address to bind
+#   ('' for all interfaces).  option is a multicast group to join
+#   for udp or the framing ("slip" or "length") for tcp
+#
+#   the listener counts packets, bytes, truncated datagrams,
+#   framing errors and connected clients for each endpoint
+#
+#########################################
+
+class OSCEndpoint:
+
+    def __init__(self, proto, interface, port, option=""):
+        self.proto = proto
+        self.interface = interface
+        self.port = port
+        self.group = option if proto == "udp" else ""
+        self.framing = (option or "slip") if proto == "tcp" else ""
+        self.sock = None
+        self.packets = 0
+        self.bytes = 0
+        self.truncated = 0
+        self.errors = 0
+        self.clients = 0
+
+#########################################
+#
+#   open creates the endpoint's non-blocking socket
+#   a multicast endpoint binds the port on all interfaces and joins
+#   its group on interface (or the default interface)
+#
+#########################################
+
+    def open(self, rcvbuf=0):
+        if self.proto == "tcp":
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.interface, self.port))
+            sock.listen(16)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            if rcvbuf > 0:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+            if self.group:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.bind(('', self.port))
+                membership = socket.inet_aton(self.group) + socket.inet_aton(self.interface or '0.0.0.0')
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+            else:
+                sock.bind((self.interface, self.port))
+        sock.setblocking(False)
+        self.sock = sock
+        return sock
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def describe(self):
+        text = self.proto + " " + (self.interface or "*") + ":" + str(self.port)
+        if self.group:
+            text += " " + self.group
+        if self.framing:
+            text += " " + self.framing
+        return text
+
+    def statistics(self):
+        text = "packets " + str(self.packets) + ", bytes " + str(self.bytes)
+        if self.proto == "tcp":
+            text += ", clients " + str(self.clients) + ", framing errors " + str(self.errors)
+        else:
+            text += ", truncated " + str(self.truncated)
+        return text
+
+############################################
+#^^^^^^^^^^ end class OSCEndpoint ^^^^^^^^^^
+############################################
+
+#########################################
+#
+#   parse_endpoint(spec)
+#       returns the OSCEndpoint for "[udp|tcp] [INTERFACE:]PORT [GROUP|slip|length]"
+#       raises ValueError if spec can't be parsed
+#
+#########################################
+
+def parse_endpoint(spec):
+    tokens = spec.split()
+    proto = "udp"
+    if tokens and tokens[0].lower() in ("udp", "tcp"):
+        proto = tokens.pop(0).lower()
+    if len(tokens) not in (1, 2):
+        raise ValueError("bad endpoint " + spec)
+    interface, sep, port = tokens[0].rpartition(':')
+    option = tokens[1] if len(tokens) == 2 else ""
+    if proto == "tcp" and option not in ("", "slip", "length"):
+        raise ValueError("bad tcp framing " + option)
+    if proto == "udp" and option:
+        socket.inet_aton(option)    # raises OSError, a ValueError, if not an address
+    return OSCEndpoint(proto, interface, int(port), option)
+
+
+OSC_BUFFER_POOL_SIZE = 4
+OSC_STREAM_CHUNK = 65536
+OSC_MAX_PACKET_LIMIT = 65536
+OSC_REBIND_GRACE = 0.25         # seconds replaced endpoints keep receiving
+OSC_REBIND_TIMEOUT = 1.0        # seconds rebind waits for the listen loop
+OSC_LIVENESS_INTERVAL = 1.0     # seconds between heartbeats of an idle listen loop
+OSC_LIVENESS_STALL = 5.0        # seconds without a heartbeat that mean the loop is stuck
+
+#########################################
+#
+#   OSCListener
+#       implements basic OSC UDP receiving and parsing
+#
+#   start_listening(port)
+#       starts a thread that listenes for UDP packets on the specified port
+#
+#   stop_listening()
+#       terminates the listen loop/thread
+#
+#   rebind(port, ...)
+#       moves the listener to new endpoints without stopping it
+#
+#   liveness()
+#       returns what is wrong with the listener's threads, if anything
+#
+#   dispatch_message()
+#       is called when an OSC message is received, after
+#       its addressPattern and args[] are extracted
+#       obspython methods are called based on the addressPattern
+#
+#########################################
+
+class OSCListener:
+    
+    def __init__(self):
+        self.listen_thread = None 
+        self.listening = False
+        self.endpoints = []
+        self.clients = {}
+        self.max_packet = OBS_OSC_MAX_PACKET
+        self.selector = None
+        self.wake_in = None
+        self.wake_out = None
+        self.heartbeat = 0.0
+        self.rebinding = None
+        self.rebind_lock = threading.Lock()
+        self.switched = threading.Event()
+        self.retiring = []
+        self.scheduler = OSCScheduler()
+        self.dispatch_lock = threading.RLock()
+        self.buffers = []
+        self.buffer_index = 0
+        self.cues = OSCCueRunner(self.scheduler, self.dispatch_lock, obs_calls.call)
+        self.feedback = OSCFeedback(self.scheduler)
+        self.sender = None
+        self.received = 0
+        self.metrics = OSCMetrics()
+        self.recorder = None
+        self.queue = None
+        self.commands = None
+        self.tracer = None
+        self.routes = OSCAddressSpace()
+        self.add_routes(self.routes)
+
+#########################################
+#
+#   start_listening creates the listening sockets
+#   and creates a thread that runs the listen() method
+#
+#   max_packet is the size of the preallocated receive buffers
+#   (larger datagrams are truncated), rcvbuf sets the udp sockets'
+#   SO_RCVBUF in bytes so that bursts are queued by the kernel
+#
+#   if tcp_port is not 0, a TCP socket listens on it as well
+#   tcp_framing is "slip" or "length", see OSCStreamFramer
+#   endpoints is a list of additional OSCEndpoints
+#
+#   every socket is registered with the selector along with the
+#   method that handles it becoming readable and its endpoint
+#
+#   a socketpair is used to wake the listen loop when
+#   stop_listening is called (a pipe won't work with select on Windows)
+#
+#########################################
+    
+    def start_listening(self, port, max_packet=OBS_OSC_MAX_PACKET, rcvbuf=0,
+                        tcp_port=0, tcp_framing="slip", endpoints=()):
+        self.open_endpoints(port, rcvbuf, tcp_port, tcp_framing, endpoints)
+        self.max_packet = max_packet
+        self.buffers = [bytearray(max_packet) for i in range(OSC_BUFFER_POOL_SIZE)]
+        self.wake_in, self.wake_out = socket.socketpair()
+        self.wake_in.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        for endpoint in self.endpoints:
+            if endpoint.proto == "tcp":
+                self.selector.register(endpoint.sock, selectors.EVENT_READ, (self.accept_clients, endpoint))
+            else:
+                self.selector.register(endpoint.sock, selectors.EVENT_READ, (self.receive_datagrams, endpoint))
+        self.selector.register(self.wake_in, selectors.EVENT_READ, (self.drain_wakeup, None))
+        self.scheduler.start()
+        self.listening = True
+        self.heartbeat = time.monotonic()
+        if self.listen_thread is None:
+            self.listen_thread = threading.Thread(target=self.listen)
+            self.listen_thread.daemon = True
+            self.listen_thread.start()
+
+#########################################
+#
+#   open_endpoints
+#   opens the main udp endpoint on port, the tcp endpoint and
+#   any additional endpoints.  an error opening the main endpoint
+#   is raised, an additional endpoint that can't be opened is skipped
+#
+#########################################
+
+    def open_endpoints(self, port, rcvbuf, tcp_port, tcp_framing, endpoints):
+        main = OSCEndpoint("udp", "", port)
+        main.open(rcvbuf)
+        self.endpoints = [main]
+        extra = list(endpoints)
+        if tcp_port:
+            extra.insert(0, OSCEndpoint("tcp", "", tcp_port, tcp_framing))
+        for endpoint in extra:
+            try:
+                endpoint.open(rcvbuf)
+                self.endpoints.append(endpoint)
+            except OSError as e:
+                print("OSC endpoint " + endpoint.describe() + " not opened: " + str(e))
+
+#########################################
+#
+#   rebind
+#   moves the listener to the endpoints start_listening would open
+#   for these arguments while it keeps running.  endpoints that
+#   don't change (and their tcp clients) are kept, new ones are
+#   opened first and switched in by the listen loop at once.  the ones
+#   they replace keep receiving for OSC_REBIND_GRACE seconds, then
+#   what is queued on them is received and they are closed
+#
+#   an error opening the main udp endpoint is raised and the listener
+#   stays where it was.  returns False if the listen loop doesn't
+#   switch within OSC_REBIND_TIMEOUT (it is not running)
+#
+#   bound_endpoints returns the endpoints and those still retiring,
+#   which a rebind back to them within the grace period keeps
+#
+#########################################
+
+    def rebind(self, port, max_packet=OBS_OSC_MAX_PACKET, rcvbuf=0,
+               tcp_port=0, tcp_framing="slip", endpoints=()):
+        wanted = [OSCEndpoint("udp", "", port)]
+        if tcp_port:
+            wanted.append(OSCEndpoint("tcp", "", tcp_port, tcp_framing))
+        wanted.extend(endpoints)
+        current = dict((endpoint.describe(), endpoint) for endpoint in self.bound_endpoints())
+        opened = []
+        switched = []
+        for endpoint in wanted:
+            kept = current.pop(endpoint.describe(), None)
+            if kept is not None:
+                if rcvbuf > 0 and kept.proto == "udp":
+                    kept.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+                switched.append(kept)
+                continue
+            try:
+                endpoint.open(rcvbuf)
+            except OSError as e:
+                if endpoint is wanted[0]:
+                    for new in opened:
+                        new.close()
+                    raise
+                print("OSC endpoint " + endpoint.describe() + " not opened: " + str(e))
+                continue
+            opened.append(endpoint)
+            switched.append(endpoint)
+        if max_packet != self.max_packet:
+            self.max_packet = max_packet
+            self.buffers = [bytearray(max_packet) for i in range(OSC_BUFFER_POOL_SIZE)]
+        try:
+            if self.switch_endpoints(switched):
+                return True
+        except OSError:
+            for new in opened:
+                new.close()
+            raise
+        for new in opened:
+            new.close()
+        return False
+
+    def bound_endpoints(self):
+        return self.endpoints + [endpoint for deadline, endpoint in self.retiring]
+
+#########################################
+#
+#   switch_endpoints
+#   hands the endpoints to the listen loop and waits for it to switch
+#   returns False if it doesn't within OSC_REBIND_TIMEOUT
+#
+#   switch_pending
+#   called by the listen loop, registers the new endpoints and
+#   retires the ones they replace
+#
+#   retire_endpoints
+#   called by the listen loop, receives what is queued on endpoints
+#   retired OSC_REBIND_GRACE ago, closes them and their tcp clients
+#
+#########################################
+
+    def switch_endpoints(self, endpoints):
+        self.switched.clear()
+        with self.rebind_lock:
+            self.rebinding = endpoints
+        self.wake()
+        if self.switched.wait(OSC_REBIND_TIMEOUT):
+            return True
+        with self.rebind_lock:
+            if self.rebinding is endpoints:
+                self.rebinding = None
+                return False
+        return True
+
+    def switch_pending(self):
+        with self.rebind_lock:
+            endpoints = self.rebinding
+            self.rebinding = None
+        if endpoints is None:
+            return
+        registered = self.bound_endpoints()
+        self.retiring = [(deadline, endpoint) for deadline, endpoint in self.retiring
+                         if endpoint not in endpoints]
+        for endpoint in endpoints:
+            if endpoint not in registered:
+                if endpoint.proto == "tcp":
+                    self.selector.register(endpoint.sock, selectors.EVENT_READ, (self.accept_clients, endpoint))
+                else:
+                    self.selector.register(endpoint.sock, selectors.EVENT_READ, (self.receive_datagrams, endpoint))
+        deadline = time.monotonic() + OSC_REBIND_GRACE
+        for endpoint in self.endpoints:
+            if endpoint not in endpoints:
+                self.retiring.append((deadline, endpoint))
+        self.endpoints = endpoints
+        self.switched.set()
+
+    def retire_endpoints(self):
+        now = time.monotonic()
+        while self.retiring and self.retiring[0][0] <= now:
+            deadline, endpoint = self.retiring.pop(0)
+            if endpoint.proto == "tcp":
+                for key in list(self.selector.get_map().values()):
+                    if key.data[1] is endpoint and key.fileobj in self.clients:
+                        self.close_client(key.fileobj, endpoint)
+            else:
+                self.receive_datagrams(endpoint.sock, endpoint)
+            self.selector.unregister(endpoint.sock)
+            endpoint.close()
+
+#########################################
+#
+#   liveness
+#   returns a list of the listener's problems, empty if it is alive:
+#   a stopped listen, scheduler or dispatch thread or a listen loop
+#   without a heartbeat for OSC_LIVENESS_STALL seconds.
+#   the loop beats at least every OSC_LIVENESS_INTERVAL
+#
+#########################################
+
+    def liveness(self):
+        problems = []
+        if self.endpoints:
+            thread = self.listen_thread
+            if thread is None or not thread.is_alive():
+                problems.append("listen thread stopped")
+            else:
+                silent = time.monotonic() - self.heartbeat
+                if silent > OSC_LIVENESS_STALL:
+                    problems.append("listen loop stalled for " + str(int(silent)) + " s")
+        thread = self.scheduler.thread
+        if thread is None or not thread.is_alive():
+            problems.append("scheduler stopped")
+        queue = self.queue
+        if queue is not None and (queue.thread is None or not queue.thread.is_alive()):
+            problems.append("dispatch thread stopped")
+        return problems
+
+#########################################
+#
+#   stop_listening clears the listening flag and wakes the listen loop
+#   the loop closes the sockets itself on its way out so that
+#   a socket is never closed while the loop is blocked on it
+#
+#########################################
+            
+    def stop_listening(self):
+        self.listening = False
+        self.set_queue(0)
+        self.capture(None)
+        self.receive_commands(None)
+        self.feedback.close()
+        self.cues.close()
+        self.scheduler.stop()
+        self.wake()
+        thread = self.listen_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(1.0)
+
+#########################################
+#
+#   set_queue
+#   replaces the dispatch queue with one of size items and the given
+#   overflow policy (see OSCDispatchQueue), or dispatches on the
+#   receiving thread if size is 0.  the old queue is drained first
+#
+#########################################
+
+    def set_queue(self, size, overflow="drop-oldest"):
+        queue = self.queue
+        if queue is not None and size == queue.size and overflow == queue.overflow:
+            return
+        self.queue = None
+        if queue is not None:
+            queue.stop()
+        if size > 0:
+            queue = OSCDispatchQueue(size, overflow, self.metrics)
+            queue.start()
+            self.queue = queue
+
+#########################################
+#
+#   capture
+#   appends every packet received to the OSC packet log at path
+#   (see OSCRecorder).  None stops capturing
+#   raises OSError or ValueError if path can't be used
+#
+#########################################
+
+    def capture(self, path):
+        recorder = self.recorder
+        self.recorder = None
+        if recorder is not None:
+            recorder.close()
+        if path:
+            self.recorder = OSCRecorder(path, self.scheduler)
+
+#########################################
+#
+#   trace
+#   records spans of the methods in OSC_TRACE_METHODS with tracer
+#   (see OSCTracer) by setting wrapped methods on this listener,
+#   which take the place of the class's.  None removes them
+#
+#########################################
+
+    def trace(self, tracer):
+        self.tracer = tracer
+        for name, label in OSC_TRACE_METHODS:
+            self.__dict__.pop(name, None)
+            if tracer is not None:
+                setattr(self, name, tracer.traced(name, getattr(self, name), label))
+
+#########################################
+#
+#   receive_commands
+#   applies the commands an OSC front end process writes to
+#   the command ring at path (see OSCCommandRing) when apply_commands
+#   is called.  None stops.  the listener needs no sockets for this,
+#   start_commands starts it without them
+#   raises OSError or ValueError if path can't be used
+#
+#########################################
+
+    def receive_commands(self, path):
+        commands = self.commands
+        self.commands = None
+        if commands is not None:
+            commands.close()
+        if path:
+            self.commands = OSCCommandRing(path, True)
+
+    def start_commands(self, path):
+        self.receive_commands(path)
+        self.scheduler.start()
+        self.listening = True
+
+#########################################
+#
+#   apply_commands
+#   dispatches the commands in the ring to the routes they matched
+#   in the front end, called from script_tick on OBS's main thread
+#
+#########################################
+
+    def apply_commands(self):
+        commands = self.commands
+        if commands is None:
+            return
+        metrics = self.metrics
+        handlers = self.routes.handlers
+        with self.dispatch_lock:
+            for command in commands.take():
+                start = time.perf_counter_ns()
+                try:
+                    address, routes, args, host, port, self.received = marshal.loads(command)
+                except (ValueError, EOFError, TypeError):
+                    metrics.error("bad command")
+                    continue
+                osc_command_values(args)
+                self.sender = (host, port) if host else None
+                if routes is None:
+                    matched = self.routes.match(address)
+                else:
+                    matched = tuple((handlers[template], params) for template, params in routes
+                                    if template in handlers)
+                self.dispatch_matched(matched, args, start)
+
+#########################################
+#
+#   wake
+#   writes a byte to the wakeup socket so that a blocked
+#   select in the listen loop returns immediately
+#
+#########################################
+
+    def wake(self):
+        if self.wake_out is not None:
+            try:
+                self.wake_out.send(b'\0')
+            except OSError:
+                pass    # wakeup already pending or socket closed
+        
+#########################################
+#
+#   listen contains a loop that runs while the self.listening flag is True
+#   listen blocks in select until one of its sockets is readable,
+#   until stop_listening or rebind write to the wakeup socket
+#   or for at most OSC_LIVENESS_INTERVAL (a heartbeat)
+#   then listen_wakeup calls the method registered for each readable socket
+#   (receive_datagrams, accept_clients, receive_stream or drain_wakeup)
+#   and switches or retires endpoints for rebind
+#
+#########################################
+        
+    def listen(self):
+        try:
+            while self.listening:
+                self.heartbeat = time.monotonic()
+                timeout = OSC_LIVENESS_INTERVAL
+                if self.retiring:
+                    timeout = max(min(self.retiring[0][0] - self.heartbeat, timeout), 0)
+                events = self.selector.select(timeout)
+                if events:
+                    self.listen_wakeup(events)
+                if self.rebinding is not None:
+                    self.switch_pending()
+                if self.retiring:
+                    self.retire_endpoints()
+        finally:
+            self.close_sockets()
+            self.listen_thread = None
+
+    def listen_wakeup(self, events):
+        for key, mask in events:
+            callback, endpoint = key.data
+            callback(key.fileobj, endpoint)
+
+#########################################
+#
+#   receive_datagrams
+#   reads every datagram queued on the socket, not just one per wakeup
+#   each is received into the next buffer of the preallocated pool
+#   and passed to packet_received with its length
+#   a datagram that fills the buffer is counted as truncated
+#
+#########################################
+
+    def receive_datagrams(self, udpsocket, endpoint):
+        buffers = self.buffers
+        while self.listening:
+            buffer = buffers[self.buffer_index]
+            self.buffer_index = (self.buffer_index + 1) % len(buffers)
+            try:
+                nbytes, addr = udpsocket.recvfrom_into(buffer)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return      # e.g. ICMP port unreachable reported on Windows
+            endpoint.packets += 1
+            endpoint.bytes += nbytes
+            if nbytes == len(buffer):
+                endpoint.truncated += 1
+            try:
+                self.packet_received(buffer, nbytes, addr)
+            except Exception:
+                self.packet_failed()
+
+#########################################
+#
+#   accept_clients
+#   accepts every pending TCP connection and registers it
+#   with the selector, each with its own OSCStreamFramer
+#
+#########################################
+
+    def accept_clients(self, tcpsocket, endpoint):
+        while self.listening:
+            try:
+                client, addr = tcpsocket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            client.setblocking(False)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            framer = OSCStreamFramer(endpoint.framing != "length", self.max_packet)
+            self.clients[client] = (framer, addr)
+            endpoint.clients += 1
+            self.selector.register(client, selectors.EVENT_READ, (self.receive_stream, endpoint))
+
+#########################################
+#
+#   receive_stream
+#   reads what a TCP client has sent and passes each complete
+#   packet to packet_received, closing the client at end of stream
+#   or if its framing is corrupt
+#
+#########################################
+
+    def receive_stream(self, client, endpoint):
+        framer, addr = self.clients[client]
+        try:
+            data = client.recv(OSC_STREAM_CHUNK)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.close_client(client, endpoint)
+            return
+        packets = framer.feed(data)
+        if packets is None:
+            endpoint.errors += 1
+            self.close_client(client, endpoint)
+            return
+        endpoint.bytes += len(data)
+        for packet in packets:
+            endpoint.packets += 1
+            try:
+                self.packet_received(packet, None, addr)
+            except Exception:
+                self.packet_failed()
+
+#########################################
+#
+#   packet_failed
+#   called when packet_received raised, counts the packet as
+#   an error and logs the exception, the listen thread goes on
+#
+#########################################
+
+    def packet_failed(self):
+        self.metrics.error("exception")
+        traceback.print_exc()
+
+    def close_client(self, client, endpoint):
+        self.selector.unregister(client)
+        del self.clients[client]
+        endpoint.clients -= 1
+        client.close()
+
+#########################################
+#
+#   drain_wakeup
+#   empties the wakeup socket so select blocks again
+#
+#########################################
+
+    def drain_wakeup(self, wake_in, endpoint=None):
+        try:
+            while wake_in.recv(64):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+#########################################
+#
+#   close_sockets
+#   releases the selector, the endpoint sockets, any tcp clients
+#   and the wakeup socketpair
+#
+#########################################
+
+    def close_sockets(self):
+        if self.selector is not None:
+            self.selector.close()
+            self.selector = None
+        for client in self.clients:
+            client.close()
+        self.clients = {}
+        for endpoint in self.endpoints:
+            endpoint.close()
+            endpoint.clients = 0
+        for deadline, endpoint in self.retiring:
+            endpoint.close()
+        self.retiring = []
+        for sock in (self.wake_in, self.wake_out):
+            if sock is not None:
+                sock.close()
+        self.wake_in = None
+        self.wake_out = None
+
+#########################################
+#
+#   packet_received
+#   decodes a bundle or calls process_message_at for each complete
+#   OSC message contained in the packet and dispatches the messages
+#
+#   data is bytes or a bytearray, end is the length of the packet
+#   within data (defaults to all of data).  data may be one of the
+#   reused receive buffers, nothing decoded may keep a reference to it
+#   (blob arguments are memoryviews valid only while dispatched)
+#
+#   while capturing, the packet is first appended to the packet log
+#
+#   with a dispatch queue (see set_queue) messages and bundles are
+#   queued for the dispatch thread.  their blobs are copied first
+#
+#   sender is the (ip, port) the packet came from, available to
+#   handlers as self.sender while the packet is dispatched
+#
+#########################################
+    
+    def packet_received(self, data, end=None, sender=None):
+        received = time.perf_counter_ns()
+        self.metrics.packets += 1
+        if end is None:
+            end = len(data)
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record(data, end, sender)
+        self.sender = sender
+        view = memoryview(data)
+        queue = self.queue
+        if data.startswith(OSC_BUNDLE_TAG, 0, end):
+            bundle = self.process_bundle_at(data, view, 0, end)
+            if bundle is not None:
+                if queue is not None:
+                    self.own_bundle(bundle)
+                    if queue.put(None, self.dispatch_queued, (bundle, received, sender)):
+                        return
+                self.bundle_received(bundle, received)
+            return
+        dataindex = 0
+        while ( (dataindex >= 0 ) and ( dataindex < end ) ):
+            message, dataindex = self.process_message_at(data, view, dataindex, end)
+            if message is not None:
+                if queue is not None:
+                    osc_own_args(message.args)
+                    key = self.routes.coalesce_key(message.address, message.args)
+                    if queue.put(key, self.dispatch_queued, (message, received, sender)):
+                        continue
+                with self.dispatch_lock:
+                    self.received = received
+                    self.dispatch_message(message.address, message.args)
+
+#########################################
+#
+#   dispatch_queued
+#   dispatches a message or bundle taken from the dispatch queue
+#   restoring the sender and receive time of its packet
+#
+#########################################
+
+    def dispatch_queued(self, element, received, sender):
+        with self.dispatch_lock:
+            self.sender = sender
+            if isinstance(element, OSCBundle):
+                self.bundle_received(element, received)
+            else:
+                self.received = received
+                self.dispatch_message(element.address, element.args)
+
+#########################################
+#
+#   process_bundle_at
+#   decodes the bundle starting at index si and ending at end into
+#   an OSCBundle.  each element is preceded by its int32 size
+#   and is either a message or a nested bundle
+#
+#   returns None if the bundle is malformed
+#
+#########################################
+
+    def process_bundle_at(self, data, view, si, end):
+        if si + 16 > end:
+            return None
+        timetag = osc_timetag.unpack_from(data, si + 8)[0]
+        elements = []
+        ei = si + 16
+        while ei + 4 <= end:
+            size = osc_int32.unpack_from(data, ei)[0]
+            ei += 4
+            ee = ei + size
+            if size <= 0 or ee > end:
+                self.metrics.error("bundle element size")
+                return None
+            if data.startswith(OSC_BUNDLE_TAG, ei, ee):
+                element = self.process_bundle_at(data, view, ei, ee)
+            else:
+                element = self.process_message_at(data, view, ei, ee)[0]
+            if element is None:
+                return None
+            elements.append(element)
+            ei = ee
+        return OSCBundle(timetag, elements)
+
+#########################################
+#
+#   bundle_received
+#   dispatches a bundle now if its timetag is "immediately" or has
+#   already passed, otherwise holds it in the scheduler until its time
+#   received is the perf_counter_ns time of its packet's arrival
+#   (a scheduled bundle's latency is measured from its timetag)
+#   a scheduled bundle's blobs are copied out of the packet buffer
+#
+#########################################
+
+    def bundle_received(self, bundle, received=None):
+        self.metrics.bundles += 1
+        if bundle.timetag != OSC_IMMEDIATELY:
+            when = ntp_to_monotonic(bundle.timetag)
+            if when > time.monotonic():
+                self.own_bundle(bundle)     # its packet's buffer will be reused
+                self.scheduler.call_at_precise(when, self.dispatch_bundle, bundle)
+                return
+        self.dispatch_bundle(bundle, received)
+
+    def own_bundle(self, bundle):
+        for element in bundle.elements:
+            if isinstance(element, OSCBundle):
+                self.own_bundle(element)
+            else:
+                osc_own_args(element.args)
+
+#########################################
+#
+#   dispatch_bundle
+#   dispatches the elements of a bundle while holding dispatch_lock
+#   and the main thread queue's lock, so that the bundle's obspython
+#   calls are applied as a unit in the same frame
+#   nested bundles with a later timetag are scheduled separately
+#
+#########################################
+
+    def dispatch_bundle(self, bundle, received=None):
+        with self.dispatch_lock, obs_calls.lock:
+            self.received = received if received is not None else time.perf_counter_ns()
+            for element in bundle.elements:
+                if isinstance(element, OSCBundle):
+                    self.bundle_received(element, self.received)
+                else:
+                    self.dispatch_message(element.address, element.args)
+
+#########################################
+#
+#   process_message_at
+#   decodes the OSC message starting at index si into an OSCMessage
+#
+#   the arguments are decoded by the type tag string's decode plan
+#   (see osc_decode_plan).  numeric arguments are unpacked with
+#   precompiled struct.Struct objects so a run like ,fff is a single
+#   unpack, other tags are decoded by their reader functions
+#
+#   all OSC 1.0 and 1.1 types are supported: i f s b h t d S c r m
+#   T F N I and arrays [ ]
+#
+#   returns (message, index at the end of the complete message)
+#   message is None and index is -1 if the message is malformed
+#
+#########################################
+
+    def process_message_at(self, data, view, si, end):
+        zl = data.find(b'\0', si, end)
+        if zl < 0 or data[si] != OSC_SLASH:
+            self.metrics.error("address")
+            return None, -1
+        addressPattern = str(view[si:zl], 'utf-8', 'replace')
+        
+        # type tag string starts at the next 4 byte boundary
+        tl = (zl + 4) & ~3
+        if tl >= end or data[tl] != OSC_COMMA:
+            # no arguments but an address pattern
+            return OSCMessage(addressPattern, []), -1
+        
+        zt = data.find(b'\0', tl, end)
+        if zt < 0:
+            self.metrics.error("type tags")
+            return None, -1
+        plan = osc_decode_plan(bytes(view[tl+1:zt]))
+        if plan is None:    #unrecognized argument don't know length
+            self.metrics.error("unsupported type")
+            return None, -1
+        
+        # arguments start at the 4 byte boundary following the type tags
+        dl = (zt + 4) & ~3
+        # osc_decode_args inlined, this is the hot loop
+        args = []
+        for unpacker, size, reader in plan:
+            if reader is None:              # run of fixed size numbers
+                if dl + size > end:
+                    dl = -1
+                    break
+                args.extend(unpacker.unpack_from(data, dl))
+                dl += size
+            else:
+                dl = reader(data, view, dl, end, args)
+                if dl < 0:
+                    break
+        if dl < 0:
+            self.metrics.error("truncated")
+            return None, -1
+        
+        #dl could point to another message within the packet
+        return OSCMessage(addressPattern, args), dl
+
+#########################################
+#
+#   check_arg_one()
+#       Check for a single float argument equal to 1.0.
+#       (or an int 1, a T true or an I impulse)
+#
+#       used for actions controlled by a push button
+#       that sends 1.0 when pressed
+#       0.0 when released
+#       (Stream Deck bridges often send T and F instead)
+#
+#########################################
+       
+    def check_arg_one(self, args):
+        if len(args) == 1:
+            if args[0] == 1.0 or args[0] is OSC_IMPULSE:   # True == 1.0
+                return True
+        return False
+
+#########################################
+#
+#  add_routes
+#  registers the OBS address space with the dispatch table
+#
+#########################################
+
+    def add_routes(self, routes):
+        routes.add_parameter("scene", scene_list.numbers, True)
+        routes.add_parameter("transition", transition_list.numbers, True)
+        routes.add_parameter("source", source_index.names, True)
+        routes.add_parameter("item", scene_items.names, True)
+        
+        # continuous values are coalesced in the dispatch queue
+        routes.add("/obs/source/volume", self.dispatch_obs_source_volume, osc_key_names)
+        routes.add("/obs/source/<source>/volume", self.dispatch_obs_source_n_volume, osc_key_volume)
+        routes.add("/obs/source/<source>/fade", self.dispatch_obs_source_n_fade, osc_key_volume)
+        routes.add("/obs/source/<source>/fade/cancel", self.dispatch_obs_source_n_fade_cancel, osc_key_volume_pressed)
+        routes.add("/obs/fade/cancel", self.dispatch_obs_fade_cancel)
+        
+        routes.add("/obs/transition/start", self.dispatch_obs_transition_start)
+        routes.add("/obs/transition/duration", self.dispatch_obs_transition_duration, osc_key_address)
+        routes.add("/obs/transition/duration/<duration>", self.dispatch_obs_transition_duration_dd)
+        routes.add("/obs/transition/<transition>/start", self.dispatch_obs_transition_n_start)
+        routes.add("/obs/transition/<transition>/select", self.dispatch_obs_transition_n_select)
+        routes.add("/obs/transition/<transition>/duration", self.dispatch_obs_transition_n_duration, osc_key_address)
+        
+        routes.add("/obs/scene/<scene>/preview", self.dispatch_obs_scene_n_preview)
+        routes.add("/obs/scene/<scene>/start", self.dispatch_obs_scene_n_start)
+        routes.add("/obs/scene/<scene>/go", self.dispatch_obs_scene_n_go)
+        routes.add("/obs/scene/<scene>/transition/<transition>/start", self.dispatch_obs_scene_n_transition_m_start)
+        routes.add("/obs/scene/<scene>/transition/<transition>/go", self.dispatch_obs_scene_n_transition_m_go)
+        routes.add("/obs/scene/<scene>/item/<item>/visible", self.dispatch_obs_scene_n_item_m_visible)
+        routes.add("/obs/scene/<scene>/item/<item>/position", self.dispatch_obs_scene_n_item_m_position, osc_key_address)
+        routes.add("/obs/scene/<scene>/item/<item>/scale", self.dispatch_obs_scene_n_item_m_scale, osc_key_address)
+        routes.add("/obs/scene/<scene>/item/<item>/rotation", self.dispatch_obs_scene_n_item_m_rotation, osc_key_address)
+        
+        routes.add("/obs/go", self.dispatch_obs_go)
+        routes.add("/obs/cue/cancel", self.dispatch_obs_cue_cancel)
+        routes.add("/obs/subscribe", self.dispatch_obs_subscribe)
+        routes.add("/obs/unsubscribe", self.dispatch_obs_unsubscribe)
+        routes.add("/obs/stats", self.dispatch_obs_stats)
+        routes.add("/obs/stats/reset", self.dispatch_obs_stats_reset)
+        routes.add("/obs/debug/trace", self.dispatch_obs_debug_trace)
+        routes.add("/obs/debug/trace/write", self.dispatch_obs_debug_trace_write)
+        routes.add("/obs/recording/start", self.dispatch_obs_recording_start)
+        routes.add("/obs/recording/stop", self.dispatch_obs_recording_stop)
+        routes.add("/obs/streaming/start", self.dispatch_obs_streaming_start)
+        routes.add("/obs/streaming/stop", self.dispatch_obs_streaming_stop)
+
+#########################################
+#
+#  dispatch_message
+#  called when OSC Message is received and processed
+#  calls the handler of every route the address pattern matches
+#
+#  dispatch_matched
+#  calls the handlers of the (handler, params) routes matched
+#  a message with arguments a handler can't use is ignored: handlers
+#  convert their arguments before queueing anything, so a missing
+#  argument or one of the wrong type (N nil, a blob, an array or an
+#  impulse where a number is expected) raises before any effect
+#  counts the message, its routes and its latencies in self.metrics
+#
+#########################################
+
+    def dispatch_message(self, addressPattern, args):
+        start = time.perf_counter_ns()
+        self.dispatch_matched(self.routes.match(addressPattern), args, start)
+
+    def dispatch_matched(self, matched, args, start):
+        metrics = self.metrics
+        metrics.messages += 1
+        metrics.receive.record(start - self.received)
+        if not matched:
+            metrics.unmatched += 1
+        routes = metrics.routes
+        for handler, params in matched:
+            routes[handler] = routes.get(handler, 0) + 1
+            try:
+                handler(args, *params)
+            except (ValueError, IndexError, TypeError):
+                pass
+        metrics.dispatch.record(time.perf_counter_ns() - start)
+
+#########################################
+#
+#  /obs/source/...
+#
+#########################################
+
+    def dispatch_obs_source_volume(self, args):                 # /obs/source/volume [NN, V.V, ...]
+        if len(args) >= 2:
+            pairs = [float(value) if i % 2 else value for i, value in enumerate(args)]
+            obs_calls.call(("volume",) + tuple(pairs[0::2]), source_volumes, pairs)
+
+    def dispatch_obs_source_n_volume(self, args, source):      # /obs/source/NN/volume [V.V]
+        if len(args) == 1:
+            obs_calls.call(("volume", source), source_volume, source, float(args[0]))
+
+    def dispatch_obs_source_n_fade(self, args, source):        # /obs/source/NN/fade [V.V, MS, curve]
+        curve = fade_curve(args[2]) if len(args) > 2 else OBS_FADE_LINEAR
+        obs_calls.call(("volume", source), fades.fade, source, float(args[0]),
+                       float(args[1]) if len(args) > 1 else 1000.0, curve)
+
+    def dispatch_obs_source_n_fade_cancel(self, args, source): # /obs/source/NN/fade/cancel [1.0]
+        if self.check_arg_one(args):
+            obs_calls.call(("volume", source), fades.cancel, source)
+
+    def dispatch_obs_fade_cancel(self, args):                  # /obs/fade/cancel [1.0]
+        if self.check_arg_one(args):
+            obs_calls.call(None, fades.cancel_all)
+
+#########################################
+#
+#  /obs/transition/...
+#
+#########################################
+
+    def dispatch_obs_transition_start(self, args):             # /obs/transition/start [1.0]
+        if self.check_arg_one(args):
+            obs_calls.call(None, transition)
+
+    def dispatch_obs_transition_duration(self, args):          # /obs/transition/duration [DD]
+        obs_calls.call(("duration", None), set_transition_duration, int(args[0]))
+
+    def dispatch_obs_transition_duration_dd(self, args, d):    # /obs/transition/duration/DD [1.0]
+        if self.check_arg_one(args):
+            obs_calls.call(("duration", None), set_transition_duration, int(d))
+
+    def dispatch_obs_transition_n_start(self, args, n):        # /obs/transition/NN/start [1.0]
+        if self.check_arg_one(args):
+            obs_calls.call(None, transition, n)
+
+    def dispatch_obs_transition_n_select(self, args, n):       # /obs/transition/NN/select [1.0]
+        if self.check_arg_one(args):
+            obs_calls.call(None, set_transition, n)
+
+    def dispatch_obs_transition_n_duration(self, args, n):     # /obs/transition/NN/duration [DD]
+        obs_calls.call(("duration", n), set_transition_duration, int(args[0]), n)
+
+#########################################
+#
+#  /obs/scene/...
+#  scene changes with a transition run as cues: the receive path
+#  returns at once and the transition follows OBS_SCENE_TRANSITION_DELAY
+#  later, unless another cue starts first.  a preview alone is
+#  queued like any other call and cancels nothing
+#
+#  scenes and transitions are passed by number or name and looked
+#  up when the step runs, on OBS's main thread
+#
+#########################################
+
+    def dispatch_obs_scene_n_preview(self, args, n):           # /obs/scene/n/preview
+        if self.check_arg_one(args):
+            obs_calls.call(None, set_preview, n)
+
+    def dispatch_obs_scene_n_start(self, args, n):             # /obs/scene/n/start
+        if self.check_arg_one(args):
+            self.cues.start((0, set_preview, n),
+                            (OBS_SCENE_TRANSITION_DELAY, transition))
+
+    def dispatch_obs_scene_n_go(self, args, n):                # /obs/scene/n/go
+        if self.check_arg_one(args):
+            self.cues.start((0, set_preview, n),
+                            (OBS_SCENE_TRANSITION_DELAY, self.go_step))
+
+    def dispatch_obs_scene_n_transition_m_start(self, args, n, m):  # /obs/scene/n/transition/m/start
+        if self.check_arg_one(args):
+            self.cues.start((0, set_preview, n),
+                            (OBS_SCENE_TRANSITION_DELAY, transition, m))
+
+    def dispatch_obs_scene_n_transition_m_go(self, args, n, m):     # /obs/scene/n/transition/m/go
+        if self.check_arg_one(args):
+            self.cues.start((0, set_preview, n),
+                            (OBS_SCENE_TRANSITION_DELAY, self.go_step, m))
+
+#########################################
+#
+#  /obs/scene/n/item/m/...
+#  item changes are batched per scene, see OBSSceneItems
+#
+#########################################
+
+    def dispatch_obs_scene_n_item_m_visible(self, args, n, m):      # /obs/scene/n/item/m/visible [1|0]
+        if self.check_arg_one(args):
+            scene_items.change(n, m, "visible", True)
+        elif len(args) == 1 and args[0] == 0:                       # False == 0
+            scene_items.change(n, m, "visible", False)
+
+    def dispatch_obs_scene_n_item_m_position(self, args, n, m):     # /obs/scene/n/item/m/position [x, y]
+        if len(args) == 2:
+            scene_items.change(n, m, "position", (float(args[0]), float(args[1])))
+
+    def dispatch_obs_scene_n_item_m_scale(self, args, n, m):        # /obs/scene/n/item/m/scale [x, y] or [s]
+        if len(args) in (1, 2):
+            scene_items.change(n, m, "scale", (float(args[0]), float(args[-1])))
+
+    def dispatch_obs_scene_n_item_m_rotation(self, args, n, m):     # /obs/scene/n/item/m/rotation [degrees]
+        if len(args) == 1:
+            scene_items.change(n, m, "rotation", float(args[0]))
+
+#########################################
+#
+#  /obs/go [1.0]
+#  /obs/cue/cancel [1.0]
+#  /obs/recording/...
+#  /obs/streaming/...
+#
+#  like every obspython call made for a message, the calls are
+#  queued to be made on OBS's main thread (see OBSCallQueue)
+#
+#########################################
+
+    def dispatch_obs_go(self, args):
+        if self.check_arg_one(args):
+            self.cues.start((0, self.go_step))
+
+    def dispatch_obs_cue_cancel(self, args):
+        if self.check_arg_one(args):
+            self.cues.cancel()
+
+#########################################
+#
+#  /obs/subscribe [PPPP]
+#  /obs/unsubscribe [PPPP]
+#  a float argument, from a button, is not a port number
+#
+#########################################
+
+    def dispatch_obs_subscribe(self, args):
+        target = self.feedback_target(args)
+        if target is not None:
+            self.feedback.subscribe(target)
+
+    def dispatch_obs_unsubscribe(self, args):
+        target = self.feedback_target(args)
+        if target is not None:
+            self.feedback.unsubscribe(target)
+
+#########################################
+#
+#  /obs/stats [PPPP]
+#  replies with the metrics to the sender's address on int port PPPP
+#  (or on the port the message came from if there is no int argument)
+#
+#########################################
+
+    def dispatch_obs_stats(self, args):
+        target = self.feedback_target(args)
+        if target is not None:
+            messages = [osc_encode_message(address, values)
+                        for address, values in self.metrics.messages_for(self.routes.templates)]
+            self.feedback.send(osc_encode_bundles(messages, OSC_FEEDBACK_MAX_BUNDLE), [target])
+
+    def dispatch_obs_stats_reset(self, args):
+        if self.check_arg_one(args):
+            self.metrics.reset()
+
+#########################################
+#
+#  /obs/debug/trace [1.0 | 0.0]
+#  turns tracing on or off on OBS's main thread, see trace_osc
+#
+#  /obs/debug/trace/write [1.0]
+#  writes the trace file, see write_trace
+#
+#########################################
+
+    def dispatch_obs_debug_trace(self, args):
+        if len(args) == 1:
+            obs_calls.call(None, trace_osc, self.check_arg_one(args))
+
+    def dispatch_obs_debug_trace_write(self, args):
+        if self.check_arg_one(args):
+            write_trace()
+
+    def feedback_target(self, args):
+        if self.sender is None:
+            return None
+        if len(args) == 1 and type(args[0]) is int:
+            return (self.sender[0], args[0])
+        return self.sender[:2]
+
+#########################################
+#
+#  go_step
+#  the transition step of a go cue.  the following scene is
+#  set to preview when the transition finishes, as part of the same cue
+#
+#########################################
+
+    def go_step(self, key=None):
+        go(self.cues, key)
+
+    def dispatch_obs_recording_start(self, args):
+        if self.check_arg_one(args):
+            obs_calls.call(None, obs.obs_frontend_recording_start)
+
+    def dispatch_obs_recording_stop(self, args):
+        if self.check_arg_one(args):
+            obs_calls.call(None, obs.obs_frontend_recording_stop)
+
+    def dispatch_obs_streaming_start(self, args):
+        if self.check_arg_one(args):
+            obs_calls.call(None, obs.obs_frontend_streaming_start)
+
+    def dispatch_obs_streaming_stop(self, args):
+        if self.check_arg_one(args):
+            obs_calls.call(None, obs.obs_frontend_streaming_stop)
+
+############################################
+#^^^^^^^^^^ end class OSCListener ^^^^^^^^^^
+############################################
+
+
+#########################################
+#
+#   OSCAsyncListener
+#       an OSCListener that receives on an asyncio event loop
+#       running in its own thread instead of a selector loop
+#
+#       parsing and dispatch are inherited from OSCListener,
+#       only the transport is different.  Additional endpoints
+#       can be served by the same loop without adding threads
+#
+#########################################
+
+class OSCAsyncListener(OSCListener):
+
+    def __init__(self):
+        super().__init__()
+        self.loop = None
+        self.attached = {}      # endpoint to its transport or server
+
+#########################################
+#
+#   start_listening binds the sockets in the calling thread
+#   (so a bad port raises here, as it does for OSCListener)
+#   then starts the event loop thread which attaches the protocols
+#
+#   the event loop reads datagrams into its own buffers,
+#   max_packet only limits the size of TCP frames
+#
+#########################################
+
+    def start_listening(self, port, max_packet=OBS_OSC_MAX_PACKET, rcvbuf=0,
+                        tcp_port=0, tcp_framing="slip", endpoints=()):
+        self.open_endpoints(port, rcvbuf, tcp_port, tcp_framing, endpoints)
+        self.max_packet = max_packet
+        self.loop = asyncio.new_event_loop()
+        self.scheduler.start()
+        self.listening = True
+        self.heartbeat = time.monotonic()
+        if self.listen_thread is None:
+            self.listen_thread = threading.Thread(target=self.run_loop)
+            self.listen_thread.daemon = True
+            self.listen_thread.start()
+
+#########################################
+#
+#   stop_listening stops the event loop from outside its thread
+#   the loop thread closes the transports on its way out
+#
+#########################################
+
+    def stop_listening(self):
+        self.listening = False
+        self.set_queue(0)
+        self.capture(None)
+        self.receive_commands(None)
+        self.feedback.close()
+        self.cues.close()
+        self.scheduler.stop()
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+        thread = self.listen_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(1.0)
+
+#########################################
+#
+#   run_loop
+#   attaches the endpoints and runs the event loop,
+#   with a heartbeat, until stop_listening is called
+#
+#########################################
+
+    def run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            try:
+                self.loop.run_until_complete(self.attach_endpoints(self.endpoints))
+            except RuntimeError:
+                return      # stop_listening stopped the loop while attaching
+            self.beat()
+            if self.listening:
+                self.loop.run_forever()
+        finally:
+            for endpoint in list(self.attached):
+                self.detach_endpoint(endpoint)
+            for client in list(self.clients):
+                client.close()
+            self.loop.run_until_complete(asyncio.sleep(0))  # let close callbacks run
+            for endpoint in self.endpoints:
+                endpoint.close()            # any not attached
+                endpoint.clients = 0
+            self.loop.close()
+            self.listen_thread = None
+
+    def beat(self):
+        self.heartbeat = time.monotonic()
+        self.loop.call_later(OSC_LIVENESS_INTERVAL, self.beat)
+
+#########################################
+#
+#   attach_endpoints
+#   attaches an OSCDatagramProtocol to each udp endpoint and serves
+#   each tcp endpoint with OSCStreamProtocol, skipping those attached
+#
+#   detach_endpoint
+#   closes an endpoint's transport or server and its tcp clients
+#
+#   retire_endpoint
+#   detaches an endpoint at the end of its grace period
+#   unless a rebind has switched back to it
+#
+#########################################
+
+    async def attach_endpoints(self, endpoints):
+        for endpoint in endpoints:
+            if endpoint in self.attached:
+                continue
+            if endpoint.proto == "tcp":
+                self.attached[endpoint] = await self.loop.create_server(
+                    lambda endpoint=endpoint: OSCStreamProtocol(self, endpoint), sock=endpoint.sock)
+            else:
+                transport, protocol = await self.loop.create_datagram_endpoint(
+                    lambda endpoint=endpoint: OSCDatagramProtocol(self, endpoint), sock=endpoint.sock)
+                self.attached[endpoint] = transport
+
+    def bound_endpoints(self):
+        return self.endpoints + [endpoint for endpoint in list(self.attached) if endpoint not in self.endpoints]
+
+    def detach_endpoint(self, endpoint):
+        self.attached.pop(endpoint).close()
+        if endpoint.proto == "tcp":
+            for client in list(self.clients):
+                if client.get_protocol().endpoint is endpoint:
+                    client.close()
+        endpoint.sock = None    # owned and closed by its transport or server
+        endpoint.clients = 0
+
+    def retire_endpoint(self, endpoint):
+        if endpoint not in self.endpoints and endpoint in self.attached:
+            self.detach_endpoint(endpoint)
+
+#########################################
+#
+#   switch_endpoints
+#   attaches the new endpoints on the event loop and retires the ones
+#   they replace, detaching them OSC_REBIND_GRACE seconds later
+#   returns False if the loop doesn't within OSC_REBIND_TIMEOUT
+#
+#########################################
+
+    def switch_endpoints(self, endpoints):
+        loop = self.loop
+        if loop is None or not loop.is_running():
+            return False
+        future = asyncio.run_coroutine_threadsafe(self.switch(endpoints), loop)
+        try:
+            future.result(OSC_REBIND_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return False
+        return True
+
+    async def switch(self, endpoints):
+        try:
+            await self.attach_endpoints(endpoints)
+        except OSError:
+            for endpoint in endpoints:
+                if endpoint in self.attached and endpoint not in self.endpoints:
+                    self.detach_endpoint(endpoint)
+            raise
+        retired = [endpoint for endpoint in self.endpoints if endpoint not in endpoints]
+        self.endpoints = endpoints
+        for endpoint in retired:
+            self.loop.call_later(OSC_REBIND_GRACE, self.retire_endpoint, endpoint)
+
+############################################
+#^^^^^^^^^^ end class OSCAsyncListener ^^^^^
+############################################
+
+
+#########################################
+#
+#   OSCDatagramProtocol
+#       hands each datagram received on the event loop
+#       to the OSCListener that owns the loop
+#
+#########################################
+
+class OSCDatagramProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, listener, endpoint):
+        self.listener = listener
+        self.endpoint = endpoint
+
+    def datagram_received(self, data, addr):
+        self.endpoint.packets += 1
+        self.endpoint.bytes += len(data)
+        try:
+            self.listener.packet_received(data, None, addr)
+        except Exception:
+            self.listener.packet_failed()
+
+#########################################
+#
+#   OSCStreamProtocol
+#       reassembles the packets of one TCP client with an
+#       OSCStreamFramer and hands them to the owning OSCListener
+#
+#########################################
+
+class OSCStreamProtocol(asyncio.Protocol):
+
+    def __init__(self, listener, endpoint):
+        self.listener = listener
+        self.endpoint = endpoint
+        self.framer = OSCStreamFramer(endpoint.framing != "length", listener.max_packet)
+        self.transport = None
+        self.addr = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.addr = transport.get_extra_info('peername')
+        self.listener.clients[transport] = (self.framer, self.addr)
+        self.endpoint.clients += 1
+
+    def connection_lost(self, exc):
+        if self.listener.clients.pop(self.transport, None) is not None:
+            self.endpoint.clients -= 1
+
+    def data_received(self, data):
+        packets = self.framer.feed(data)
+        if packets is None:
+            self.endpoint.errors += 1
+            self.transport.close()
+            return
+        self.endpoint.bytes += len(data)
+        for packet in packets:
+            self.endpoint.packets += 1
+            try:
+                self.listener.packet_received(packet, None, self.addr)
+            except Exception:
+                self.listener.packet_failed()
+
+#########################################
+#
+#   OSCFrontEnd
+#       an OSCListener run in a process of its own (tools/osc_frontend.py)
+#       that passes the messages it receives to the OBS script
+#       through an OSC command ring (see OSCCommandRing)
+#
+#       receiving, decoding, bundles, the dispatch queue and routing
+#       are inherited from OSCListener, so the OBS process only applies
+#       commands.  the front end doesn't know OBS's scenes or sources:
+#       an address without wildcards is routed here (its parameters
+#       checked by the script), a pattern is passed on for the script
+#       to match.  unmatched messages are dropped here
+#
+#       when the ring is full dispatch waits up to OSC_RING_WAIT for the
+#       script to take commands, then drops the command (counted
+#       in metrics.dropped), so the dispatch queue coalesces faders
+#       while OBS is busy
+#
+#########################################
+
+class OSCFrontEnd(OSCListener):
+
+    def __init__(self, path):
+        super().__init__()
+        self.ring = OSCCommandRing(path)
+
+    def stop_listening(self):
+        super().stop_listening()
+        self.ring.close()
+
+    def dispatch_message(self, addressPattern, args):
+        metrics = self.metrics
+        start = time.perf_counter_ns()
+        metrics.messages += 1
+        metrics.receive.record(start - self.received)
+        routes = None
+        if OSC_WILDCARDS.search(addressPattern) is None:
+            matched = self.routes.match(addressPattern)
+            if not matched:
+                metrics.unmatched += 1
+                return
+            templates = self.routes.templates
+            counts = metrics.routes
+            for handler, params in matched:
+                counts[handler] = counts.get(handler, 0) + 1
+            routes = tuple((templates[handler], params) for handler, params in matched)
+        sender = self.sender
+        try:
+            command = marshal.dumps((addressPattern, routes, osc_command_args(args),
+                                     sender[0] if sender else "", sender[1] if sender else 0,
+                                     self.received))
+            if not self.forward(command):
+                metrics.dropped += 1
+        except ValueError:
+            metrics.error("command too large")
+        metrics.dispatch.record(time.perf_counter_ns() - start)
+
+    def forward(self, command):
+        ring = self.ring
+        if ring.put(command):
+            return True
+        deadline = time.monotonic() + OSC_RING_WAIT
+        while self.listening and time.monotonic() < deadline:
+            time.sleep(0.001)
+            if ring.put(command):
+                return True
+        return False
+
+############################################
+#^^^^^^^^^^ end class OSCFrontEnd ^^^^^^^^^^
+############################################
+
+############################################
+#
+#           begin main section
+############################################
+
+#########################################
+#
+#   OBSSourceList
+#       a cached list of scenes or transitions with index and name maps
+#
+#   get_sources calls obs.obs_frontend_get_scenes or
+#   obs.obs_frontend_get_transitions.  the list is fetched the first
+#   time it is needed and kept until invalidate() is called from
+#   on_frontend_event when OBS reports that the list changed.
+#   invalidate() releases the references the list holds
+#
+#   only numbers() is called from the listener threads, it doesn't
+#   fetch the list.  refresh() fetches it again on OBS's main thread
+#   (from script_tick) after it has been invalidated
+#
+#########################################
+
+class OBSSourceList:
+
+    def __init__(self, get_sources):
+        self.get_sources = get_sources
+        self.lock = threading.Lock()
+        self.sources = None
+        self.names = {}
+
+    def load(self):
+        if self.sources is None:
+            sources = self.get_sources()
+            self.sources = sources if sources is not None else []
+            self.names = {}
+            for i, source in enumerate(self.sources):
+                self.names[obs.obs_source_get_name(source)] = i
+        return self.sources
+
+    def invalidate(self):
+        with self.lock:
+            if self.sources:
+                obs.source_list_release(self.sources)
+            self.sources = None
+            self.names = {}
+
+    def refresh(self):
+        with self.lock:
+            if self.sources is not None:
+                return False
+            self.load()
+            return True
+
+#########################################
+#
+#   count()             number of sources in the list
+#   get(idx)            source at idx or None
+#   index_of(source)    index of source or -1
+#   lookup(key)         index for a 1 based number, a name or an index
+#                       -1 for an unknown name
+#   numbers()           the 1 based numbers as strings (wildcard expansion)
+#                       of the list as last fetched
+#
+#########################################
+
+    def count(self):
+        with self.lock:
+            return len(self.load())
+
+    def get(self, idx):
+        with self.lock:
+            sources = self.load()
+            if idx < len(sources) and idx >= 0:
+                return sources[idx]
+            return None
+
+    def index_of(self, source):
+        if source is None:
+            return -1
+        name = obs.obs_source_get_name(source)
+        with self.lock:
+            self.load()
+            return self.names.get(name, -1)
+
+    def lookup(self, key):
+        if isinstance(key, int):
+            return key
+        if key.isdigit():
+            return int(key) - 1
+        with self.lock:
+            self.load()
+            return self.names.get(key, -1)
+
+    def numbers(self):
+        with self.lock:
+            if self.sources is None:
+                return []
+            return [str(i+1) for i in range(len(self.sources))]
+
+############################################
+#^^^^^^^^^^ end class OBSSourceList ^^^^^^^^
+############################################
+
+#########################################
+#
+#   OBSSourceIndex
+#       maps source names to weak source references
+#
+#   the index is filled from obs_enum_sources the first time it is
+#   needed, then kept current by the source_create, source_destroy
+#   and source_rename signals (see connect_source_signals)
+#   weak references don't keep a source alive so the destroy
+#   signal still fires when a source is deleted
+#
+#   each indexed source's volume signal is connected to
+#   on_source_volume for feedback
+#
+#   get(name) returns a strong reference the caller must release
+#
+#########################################
+
+class OBSSourceIndex:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sources = None
+
+    def load(self):
+        if self.sources is None:
+            self.sources = {}
+            sources = obs.obs_enum_sources()
+            if sources is not None:
+                for source in sources:
+                    self.add_locked(source)
+                obs.source_list_release(sources)
+        return self.sources
+
+    def add_locked(self, source, connect=True):
+        name = obs.obs_source_get_name(source)
+        if name and name not in self.sources:
+            self.sources[name] = obs.obs_source_get_weak_source(source)
+            if connect:
+                obs.signal_handler_connect(obs.obs_source_get_signal_handler(source),
+                                           "volume", on_source_volume)
+
+    def clear(self):
+        with self.lock:
+            if self.sources is not None:
+                for weak in self.sources.values():
+                    source = obs.obs_weak_source_get_source(weak)
+                    if source is not None:
+                        obs.signal_handler_disconnect(obs.obs_source_get_signal_handler(source),
+                                                      "volume", on_source_volume)
+                        obs.obs_source_release(source)
+                    obs.obs_weak_source_release(weak)
+            self.sources = None
+
+#########################################
+#
+#   signal callbacks
+#   a source is only removed or renamed if the weak reference
+#   in the index refers to it, private sources may share a name
+#
+#########################################
+
+    def source_created(self, source):
+        with self.lock:
+            if self.sources is not None:
+                self.add_locked(source)
+
+    def source_destroyed(self, source):
+        name = obs.obs_source_get_name(source)
+        with self.lock:
+            if self.sources is not None:
+                weak = self.sources.get(name)
+                if weak is not None and obs.obs_weak_source_references_source(weak, source):
+                    del self.sources[name]
+                    obs.obs_weak_source_release(weak)
+
+    def source_renamed(self, source, prev_name, new_name):
+        with self.lock:
+            if self.sources is not None:
+                weak = self.sources.get(prev_name)
+                if weak is not None and obs.obs_weak_source_references_source(weak, source):
+                    del self.sources[prev_name]
+                    obs.obs_weak_source_release(weak)
+                    self.add_locked(source, False)
+                else:
+                    self.add_locked(source)
+
+#########################################
+#
+#   get(name)       strong reference to the named source or None
+#   get_many(names) strong references for a list of names, in one pass
+#   names()         the indexed names (wildcard expansion)
+#
+#########################################
+
+    def get(self, name):
+        with self.lock:
+            weak = self.load().get(name)
+            if weak is None:
+                return None
+            return obs.obs_weak_source_get_source(weak)
+
+    def get_many(self, names):
+        found = []
+        with self.lock:
+            sources = self.load()
+            for name in names:
+                weak = sources.get(name)
+                found.append(None if weak is None else obs.obs_weak_source_get_source(weak))
+        return found
+
+    def names(self):
+        with self.lock:
+            return list(self.load().keys())
+
+############################################
+#^^^^^^^^^^ end class OBSSourceIndex ^^^^^^^
+############################################
+
+#########################################
+#
+#   OBSSceneItems
+#       per scene maps of item names (the names of their sources)
+#       to scene items, and the item changes made by OSC
+#
+#   a scene's items are enumerated once, the first time it is needed,
+#   and kept with a reference to each item.  the scene's item_add and
+#   item_remove signals mark it stale (they only add its name to a set,
+#   they are emitted while OBS holds the scene's lock) so its items are
+#   enumerated again the next time.  invalidate() releases every scene,
+#   when the scene list changes or a source is renamed
+#
+#   change(key, name, setting, value), on any thread, adds a change to
+#   the scene with number or name key to the batch made by apply on
+#   OBS's main thread (see OBSCallQueue.batch), which looks the scenes
+#   up.  the changes of a bundle are in one batch, each scene's
+#   applied inside obs_scene_atomic_update when libobs can be loaded
+#   with ctypes (see libobs_api) so OBS never renders the scene half
+#   changed.  the transforms of each item are updated once
+#
+#########################################
+
+OBS_ITEM_SIGNALS = ("item_add", "item_remove")
+
+class OBSSceneItems:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.scenes = {}                # scene name to [weak scene, {item name: item}]
+        self.stale = set()              # names of scenes whose items changed
+        self.api = None
+        self.callback = None
+        self.updating = None
+
+    def item_changed(self, name):
+        self.stale.add(name)
+
+    def invalidate(self):
+        with self.lock:
+            for weak, items in self.scenes.values():
+                self.release_items(items)
+                source = obs.obs_weak_source_get_source(weak)
+                if source is not None:
+                    handler = obs.obs_source_get_signal_handler(source)
+                    for signal in OBS_ITEM_SIGNALS:
+                        obs.signal_handler_disconnect(handler, signal, on_scene_item_changed)
+                    obs.obs_source_release(source)
+                obs.obs_weak_source_release(weak)
+            self.scenes = {}
+            self.stale.clear()
+
+    def release_items(self, items):
+        if items:
+            for item in items.values():
+                obs.obs_sceneitem_release(item)
+
+#########################################
+#
+#   items(source)
+#   returns the item map of a scene, enumerating its items if they
+#   are not indexed or have changed.  called with lock held
+#
+#########################################
+
+    def items(self, source):
+        name = obs.obs_source_get_name(source)
+        entry = self.scenes.get(name)
+        if entry is None:
+            handler = obs.obs_source_get_signal_handler(source)
+            for signal in OBS_ITEM_SIGNALS:
+                obs.signal_handler_connect(handler, signal, on_scene_item_changed)
+            entry = [obs.obs_source_get_weak_source(source), None]
+            self.scenes[name] = entry
+        elif name in self.stale:
+            self.stale.discard(name)
+            self.release_items(entry[1])
+            entry[1] = None
+        if entry[1] is None:
+            items = {}
+            found = obs.obs_scene_enum_items(obs.obs_scene_from_source(source))
+            if found is not None:
+                for item in found:                      # bottom to top, the top item of a name wins
+                    items[obs.obs_source_get_name(obs.obs_sceneitem_get_source(item))] = item
+                for item in items.values():
+                    obs.obs_sceneitem_addref(item)
+                obs.sceneitem_list_release(found)
+            entry[1] = items
+            invalidate_routes()
+        return entry[1]
+
+#########################################
+#
+#   names()     the item names of the scenes indexed (wildcard expansion)
+#
+#########################################
+
+    def names(self):
+        names = set()
+        with self.lock:
+            for weak, items in self.scenes.values():
+                if items:
+                    names.update(items)
+        return list(names)
+
+    def change(self, key, name, setting, value):
+        with obs_calls.lock:
+            changes = obs_calls.batch("items", self.apply)
+            changes.pop((key, name, setting), None)     # keep the latest last
+            changes[(key, name, setting)] = value
+
+#########################################
+#
+#   apply(changes)
+#   makes the changes {(scene key, item name, setting): value}
+#   grouped by scene, a scene may be given by number and by name
+#
+#   apply_scene(idx, changes)
+#   makes the changes {(item name, setting): value} to scene idx
+#   changes to items the scene doesn't have are ignored
+#
+#########################################
+
+    def apply(self, changes):
+        scenes = {}
+        for (key, name, setting), value in changes.items():
+            scenes.setdefault(scene_list.lookup(key), {})[(name, setting)] = value
+        for idx, scene_changes in scenes.items():
+            self.apply_scene(idx, scene_changes)
+
+    def apply_scene(self, idx, changes):
+        source = scene_list.get(idx)
+        if source is None:
+            return
+        with self.lock:
+            items = self.items(source)
+            found = [(items[name], setting, value) for (name, setting), value in changes.items()
+                     if name in items]
+            if not found:
+                return
+            if self.api is None:
+                self.api = libobs_api() or False
+                if self.api:
+                    self.callback = self.api.scene_update_t(self.atomic_update)
+            if self.api:
+                scene = self.api.obs_get_scene_by_name(obs.obs_source_get_name(source).encode('utf-8'))
+                if scene:
+                    self.updating = found
+                    self.api.obs_scene_atomic_update(scene, self.callback, None)
+                    self.updating = None
+                    self.api.obs_scene_release(scene)
+                    return
+            self.update(found)
+
+    def atomic_update(self, data, scene):
+        self.update(self.updating)
+
+    def update(self, found):
+        deferred = {}
+        for item, setting, value in found:
+            if setting != "visible" and id(item) not in deferred:
+                deferred[id(item)] = item
+                obs.obs_sceneitem_defer_update_begin(item)
+        for item, setting, value in found:
+            if setting == "visible":
+                obs.obs_sceneitem_set_visible(item, value)
+            elif setting == "rotation":
+                obs.obs_sceneitem_set_rot(item, value)
+            else:
+                vector = obs.vec2()
+                vector.x, vector.y = value
+                if setting == "position":
+                    obs.obs_sceneitem_set_pos(item, vector)
+                else:
+                    obs.obs_sceneitem_set_scale(item, vector)
+        for item in deferred.values():
+            obs.obs_sceneitem_defer_update_end(item)
+
+############################################
+#^^^^^^^^^^ end class OBSSceneItems ^^^^^^^^
+############################################
+
+#########################################
+#
+#   OBSMeters
+#       streams audio levels of selected sources over OSC
+#
+#   obspython can't pass a python function to obs_volmeter_add_callback
+#   so the volmeter functions are called through ctypes (see libobs_api)
+#
+#   levels are kept in preallocated array('f') slots.  the volmeter
+#   callback, on the audio thread, only compares and stores floats.
+#   tick, run by the listener's scheduler at rate, packs every meter
+#   that changed into one bundle for the feedback targets
+#
+#########################################
+
+OBS_FADER_LOG = 2
+MAX_AUDIO_CHANNELS = 8
+OBS_OSC_METER_SLOTS = 64
+OBS_OSC_METER_FLOOR = -100.0
+osc_meter_values = struct.Struct('>fff')
+
+class OBSMeters:
+
+    def __init__(self):
+        self.api = None
+        self.callback = None
+        self.wanted = []
+        self.slots = {}
+        self.free = list(range(OBS_OSC_METER_SLOTS - 1, -1, -1))
+        self.volmeters = [None] * OBS_OSC_METER_SLOTS
+        self.headers = [None] * OBS_OSC_METER_SLOTS
+        self.channels = array('i', [0] * OBS_OSC_METER_SLOTS)
+        self.magnitude = array('f', [OBS_OSC_METER_FLOOR] * OBS_OSC_METER_SLOTS)
+        self.peak = array('f', [OBS_OSC_METER_FLOOR] * OBS_OSC_METER_SLOTS)
+        self.input_peak = array('f', [OBS_OSC_METER_FLOOR] * OBS_OSC_METER_SLOTS)
+        self.dirty = array('b', [0] * OBS_OSC_METER_SLOTS)
+        self.scheduler = None
+        self.feedback = None
+        self.interval = 1.0 / OBS_OSC_METER_RATE
+        self.tick_entry = None
+        self.lock = threading.Lock()
+
+#########################################
+#
+#   start(scheduler, feedback, names, rate)
+#       attaches a volmeter to each named source and starts sending
+#   stop()
+#       detaches every volmeter and stops sending
+#
+#########################################
+
+    def start(self, scheduler, feedback, names, rate):
+        self.stop()
+        if not names:
+            return
+        if self.api is None:
+            self.api = libobs_api()
+            if self.api is None:
+                print("OSC meters unavailable: libobs could not be loaded")
+                return
+            self.callback = self.api.volmeter_callback_t(self.meter_updated)
+        with self.lock:
+            self.wanted = list(names)
+            self.scheduler = scheduler
+            self.feedback = feedback
+            self.interval = 1.0 / max(rate, 1)
+            for name in self.wanted:
+                self.attach_locked(name)
+            self.tick_entry = scheduler.call_later(self.interval, self.tick)
+
+    def stop(self):
+        with self.lock:
+            if self.tick_entry is not None:
+                self.scheduler.cancel(self.tick_entry)
+                self.tick_entry = None
+            for name in list(self.slots.keys()):
+                self.detach_locked(name)
+            self.wanted = []
+
+#########################################
+#
+#   attach_locked / detach_locked
+#   the slot number + 1 is the callback's param, so one ctypes
+#   callback serves every meter
+#
+#########################################
+
+    def attach_locked(self, name):
+        if name in self.slots or not self.free:
+            return
+        api = self.api
+        source = api.obs_get_source_by_name(name.encode('utf-8'))
+        if not source:
+            return
+        slot = self.free.pop()
+        volmeter = api.obs_volmeter_create(OBS_FADER_LOG)
+        api.obs_volmeter_attach_source(volmeter, source)
+        api.obs_source_release(source)
+        self.magnitude[slot] = OBS_OSC_METER_FLOOR
+        self.peak[slot] = OBS_OSC_METER_FLOOR
+        self.input_peak[slot] = OBS_OSC_METER_FLOOR
+        self.channels[slot] = api.obs_volmeter_get_nr_channels(volmeter)
+        self.dirty[slot] = 0
+        self.volmeters[slot] = volmeter
+        self.headers[slot] = (osc_encode_string("/obs/source/" + name + "/meter")
+                              + osc_encode_string(",fff"))
+        self.slots[name] = slot
+        api.obs_volmeter_add_callback(volmeter, self.callback, slot + 1)
+
+    def detach_locked(self, name):
+        slot = self.slots.pop(name, None)
+        if slot is None:
+            return
+        volmeter = self.volmeters[slot]
+        self.api.obs_volmeter_remove_callback(volmeter, self.callback, slot + 1)
+        self.api.obs_volmeter_detach_source(volmeter)
+        self.api.obs_volmeter_destroy(volmeter)
+        self.volmeters[slot] = None
+        self.headers[slot] = None
+        self.channels[slot] = 0
+        self.free.append(slot)
+
+#########################################
+#
+#   source_created / source_destroyed / source_renamed
+#   called from the source signals so that a listed source
+#   created after start is metered too
+#
+#########################################
+
+    def source_created(self, name):
+        with self.lock:
+            if self.scheduler is not None and name in self.wanted:
+                self.attach_locked(name)
+
+    def source_destroyed(self, name):
+        with self.lock:
+            self.detach_locked(name)
+
+    def source_renamed(self, prev_name, new_name):
+        self.source_destroyed(prev_name)
+        self.source_created(new_name)
+
+#########################################
+#
+#   meter_updated
+#   the volmeter callback, called on the audio thread
+#   keeps the loudest channel, holds peaks until the next tick
+#
+#########################################
+
+    def meter_updated(self, param, magnitude, peak, input_peak):
+        slot = param - 1
+        m = p = ip = OBS_OSC_METER_FLOOR
+        for c in range(self.channels[slot]):
+            if magnitude[c] > m:
+                m = magnitude[c]
+            if peak[c] > p:
+                p = peak[c]
+            if input_peak[c] > ip:
+                ip = input_peak[c]
+        self.magnitude[slot] = m
+        if p > self.peak[slot]:
+            self.peak[slot] = p
+        if ip > self.input_peak[slot]:
+            self.input_peak[slot] = ip
+        self.dirty[slot] = 1
+
+#########################################
+#
+#   tick
+#   sends one bundle with a message for each meter updated since
+#   the last tick, then resets the held peaks
+#
+#########################################
+
+    def tick(self):
+        messages = []
+        with self.lock:
+            for slot in self.slots.values():
+                if self.dirty[slot]:
+                    self.dirty[slot] = 0
+                    messages.append(self.headers[slot] + osc_meter_values.pack(
+                        self.magnitude[slot], self.peak[slot], self.input_peak[slot]))
+                    self.peak[slot] = OBS_OSC_METER_FLOOR
+                    self.input_peak[slot] = OBS_OSC_METER_FLOOR
+                    self.channels[slot] = self.api.obs_volmeter_get_nr_channels(self.volmeters[slot])
+            if self.scheduler is not None:
+                self.tick_entry = self.scheduler.call_later(self.interval, self.tick)
+        if messages:
+            self.feedback.send_all(osc_encode_bundles(messages, OSC_FEEDBACK_MAX_BUNDLE))
+
+############################################
+#^^^^^^^^^^ end class OBSMeters ^^^^^^^^^^^^
+############################################
+
+#########################################
+#
+#   OBSFades
+#       timed volume fades run inside OBS
+#
+#   a fade is a slot in preallocated arrays holding its start and
+#   target values, start time, length and curve.  tick, called from
+#   script_tick every frame on OBS's main thread, advances every
+#   active fade in one pass over the slots and sets the volumes,
+#   looking each source up once in source_index
+#
+#   curves:
+#       linear  the volume multiplier changes linearly
+#       exp     exponential ease, slow at first then fast
+#       db      linear in dB, which sounds even (start and target
+#               are kept in dB, OBS_FADE_FLOOR dB or less is silence)
+#
+#   a new fade of a source replaces its current fade, setting the
+#   volume directly cancels it
+#
+#########################################
+
+OBS_FADE_SLOTS = 64
+OBS_FADE_FLOOR = -100.0
+OBS_FADE_CURVES = {"linear": 0, "exp": 1, "exponential": 1, "db": 2}
+OBS_FADE_LINEAR = 0
+OBS_FADE_EXP = 1
+OBS_FADE_DB = 2
+
+def volume_to_db(volume):
+    if volume <= 0.0:
+        return OBS_FADE_FLOOR
+    return max(20.0 * math.log10(volume), OBS_FADE_FLOOR)
+
+#########################################
+#
+#   fade_curve(curve)
+#   returns the curve named by a string or number (0 linear, 1 exp, 2 db)
+#   raises ValueError for an unknown curve
+#
+#########################################
+
+def fade_curve(curve):
+    if isinstance(curve, str):
+        curve = OBS_FADE_CURVES[curve.lower()] if curve.lower() in OBS_FADE_CURVES else -1
+    curve = int(curve)
+    if curve not in (OBS_FADE_LINEAR, OBS_FADE_EXP, OBS_FADE_DB):
+        raise ValueError("unknown fade curve")
+    return curve
+
+class OBSFades:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots = {}                 # source name to slot
+        self.free = list(range(OBS_FADE_SLOTS - 1, -1, -1))
+        self.start = array('d', bytes(8 * OBS_FADE_SLOTS))
+        self.target = array('d', bytes(8 * OBS_FADE_SLOTS))
+        self.began = array('d', bytes(8 * OBS_FADE_SLOTS))
+        self.length = array('d', bytes(8 * OBS_FADE_SLOTS))
+        self.curve = array('b', bytes(OBS_FADE_SLOTS))
+
+#########################################
+#
+#   fade
+#   starts fading source name from its current volume to target
+#   over ms milliseconds with curve (see fade_curve)
+#   raises ValueError if target or ms is not a finite number
+#   or ms is negative, before a slot is taken
+#
+#########################################
+
+    def fade(self, name, target, ms, curve=OBS_FADE_LINEAR):
+        target = float(target)
+        ms = float(ms)
+        if not math.isfinite(target) or not math.isfinite(ms) or ms < 0:
+            raise ValueError("fade needs a finite volume and time")
+        target = min(max(target, 0.0), 1.0)
+        if ms == 0:
+            source_volume(name, target)
+            return
+        source = source_index.get(name)
+        if source == None:
+            return
+        start = obs.obs_source_get_volume(source)
+        obs.obs_source_release(source)
+        if curve == OBS_FADE_DB:
+            start = volume_to_db(start)
+            target = volume_to_db(target)
+        with self.lock:
+            slot = self.slots.get(name)
+            if slot is None:
+                if not self.free:
+                    return      # all slots fading
+                slot = self.free.pop()
+                self.slots[name] = slot
+            self.start[slot] = start
+            self.target[slot] = target
+            self.began[slot] = time.monotonic()
+            self.length[slot] = ms / 1000.0
+            self.curve[slot] = curve
+
+    def cancel(self, name):
+        if name in self.slots:
+            with self.lock:
+                slot = self.slots.pop(name, None)
+                if slot is not None:
+                    self.free.append(slot)
+
+    def cancel_all(self):
+        with self.lock:
+            self.free.extend(self.slots.values())
+            self.slots.clear()
+
+#########################################
+#
+#   tick
+#   computes the current value of every fade, ending those that
+#   have reached their target, then sets the volumes
+#
+#########################################
+
+    def tick(self):
+        if not self.slots:
+            return
+        now = time.monotonic()
+        start = self.start
+        target = self.target
+        volumes = []
+        with self.lock:
+            for name, slot in list(self.slots.items()):
+                t = (now - self.began[slot]) / self.length[slot]
+                if t >= 1.0:
+                    t = 1.0
+                    del self.slots[name]
+                    self.free.append(slot)
+                curve = self.curve[slot]
+                if curve == OBS_FADE_LINEAR:
+                    value = start[slot] + (target[slot] - start[slot]) * t
+                elif curve == OBS_FADE_EXP:
+                    value = start[slot] + (target[slot] - start[slot]) * (2.0 ** (10.0 * t) - 1.0) / 1023.0
+                else:
+                    db = start[slot] + (target[slot] - start[slot]) * t
+                    value = 0.0 if db <= OBS_FADE_FLOOR else 10.0 ** (db / 20.0)
+                volumes.append((name, value))
+        for name, value in volumes:
+            source = source_index.get(name)
+            if source != None:
+                obs.obs_source_set_volume(source, value)
+                obs.obs_source_release(source)
+
+############################################
+#^^^^^^^^^^ end class OBSFades ^^^^^^^^^^^^^
+############################################
+
+#########################################
+#
+#   OBSCallQueue
+#       obspython calls made for OSC messages, queued by the
+#       receiving threads and made in a batch on OBS's main thread
+#
+#   drain, called from script_tick every frame, makes the calls queued
+#   since the last frame in order, so OBS never sees calls from the
+#   listener threads racing with its UI
+#
+#   call(key, callback, *args)
+#       queues callback(*args).  calls with the same key set the same
+#       value (the volume of a source, the duration of a transition):
+#       a newer one replaces one queued earlier in the frame and is
+#       made in the newer one's place.  a call with key None (a scene
+#       change, a transition, recording...) is made exactly once and
+#       keeps the calls before it from being replaced by calls after it
+#
+#   lock is held by dispatch_bundle so that a bundle's calls are
+#   made in the same frame
+#
+#   metrics, when set, counts the collapsed calls and the latency
+#   from queueing each call until it is made (OSCMetrics.apply)
+#
+#   tracer, when set, records a span for each call (see OSCTracer)
+#
+#########################################
+
+class OBSCallQueue:
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.pending = []
+        self.index = {}                 # key to its call in pending
+        self.metrics = None
+        self.tracer = None
+
+    def call(self, key, callback, *args):
+        entry = (callback, args, time.perf_counter_ns())
+        with self.lock:
+            pending = self.pending
+            if key is None:
+                self.index.clear()
+            else:
+                i = self.index.get(key)
+                if i is not None:
+                    pending[i] = None
+                    metrics = self.metrics
+                    if metrics != None:
+                        metrics.collapsed += 1
+                self.index[key] = len(pending)
+            pending.append(entry)
+
+#########################################
+#
+#   drain
+#   makes the calls queued since the last drain
+#   a call with arguments OBS can't use is skipped, any other
+#   exception is logged and the rest of the frame's calls are made
+#
+#########################################
+
+    def drain(self):
+        if not self.pending:
+            return
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+            self.index = {}
+        metrics = self.metrics
+        tracer = self.tracer
+        for entry in pending:
+            if entry is not None:
+                callback, args, queued = entry
+                if tracer is not None:
+                    callback = tracer.traced(getattr(callback, "__name__", "call"), callback)
+                try:
+                    callback(*args)
+                except (ValueError, IndexError, TypeError):
+                    pass
+                except Exception:
+                    traceback.print_exc()
+                if metrics != None:
+                    metrics.apply.record(time.perf_counter_ns() - queued)
+
+#########################################
+#
+#   batch(key, callback, *args)
+#   returns a dict of changes that callback(*args, changes) makes in
+#   this frame.  the dict of the call queued with key is returned if
+#   there is one since the last barrier, otherwise the call is queued
+#   with a new dict.  the caller holds lock while filling it in
+#
+#########################################
+
+    def batch(self, key, callback, *args):
+        with self.lock:
+            i = self.index.get(key)
+            if i is not None:
+                return self.pending[i][1][-1]
+            changes = {}
+            self.call(key, callback, *(args + (changes,)))
+            return changes
+
+    def clear(self):
+        with self.lock:
+            self.pending = []
+            self.index = {}
+
+############################################
+#^^^^^^^^^^ end class OBSCallQueue ^^^^^^^^^
+############################################
+
+#########################################
+#
+#   OBSTransitionWait
+#       calls callback(*args) once, when a transition finishes
+#
+#   OBS signals transition_stop on the transition source when it is
+#   done, however long it runs.  if it never does (the transition is
+#   interrupted) the scheduler posts, post(None, ...), the wait's end to
+#   OBS's main thread after timeout seconds instead.  callback is called
+#   on the thread that signals, so it should post what it does to
+#   OBS's main thread
+#
+#   the wait holds the reference to transition it is given until
+#   it finishes or release is called (on OBS's main thread)
+#
+#########################################
+
+class OBSTransitionWait:
+
+    def __init__(self, transition, scheduler, post, timeout, callback, *args):
+        self.lock = threading.Lock()
+        self.transition = transition
+        self.handler = obs.obs_source_get_signal_handler(transition)
+        self.scheduler = scheduler
+        self.callback = callback
+        self.args = args
+        self.stopped = self.transition_stopped      # the same callable connects and disconnects
+        self.entry = scheduler.call_later(timeout, post, None, self.stopped)
+        obs.signal_handler_connect(self.handler, "transition_stop", self.stopped)
+
+    def transition_stopped(self, calldata=None):
+        if self.release():
+            self.callback(*self.args)
+
+#########################################
+#
+#   release
+#   disconnects from the transition and releases it
+#   returns False if that was already done
+#
+#########################################
+
+    def release(self):
+        with self.lock:
+            transition = self.transition
+            self.transition = None
+        if transition is None:
+            return False
+        self.scheduler.cancel(self.entry)
+        obs.signal_handler_disconnect(self.handler, "transition_stop", self.stopped)
+        obs.obs_source_release(transition)
+        return True
+
+############################################
+#^^^^^^^^^^ end class OBSTransitionWait ^^^^
+############################################
+
+#########################################
+#
+#   OBSTracedModule
+#       takes the place of the obspython module while tracing
+#
+#   each function looked up through it is wrapped to record a span
+#   named after it (see OSCTracer) and kept, constants and classes are
+#   passed through.  trace_osc sets the script's global obs to one, so
+#   every obs.* call made here is traced, and sets it back to the
+#   module when tracing is turned off
+#
+#########################################
+
+class OBSTracedModule:
+
+    def __init__(self, module, tracer):
+        self.module = module
+        self.tracer = tracer
+
+    def __getattr__(self, name):
+        value = getattr(self.module, name)
+        if callable(value) and not isinstance(value, type):
+            value = self.tracer.traced(name, value)
+        setattr(self, name, value)
+        return value
+
+############################################
+#^^^^^^^^^^ end class OBSTracedModule ^^^^^^
+############################################
+
+#########################################
+#
+#   libobs_api()
+#       loads libobs with ctypes and declares the volmeter and
+#       scene update functions
+#       returns None if the library can't be found
+#
+#########################################
+
+def libobs_api():
+    try:
+        if sys.platform == "win32":
+            lib = ctypes.CDLL("obs")
+        else:
+            lib = ctypes.CDLL(ctypes.util.find_library("obs") or "libobs.so.0")
+    except OSError:
+        return None
+    api = lib
+    api.volmeter_callback_t = ctypes.CFUNCTYPE(None, ctypes.c_void_p,
+                                    ctypes.POINTER(ctypes.c_float),
+                                    ctypes.POINTER(ctypes.c_float),
+                                    ctypes.POINTER(ctypes.c_float))
+    api.scene_update_t = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_void_p)
+    declarations = (
+        ("obs_get_source_by_name", ctypes.c_void_p, [ctypes.c_char_p]),
+        ("obs_source_release", None, [ctypes.c_void_p]),
+        ("obs_volmeter_create", ctypes.c_void_p, [ctypes.c_int]),
+        ("obs_volmeter_destroy", None, [ctypes.c_void_p]),
+        ("obs_volmeter_attach_source", ctypes.c_bool, [ctypes.c_void_p, ctypes.c_void_p]),
+        ("obs_volmeter_detach_source", None, [ctypes.c_void_p]),
+        ("obs_volmeter_get_nr_channels", ctypes.c_int, [ctypes.c_void_p]),
+        ("obs_volmeter_add_callback", None, [ctypes.c_void_p, api.volmeter_callback_t, ctypes.c_void_p]),
+        ("obs_volmeter_remove_callback", None, [ctypes.c_void_p, api.volmeter_callback_t, ctypes.c_void_p]),
+        ("obs_get_scene_by_name", ctypes.c_void_p, [ctypes.c_char_p]),
+        ("obs_scene_release", None, [ctypes.c_void_p]),
+        ("obs_scene_atomic_update", None, [ctypes.c_void_p, api.scene_update_t, ctypes.c_void_p]),
+    )
+    for name, restype, argtypes in declarations:
+        function = getattr(lib, name)
+        function.restype = restype
+        function.argtypes = argtypes
+    return api
+
+# global OSCListener object
+oscin = None
+
+# the obspython module, obs is an OBSTracedModule while tracing
+obspython = obs
+
+# spans recorded while tracing, created the first time it is turned on
+tracer = None
+
+# read-only text property, added in OBS 28
+OBS_TEXT_INFO = getattr(obs, "OBS_TEXT_INFO", getattr(obs, "OBS_TEXT_MULTILINE", None))
+
+# cached frontend scene and transition lists
+scene_list = OBSSourceList(lambda: obs.obs_frontend_get_scenes())
+transition_list = OBSSourceList(lambda: obs.obs_frontend_get_transitions())
+
+# name to source index, used for /obs/source/NN/...
+source_index = OBSSourceIndex()
+
+# scene item index, used for /obs/scene/NN/item/...
+scene_items = OBSSceneItems()
+
+# audio level meters sent with feedback
+meters = OBSMeters()
+
+# volume fades advanced by script_tick
+fades = OBSFades()
+
+# obspython calls for OSC messages, made by script_tick
+obs_calls = OBSCallQueue()
+
+#########################################
+#
+#  on_frontend_event(event)
+#  invalidates the cached scene and transition lists
+#  when OBS reports that they have changed
+#
+#########################################
+
+def on_frontend_event(event):
+    if event in (obs.OBS_FRONTEND_EVENT_SCENE_LIST_CHANGED,
+                 obs.OBS_FRONTEND_EVENT_SCENE_COLLECTION_CHANGED,
+                 obs.OBS_FRONTEND_EVENT_SCENE_COLLECTION_CLEANUP,
+                 obs.OBS_FRONTEND_EVENT_EXIT):
+        scene_list.invalidate()
+        scene_items.invalidate()
+    if event in (obs.OBS_FRONTEND_EVENT_TRANSITION_LIST_CHANGED,
+                 obs.OBS_FRONTEND_EVENT_SCENE_COLLECTION_CHANGED,
+                 obs.OBS_FRONTEND_EVENT_SCENE_COLLECTION_CLEANUP,
+                 obs.OBS_FRONTEND_EVENT_EXIT):
+        transition_list.invalidate()
+    if event in FEEDBACK_EVENTS:
+        FEEDBACK_EVENTS[event]()
+    invalidate_routes()
+
+#########################################
+#
+#  refresh_lists()
+#  fetches the scene and transition lists again on OBS's main thread
+#  after they were invalidated, so the listener threads never do,
+#  and clears the match cache so wildcards expand to the new lists
+#
+#########################################
+
+def refresh_lists():
+    refreshed = scene_list.refresh()
+    if transition_list.refresh() or refreshed:
+        invalidate_routes()
+
+#########################################
+#
+#  invalidate_routes()
+#  clears the dispatch table's match cache after a list
+#  that wildcards expand to has changed
+#
+#########################################
+
+def invalidate_routes():
+    if oscin != None:
+        oscin.routes.invalidate()
+
+#########################################
+#
+#  connect_source_signals() / disconnect_source_signals()
+#  on_source_create / on_source_destroy / on_source_rename
+#  keep source_index current.  renaming a scene or
+#  transition also invalidates the cached scene and transition lists
+#
+#########################################
+
+SOURCE_SIGNALS = (("source_create", "on_source_create"),
+                  ("source_destroy", "on_source_destroy"),
+                  ("source_rename", "on_source_rename"))
+
+def connect_source_signals():
+    handler = obs.obs_get_signal_handler()
+    for signal, callback in SOURCE_SIGNALS:
+        obs.signal_handler_connect(handler, signal, globals()[callback])
+
+def disconnect_source_signals():
+    handler = obs.obs_get_signal_handler()
+    for signal, callback in SOURCE_SIGNALS:
+        obs.signal_handler_disconnect(handler, signal, globals()[callback])
+
+def on_source_create(calldata):
+    source = obs.calldata_source(calldata, "source")
+    source_index.source_created(source)
+    meters.source_created(obs.obs_source_get_name(source))
+    invalidate_routes()
+
+def on_source_destroy(calldata):
+    source = obs.calldata_source(calldata, "source")
+    source_index.source_destroyed(source)
+    meters.source_destroyed(obs.obs_source_get_name(source))
+    invalidate_routes()
+
+def on_source_rename(calldata):
+    source_index.source_renamed(obs.calldata_source(calldata, "source"),
+                                obs.calldata_string(calldata, "prev_name"),
+                                obs.calldata_string(calldata, "new_name"))
+    meters.source_renamed(obs.calldata_string(calldata, "prev_name"),
+                          obs.calldata_string(calldata, "new_name"))
+    scene_list.invalidate()
+    transition_list.invalidate()
+    scene_items.invalidate()
+    invalidate_routes()
+
+#########################################
+#
+#  on_scene_item_changed
+#  connected to item_add and item_remove of the scenes indexed
+#  by scene_items, marks the scene's items for enumerating again
+#
+#########################################
+
+def on_scene_item_changed(calldata):
+    scene = obs.obs_sceneitem_get_scene(obs.calldata_sceneitem(calldata, "item"))
+    scene_items.item_changed(obs.obs_source_get_name(obs.obs_scene_get_source(scene)))
+    invalidate_routes()
+
+#########################################
+#
+#  feedback
+#  feedback_update(address, *args) passes a state change to the
+#  listener's OSCFeedback.  the feedback_* functions read one
+#  piece of OBS state, feedback_snapshot reads all of it
+#
+#########################################
+
+def feedback_update(address, *args):
+    if oscin != None:
+        oscin.feedback.update(address, *args)
+
+def feedback_source_name(address, source):
+    if source != None:
+        feedback_update(address, obs.obs_source_get_name(source))
+        obs.obs_source_release(source)
+
+def feedback_program():
+    feedback_source_name("/obs/program/scene", obs.obs_frontend_get_current_scene())
+
+def feedback_preview():
+    feedback_source_name("/obs/preview/scene", obs.obs_frontend_get_current_preview_scene())
+
+def feedback_transition():
+    feedback_source_name("/obs/transition/current", obs.obs_frontend_get_current_transition())
+
+def feedback_recording():
+    feedback_update("/obs/recording/active", 1 if obs.obs_frontend_recording_active() else 0)
+
+def feedback_streaming():
+    feedback_update("/obs/streaming/active", 1 if obs.obs_frontend_streaming_active() else 0)
+
+def feedback_volumes():
+    for name in source_index.names():
+        source = source_index.get(name)
+        if source != None:
+            feedback_update("/obs/source/" + name + "/volume", obs.obs_source_get_volume(source))
+            obs.obs_source_release(source)
+
+def feedback_snapshot():
+    feedback_program()
+    feedback_preview()
+    feedback_transition()
+    feedback_recording()
+    feedback_streaming()
+    feedback_volumes()
+
+# the frontend events that send feedback (obs is None outside OBS)
+FEEDBACK_EVENTS = {}
+if obs != None:
+    FEEDBACK_EVENTS = {
+        obs.OBS_FRONTEND_EVENT_SCENE_CHANGED: feedback_program,
+        obs.OBS_FRONTEND_EVENT_PREVIEW_SCENE_CHANGED: feedback_preview,
+        obs.OBS_FRONTEND_EVENT_TRANSITION_CHANGED: feedback_transition,
+        obs.OBS_FRONTEND_EVENT_RECORDING_STARTED: feedback_recording,
+        obs.OBS_FRONTEND_EVENT_RECORDING_STOPPED: feedback_recording,
+        obs.OBS_FRONTEND_EVENT_STREAMING_STARTED: feedback_streaming,
+        obs.OBS_FRONTEND_EVENT_STREAMING_STOPPED: feedback_streaming,
+    }
+
+def on_source_volume(calldata):
+    source = obs.calldata_source(calldata, "source")
+    feedback_update("/obs/source/" + obs.obs_source_get_name(source) + "/volume",
+                    obs.calldata_float(calldata, "volume"))
+
+#########################################
+#
+#  parse_endpoints(specs)
+#  returns the OSCEndpoints for a list of endpoint strings
+#  entries that can't be parsed are skipped
+#
+#########################################
+
+def parse_endpoints(specs):
+    endpoints = []
+    for spec in specs:
+        try:
+            endpoints.append(parse_endpoint(spec))
+        except (OSError, ValueError):
+            print("OSC endpoint ignored: " + spec)
+    return endpoints
+
+#########################################
+#
+#  parse_feedback_targets(text)
+#  returns the (ip, port) targets in a "host:port, host:port" list
+#  entries that can't be resolved are skipped
+#
+#  parse_names(text)
+#  returns the names in a "name, name" list
+#
+#########################################
+
+def parse_names(text):
+    return [name.strip() for name in text.split(',') if name.strip()]
+
+def parse_feedback_targets(text):
+    targets = []
+    for entry in text.replace(';', ',').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, sep, port = entry.rpartition(':')
+        try:
+            targets.append((socket.gethostbyname(host), int(port)))
+        except (OSError, ValueError):
+            print("OSC feedback target ignored: " + entry)
+    return targets
+
+#########################################
+#
+#  set_preview(key)
+#  sets the OBS preview to the scene with number, name or index key
+#  if it exists
+#
+#########################################
+
+def set_preview(key):
+    scene = scene_list.get(scene_list.lookup(key))
+    if scene is not None:
+        obs.obs_frontend_set_current_preview_scene(scene)
+
+#########################################
+#
+#  set_transition(key)
+#   selects the OBS transition with number, name or index key
+#   if it exists
+#
+#########################################
+
+def set_transition(key):
+    trans = transition_list.get(transition_list.lookup(key))
+    if trans is not None:
+        obs.obs_frontend_set_current_transition(trans)
+        
+#########################################
+#
+#  set_transition_duration(d, key)
+#   sets the duration of the OBS transition with number or name key
+#   if it exists, or of the current transition if key is None
+#
+#########################################
+
+def set_transition_duration(d, key=None):
+    if key is None:
+        trans = obs.obs_frontend_get_current_transition()
+        if trans != None:
+            obs.obs_transition_enable_fixed(trans, True, d)
+            obs.obs_source_release(trans)
+    else:
+        trans = transition_list.get(transition_list.lookup(key))
+        if trans != None:
+            obs.obs_transition_enable_fixed(trans, True, d)
+   
+#########################################
+#
+#  nextScene()
+#   returns the next scene after the current preview scenes
+#   returns the first scene if reached the end of the list or otherwise
+#   returns None if there are no scenes
+#
+#########################################     
+def nextScene():
+    if scene_list.count() > 1:
+        c_scene = obs.obs_frontend_get_current_preview_scene()
+        if c_scene != None:
+            i = scene_list.index_of(c_scene) + 1
+            obs.obs_source_release(c_scene)
+            if i > 0 and i < scene_list.count():
+                return scene_list.get(i)
+    return scene_list.get(0)
+    
+#########################################
+#
+#   transition(key)
+#       executes the transition with number or name key
+#       (nothing if there is no transition named key)
+#
+#   transition()
+#       executes the currently selected transition
+#
+#########################################
+      
+def transition(key = None):
+    trans = None
+    if key is not None:
+        idx = transition_list.lookup(key)
+        if idx < 0:
+            return
+        set_transition(idx)
+    trans = obs.obs_frontend_get_current_transition()
+    mode = obs.OBS_TRANSITION_MODE_AUTO
+    duration = 0
+    p_scene = obs.obs_frontend_get_current_preview_scene()
+    obs.obs_transition_start(trans, mode, duration, p_scene)
+    obs.obs_frontend_set_current_scene(p_scene)
+    if p_scene != None:
+        obs.obs_source_release(p_scene)
+    if trans != None:
+        obs.obs_source_release(trans)
+
+#########################################
+#
+#  go(cues)
+#   executes the currently selected transition
+#   the next scene is selected for preview once the transition
+#   is done, as a step of the current cue of cues (an OSCCueRunner)
+#   (by index, the cached scene list may be replaced in the meantime)
+#
+#  go(cues, key)
+#   executes the transition with number or name key
+#
+#  the transition is done when it signals transition_stop, or
+#  OBS_GO_PREVIEW_TIMEOUT seconds after its duration if it never does
+#
+######################################### 
+
+def go(cues, key = None):
+    if key is not None:
+        idx = transition_list.lookup(key)
+        if idx < 0:
+            return
+        set_transition(idx)
+    following = scene_list.index_of(nextScene())
+    trans = obs.obs_frontend_get_current_transition()
+    if trans != None:
+        timeout = obs.obs_frontend_get_transition_duration() / 1000.0 + OBS_GO_PREVIEW_TIMEOUT
+        cues.wait(trans, timeout, set_preview, following)
+    transition()
+    if trans == None:
+        set_preview(following)
     
+#########################################
+#
+#  source_volume(src, volume)
+#   sets the volume of the source named src
+#
+#  source_volumes(pairs)
+#   sets the volumes of a list of name, volume pairs
+#   looking all of the names up in one pass
+#
+#  setting a source's volume cancels its fade
+#
+#########################################
+
 def source_volume(src, volume):
-    #n_scene = nextScene()
-    sources = obs.obs_enum_sources()
-    found = None
-    if sources is not None:
-        for source in sources:
-            source_id = obs.obs_source_get_id(source)
-            name = obs.obs_source_get_name(source)
-            if name == src:
-                found = source
-    if found != None:
-        obs.obs_source_set_volume(found, float(volume))
+    fades.cancel(src)
+    source = source_index.get(src)
+    if source != None:
+        obs.obs_source_set_volume(source, float(volume))
+        obs.obs_source_release(source)
+
+def source_volumes(pairs):
+    names = pairs[0::2]
+    volumes = pairs[1::2]
+    for name in names:
+        fades.cancel(name)
+    for source, volume in zip(source_index.get_many(names), volumes):
+        if source != None:
+            obs.obs_source_set_volume(source, float(volume))
+            obs.obs_source_release(source)
 
 ######################################### 
 #   start_osc
 #       create OSCListener if needed and start listening
+#       oscin is only set once the listener's port is open
 ######################################### 
     
 def start_osc():
     global oscin
     global OBS_OSC_PORT
     if oscin == None:
-        oscin = OSCListener()
-        oscin.start_listening(OBS_OSC_PORT)
-        print("OSC started on port " + str(OBS_OSC_PORT))
+        if OBS_OSC_FRONTEND:
+            start_commands()
+            return
+        if OBS_OSC_BACKEND == "asyncio":
+            listener = OSCAsyncListener()
+        else:
+            listener = OSCListener()
+        if OBS_OSC_TRACE:
+            listener.trace(tracer)
+        try:
+            listener.start_listening(OBS_OSC_PORT, OBS_OSC_MAX_PACKET, OBS_OSC_RCVBUF_KB * 1024,
+                                     OBS_OSC_TCP_PORT, OBS_OSC_TCP_FRAMING,
+                                     parse_endpoints(OBS_OSC_ENDPOINTS))
+        except OSError as e:
+            listener.stop_listening()
+            print("OSC port " + str(OBS_OSC_PORT) + " not opened: " + str(e))
+            return
+        oscin = listener
+        obs_calls.metrics = oscin.metrics
+        oscin.feedback.set_rate(OBS_OSC_FEEDBACK_RATE)
+        feedback_snapshot()
+        oscin.feedback.set_targets(parse_feedback_targets(OBS_OSC_FEEDBACK))
+        meters.start(oscin.scheduler, oscin.feedback, parse_names(OBS_OSC_METERS), OBS_OSC_METER_RATE)
+        print("OSC started on port " + str(OBS_OSC_PORT) + " (" + OBS_OSC_BACKEND + ")")
+        for endpoint in oscin.endpoints[1:]:
+            print("OSC also on " + endpoint.describe())
+        oscin.set_queue(OBS_OSC_QUEUE, OBS_OSC_OVERFLOW)
+        start_capture()
+
+######################################### 
+#   start_commands
+#       start_osc when an OSC front end process receives OSC:
+#       create an OSCListener without sockets that applies the
+#       commands in the OBS_OSC_FRONTEND command ring every frame
+######################################### 
+
+def start_commands():
+    global oscin
+    listener = OSCListener()
+    try:
+        listener.start_commands(OBS_OSC_FRONTEND)
+    except (OSError, ValueError) as e:
+        print("OSC front end ring not opened: " + str(e))
+        return
+    oscin = listener
+    obs_calls.metrics = oscin.metrics
+    if OBS_OSC_TRACE:
+        oscin.trace(tracer)
+    oscin.feedback.set_rate(OBS_OSC_FEEDBACK_RATE)
+    feedback_snapshot()
+    oscin.feedback.set_targets(parse_feedback_targets(OBS_OSC_FEEDBACK))
+    meters.start(oscin.scheduler, oscin.feedback, parse_names(OBS_OSC_METERS), OBS_OSC_METER_RATE)
+    print("OSC started, commands from the front end through " + OBS_OSC_FRONTEND)
+
+######################################### 
+#   start_capture
+#       starts capturing to OBS_OSC_CAPTURE (or stops if it is empty)
+######################################### 
+
+def start_capture():
+    if oscin != None:
+        try:
+            oscin.capture(OBS_OSC_CAPTURE)
+            if OBS_OSC_CAPTURE:
+                print("OSC capturing to " + OBS_OSC_CAPTURE)
+        except (OSError, ValueError) as e:
+            print("OSC capture not started: " + str(e))
 
 ######################################### 
 #   stop_osc
@@ -635,6 +5058,7 @@ def start_osc():
 def stop_osc():
     global oscin
     if oscin != None:
+        meters.stop()
         oscin.stop_listening()
         oscin = None
         print("OSC stopped.")
@@ -654,6 +5078,43 @@ def listen_pressed(props, prop):
 
 def stop_pressed(props, prop):
     stop_osc()
+
+######################################### 
+#   endpoint_stats_pressed
+#       callback when the endpoint statistics button is clicked
+#       logs each endpoint's statistics
+######################################### 
+
+def endpoint_stats_pressed(props, prop):
+    if oscin != None:
+        for endpoint in oscin.endpoints:
+            print(endpoint.describe() + ": " + endpoint.statistics())
+
+######################################### 
+#   stats_pressed
+#       callback when the show statistics button is clicked
+#       shows the listener's metrics in the properties and the log
+######################################### 
+
+def stats_pressed(props, prop):
+    if oscin != None:
+        lines = ["listener " + (", ".join(oscin.liveness()) or "alive")]
+        lines += oscin.metrics.report(oscin.routes.templates)
+    else:
+        lines = ["OSC is not started"]
+    print("\n".join(lines))
+    obs.obs_property_set_description(obs.obs_properties_get(props, "osc-stats"), "\n".join(lines))
+    return True
+
+######################################### 
+#   stats_reset_pressed
+#       callback when the reset statistics button is clicked
+######################################### 
+
+def stats_reset_pressed(props, prop):
+    if oscin != None:
+        oscin.metrics.reset()
+    return stats_pressed(props, prop)
     
 ######################################### 
 #   port_field_changed
@@ -665,13 +5126,266 @@ def port_field_changed(props, prop_id, settings_data):
     global OBS_OSC_PORT
     global OBS_OSC_AUTO_START
     pport = obs.obs_data_get_int(settings_data, "osc-port")
-    if pport != 0:
+    if pport != 0 and pport != OBS_OSC_PORT:
         OBS_OSC_PORT = pport
+        rebind_osc()
+    
+######################################### 
+#   frontend_changed
+#       callback when the front end command ring is changed
+######################################### 
+
+def frontend_changed(props, prop_id, settings_data):
+    global OBS_OSC_FRONTEND
+    path = obs.obs_data_get_string(settings_data, "osc-frontend")
+    if path != OBS_OSC_FRONTEND:
+        OBS_OSC_FRONTEND = path
         if oscin != None:
             stop_osc()
             print("restarting...")
             start_osc()
-    
+
+######################################### 
+#   backend_changed
+#       callback when the listener backend is changed
+######################################### 
+
+def backend_changed(props, prop_id, settings_data):
+    global OBS_OSC_BACKEND
+    backend = obs.obs_data_get_string(settings_data, "osc-backend")
+    if backend in ("threaded", "asyncio") and backend != OBS_OSC_BACKEND:
+        OBS_OSC_BACKEND = backend
+        if oscin != None:
+            stop_osc()
+            print("restarting...")
+            start_osc()
+
+######################################### 
+#   receive_settings_changed
+#       callback when the packet size, receive buffer,
+#       tcp settings or endpoint list are changed
+######################################### 
+
+def receive_settings_changed(props, prop_id, settings_data):
+    if read_receive_settings(settings_data):
+        rebind_osc()
+
+######################################### 
+#   rebind_osc
+#       moves the running listener to the port, tcp port and
+#       endpoints set without stopping it (see OSCListener.rebind)
+#       restarts it if it doesn't respond
+######################################### 
+
+def rebind_osc():
+    if oscin == None or OBS_OSC_FRONTEND:
+        return
+    start = time.perf_counter()
+    try:
+        switched = oscin.rebind(OBS_OSC_PORT, OBS_OSC_MAX_PACKET, OBS_OSC_RCVBUF_KB * 1024,
+                                OBS_OSC_TCP_PORT, OBS_OSC_TCP_FRAMING,
+                                parse_endpoints(OBS_OSC_ENDPOINTS))
+    except OSError as e:
+        print("OSC port " + str(OBS_OSC_PORT) + " not opened, still on "
+              + oscin.endpoints[0].describe() + ": " + str(e))
+        return
+    if switched:
+        print("OSC rebound in " + ("%.1f" % ((time.perf_counter() - start) * 1000.0))
+              + " ms, on " + oscin.endpoints[0].describe())
+        for endpoint in oscin.endpoints[1:]:
+            print("OSC also on " + endpoint.describe())
+    else:
+        print("OSC listener not responding, restarting...")
+        stop_osc()
+        start_osc()
+
+######################################### 
+#   check_listener
+#       timer callback, restarts the listener
+#       if it reports it is not alive
+#       a restart that fails is logged, never raised from the timer
+######################################### 
+
+def check_listener():
+    if oscin != None:
+        problems = oscin.liveness()
+        if problems:
+            print("OSC listener " + ", ".join(problems) + ", restarting...")
+            try:
+                stop_osc()
+                start_osc()
+            except Exception:
+                traceback.print_exc()
+
+######################################### 
+#   read_receive_settings
+#       reads the packet size, receive buffer, tcp settings
+#       and endpoint list.  returns True if any changed
+######################################### 
+
+def read_receive_settings(settings_data):
+    global OBS_OSC_MAX_PACKET
+    global OBS_OSC_RCVBUF_KB
+    global OBS_OSC_TCP_PORT
+    global OBS_OSC_TCP_FRAMING
+    global OBS_OSC_ENDPOINTS
+    max_packet = obs.obs_data_get_int(settings_data, "osc-max-packet")
+    rcvbuf_kb = obs.obs_data_get_int(settings_data, "osc-rcvbuf")
+    tcp_port = obs.obs_data_get_int(settings_data, "osc-tcp-port")
+    tcp_framing = obs.obs_data_get_string(settings_data, "osc-tcp-framing")
+    max_packet = min(max(max_packet, 256), OSC_MAX_PACKET_LIMIT)
+    if tcp_framing not in ("slip", "length"):
+        tcp_framing = OBS_OSC_TCP_FRAMING
+    endpoints = []
+    array = obs.obs_data_get_array(settings_data, "osc-endpoints")
+    if array is not None:
+        for i in range(obs.obs_data_array_count(array)):
+            item = obs.obs_data_array_item(array, i)
+            endpoints.append(obs.obs_data_get_string(item, "value"))
+            obs.obs_data_release(item)
+        obs.obs_data_array_release(array)
+    changed = ((max_packet != OBS_OSC_MAX_PACKET) or (rcvbuf_kb != OBS_OSC_RCVBUF_KB)
+               or (tcp_port != OBS_OSC_TCP_PORT) or (tcp_framing != OBS_OSC_TCP_FRAMING)
+               or (endpoints != OBS_OSC_ENDPOINTS))
+    OBS_OSC_MAX_PACKET = max_packet
+    OBS_OSC_RCVBUF_KB = rcvbuf_kb
+    OBS_OSC_TCP_PORT = tcp_port
+    OBS_OSC_TCP_FRAMING = tcp_framing
+    OBS_OSC_ENDPOINTS = endpoints
+    return changed
+
+######################################### 
+#   feedback_settings_changed
+#       callback when the feedback targets or rate are changed
+#       applied to the running listener without a restart
+######################################### 
+
+def feedback_settings_changed(props, prop_id, settings_data):
+    read_feedback_settings(settings_data)
+    if oscin != None:
+        oscin.feedback.set_rate(OBS_OSC_FEEDBACK_RATE)
+        oscin.feedback.set_targets(parse_feedback_targets(OBS_OSC_FEEDBACK))
+
+def read_feedback_settings(settings_data):
+    global OBS_OSC_FEEDBACK
+    global OBS_OSC_FEEDBACK_RATE
+    OBS_OSC_FEEDBACK = obs.obs_data_get_string(settings_data, "osc-feedback")
+    OBS_OSC_FEEDBACK_RATE = max(obs.obs_data_get_int(settings_data, "osc-feedback-rate"), 1)
+
+######################################### 
+#   trace_osc(on)
+#       turns tracing on or off (see OSCTracer).  while on, the
+#       listener's methods, the queued calls and every obs.* call
+#       record spans.  the spans are kept when tracing is turned off
+#       and added to when it is turned on again
+######################################### 
+
+def trace_osc(on):
+    global obs
+    global tracer
+    global OBS_OSC_TRACE
+    if on and tracer is None:
+        tracer = OSCTracer()
+    OBS_OSC_TRACE = on
+    obs = OBSTracedModule(obspython, tracer) if on else obspython
+    obs_calls.tracer = tracer if on else None
+    if oscin != None:
+        oscin.trace(tracer if on else None)
+    print("OSC tracing " + ("on" if on else "off"))
+
+######################################### 
+#   write_trace
+#       writes the spans recorded to OBS_OSC_TRACE_FILE on a thread
+#       of its own, so neither OBS nor the listener waits for it
+######################################### 
+
+def write_trace():
+    recorded = tracer
+    if recorded is None:
+        print("OSC trace not written, tracing has not been on")
+        return
+    path = OBS_OSC_TRACE_FILE or os.path.join(os.path.expanduser("~"), "obs_osc_trace.json")
+
+    def write():
+        try:
+            count = recorded.write(path)
+            print("OSC trace of " + str(count) + " spans written to " + path)
+        except OSError as e:
+            print("OSC trace not written: " + str(e))
+
+    threading.Thread(target=write, daemon=True).start()
+
+######################################### 
+#   trace_settings_changed
+#       callback when tracing is turned on or off or the trace file
+#       is changed
+######################################### 
+
+def trace_settings_changed(props, prop_id, settings_data):
+    global OBS_OSC_TRACE_FILE
+    OBS_OSC_TRACE_FILE = obs.obs_data_get_string(settings_data, "osc-trace-file")
+    on = obs.obs_data_get_bool(settings_data, "osc-trace")
+    if on != OBS_OSC_TRACE:
+        trace_osc(on)
+
+######################################### 
+#   trace_pressed
+#       callback when the write trace button is clicked
+######################################### 
+
+def trace_pressed(props, prop):
+    write_trace()
+
+######################################### 
+#   meter_settings_changed
+#       callback when the metered sources or meter rate are changed
+######################################### 
+
+def meter_settings_changed(props, prop_id, settings_data):
+    if read_meter_settings(settings_data) and oscin != None:
+        meters.start(oscin.scheduler, oscin.feedback, parse_names(OBS_OSC_METERS), OBS_OSC_METER_RATE)
+
+######################################### 
+#   queue_settings_changed
+#       callback when the dispatch queue size or overflow policy
+#       is changed, applied to the running listener
+######################################### 
+
+def queue_settings_changed(props, prop_id, settings_data):
+    read_queue_settings(settings_data)
+    if oscin != None:
+        oscin.set_queue(OBS_OSC_QUEUE, OBS_OSC_OVERFLOW)
+
+def read_queue_settings(settings_data):
+    global OBS_OSC_QUEUE
+    global OBS_OSC_OVERFLOW
+    OBS_OSC_QUEUE = max(obs.obs_data_get_int(settings_data, "osc-queue"), 0)
+    overflow = obs.obs_data_get_string(settings_data, "osc-overflow")
+    if overflow in OSC_OVERFLOW_POLICIES:
+        OBS_OSC_OVERFLOW = overflow
+
+######################################### 
+#   capture_settings_changed
+#       callback when the capture file is changed
+######################################### 
+
+def capture_settings_changed(props, prop_id, settings_data):
+    global OBS_OSC_CAPTURE
+    path = obs.obs_data_get_string(settings_data, "osc-capture")
+    if path != OBS_OSC_CAPTURE:
+        OBS_OSC_CAPTURE = path
+        start_capture()
+
+def read_meter_settings(settings_data):
+    global OBS_OSC_METERS
+    global OBS_OSC_METER_RATE
+    names = obs.obs_data_get_string(settings_data, "osc-meters")
+    rate = max(obs.obs_data_get_int(settings_data, "osc-meter-rate"), 1)
+    changed = (names != OBS_OSC_METERS) or (rate != OBS_OSC_METER_RATE)
+    OBS_OSC_METERS = names
+    OBS_OSC_METER_RATE = rate
+    return changed
+
 ######################################### 
 #       obspython functions
 ######################################### 
@@ -679,16 +5393,68 @@ def port_field_changed(props, prop_id, settings_data):
 def script_defaults(settings_data):
     global OBS_OSC_PORT
     obs.obs_data_set_int(settings_data, "osc-port", OBS_OSC_PORT)
+    obs.obs_data_set_default_string(settings_data, "osc-backend", OBS_OSC_BACKEND)
+    obs.obs_data_set_default_int(settings_data, "osc-max-packet", OBS_OSC_MAX_PACKET)
+    obs.obs_data_set_default_int(settings_data, "osc-rcvbuf", OBS_OSC_RCVBUF_KB)
+    obs.obs_data_set_default_int(settings_data, "osc-tcp-port", OBS_OSC_TCP_PORT)
+    obs.obs_data_set_default_string(settings_data, "osc-tcp-framing", OBS_OSC_TCP_FRAMING)
+    obs.obs_data_set_default_int(settings_data, "osc-queue", OBS_OSC_QUEUE)
+    obs.obs_data_set_default_string(settings_data, "osc-overflow", OBS_OSC_OVERFLOW)
+    obs.obs_data_set_default_string(settings_data, "osc-feedback", OBS_OSC_FEEDBACK)
+    obs.obs_data_set_default_int(settings_data, "osc-feedback-rate", OBS_OSC_FEEDBACK_RATE)
+    obs.obs_data_set_default_string(settings_data, "osc-meters", OBS_OSC_METERS)
+    obs.obs_data_set_default_int(settings_data, "osc-meter-rate", OBS_OSC_METER_RATE)
+    obs.obs_data_set_default_bool(settings_data, "osc-trace", OBS_OSC_TRACE)
+
+def script_load(settings):
+    obs.obs_frontend_add_event_callback(on_frontend_event)
+    connect_source_signals()
+    obs.timer_add(check_listener, OBS_OSC_WATCHDOG_MS)
 
 def script_update(settings):
     global OBS_OSC_AUTO_START
+    global OBS_OSC_BACKEND
     if OBS_OSC_AUTO_START == 1:
+        backend = obs.obs_data_get_string(settings, "osc-backend")
+        if backend in ("threaded", "asyncio"):
+            OBS_OSC_BACKEND = backend
+        read_receive_settings(settings)
+        read_feedback_settings(settings)
+        read_meter_settings(settings)
+        read_queue_settings(settings)
+        capture_settings_changed(None, None, settings)
+        trace_settings_changed(None, None, settings)
+        frontend_changed(None, None, settings)
         start_osc()
         OBS_OSC_AUTO_START = 0  #only first time
 
 def script_unload():
+    obs.timer_remove(check_listener)
     stop_osc()
+    if OBS_OSC_TRACE:
+        trace_osc(False)
+    obs_calls.clear()
+    fades.cancel_all()
+    obs.obs_frontend_remove_event_callback(on_frontend_event)
+    disconnect_source_signals()
+    scene_list.invalidate()
+    transition_list.invalidate()
+    scene_items.invalidate()
+    source_index.clear()
     
+######################################### 
+#   script_tick
+#       called by OBS every frame on its main thread, applies the
+#       commands from an OSC front end, makes the queued obspython
+#       calls and advances the volume fades
+######################################### 
+def script_tick(seconds):
+    if oscin != None:
+        refresh_lists()
+        oscin.apply_commands()
+    obs_calls.drain()
+    fades.tick()
+
 def script_description():
     return '''Control OBS preview, transitions and start/stop via OSC.''' 
     
@@ -701,4 +5467,74 @@ def script_properties():
     port_field = obs.obs_properties_add_int(props, "osc-port",  "OSC Port", 1001, 99999, 1)
     obs.obs_property_set_modified_callback(port_field, port_field_changed)
     
+    backend_list = obs.obs_properties_add_list(props, "osc-backend", "Listener",
+                            obs.OBS_COMBO_TYPE_LIST, obs.OBS_COMBO_FORMAT_STRING)
+    obs.obs_property_list_add_string(backend_list, "Threaded (selectors)", "threaded")
+    obs.obs_property_list_add_string(backend_list, "asyncio event loop", "asyncio")
+    obs.obs_property_set_modified_callback(backend_list, backend_changed)
+    frontend_field = obs.obs_properties_add_path(props, "osc-frontend", "Front End Command Ring (optional)",
+                            obs.OBS_PATH_FILE_SAVE, "OSC command ring (*.oscring)", None)
+    obs.obs_property_set_modified_callback(frontend_field, frontend_changed)
+    
+    packet_field = obs.obs_properties_add_int(props, "osc-max-packet", "Max Packet Size (bytes)",
+                            256, OSC_MAX_PACKET_LIMIT, 256)
+    obs.obs_property_set_modified_callback(packet_field, receive_settings_changed)
+    rcvbuf_field = obs.obs_properties_add_int(props, "osc-rcvbuf", "Receive Buffer (KB, 0 = default)",
+                            0, 65536, 64)
+    obs.obs_property_set_modified_callback(rcvbuf_field, receive_settings_changed)
+    
+    tcp_field = obs.obs_properties_add_int(props, "osc-tcp-port", "OSC TCP Port (0 = off)", 0, 65535, 1)
+    obs.obs_property_set_modified_callback(tcp_field, receive_settings_changed)
+    framing_list = obs.obs_properties_add_list(props, "osc-tcp-framing", "TCP Framing",
+                            obs.OBS_COMBO_TYPE_LIST, obs.OBS_COMBO_FORMAT_STRING)
+    obs.obs_property_list_add_string(framing_list, "SLIP (OSC 1.1)", "slip")
+    obs.obs_property_list_add_string(framing_list, "Size prefix (OSC 1.0)", "length")
+    obs.obs_property_set_modified_callback(framing_list, receive_settings_changed)
+    
+    endpoint_list = obs.obs_properties_add_editable_list(props, "osc-endpoints",
+                            "Additional Endpoints ([udp|tcp] [IP:]PORT [GROUP|slip|length])",
+                            obs.OBS_EDITABLE_LIST_TYPE_STRINGS, "", "")
+    obs.obs_property_set_modified_callback(endpoint_list, receive_settings_changed)
+    
+    queue_field = obs.obs_properties_add_int(props, "osc-queue", "Dispatch Queue (0 for none)",
+                            0, 65536, 1)
+    obs.obs_property_set_modified_callback(queue_field, queue_settings_changed)
+    overflow_list = obs.obs_properties_add_list(props, "osc-overflow", "Queue Overflow",
+                            obs.OBS_COMBO_TYPE_LIST, obs.OBS_COMBO_FORMAT_STRING)
+    obs.obs_property_list_add_string(overflow_list, "Drop oldest fader value", "drop-oldest")
+    obs.obs_property_list_add_string(overflow_list, "Drop new messages", "drop-newest")
+    obs.obs_property_list_add_string(overflow_list, "Wait (leave packets in the socket buffer)", "block")
+    obs.obs_property_set_modified_callback(overflow_list, queue_settings_changed)
+    obs.obs_properties_add_button(props, "endpoint-stats-button", "Log Endpoint Statistics",
+                            endpoint_stats_pressed)
+    
+    feedback_field = obs.obs_properties_add_text(props, "osc-feedback", "Feedback To (host:port, ...)",
+                            obs.OBS_TEXT_DEFAULT)
+    obs.obs_property_set_modified_callback(feedback_field, feedback_settings_changed)
+    rate_field = obs.obs_properties_add_int(props, "osc-feedback-rate", "Feedback Rate (per second)",
+                            1, 120, 1)
+    obs.obs_property_set_modified_callback(rate_field, feedback_settings_changed)
+    
+    meters_field = obs.obs_properties_add_text(props, "osc-meters", "Meter Sources (name, ...)",
+                            obs.OBS_TEXT_DEFAULT)
+    obs.obs_property_set_modified_callback(meters_field, meter_settings_changed)
+    meter_rate_field = obs.obs_properties_add_int(props, "osc-meter-rate", "Meter Rate (per second)",
+                            1, 60, 1)
+    obs.obs_property_set_modified_callback(meter_rate_field, meter_settings_changed)
+    
+    capture_field = obs.obs_properties_add_path(props, "osc-capture", "Capture OSC To",
+                            obs.OBS_PATH_FILE_SAVE, "OSC packet log (*.osclog)", None)
+    obs.obs_property_set_modified_callback(capture_field, capture_settings_changed)
+    
+    trace_check = obs.obs_properties_add_bool(props, "osc-trace", "Trace (Chrome trace events)")
+    obs.obs_property_set_modified_callback(trace_check, trace_settings_changed)
+    trace_field = obs.obs_properties_add_path(props, "osc-trace-file", "Write Trace To",
+                            obs.OBS_PATH_FILE_SAVE, "Chrome trace (*.json)", None)
+    obs.obs_property_set_modified_callback(trace_field, trace_settings_changed)
+    obs.obs_properties_add_button(props, "trace-button", "Write Trace", trace_pressed)
+    
+    obs.obs_properties_add_text(props, "osc-stats", "", OBS_TEXT_INFO)
+    obs.obs_properties_add_button(props, "stats-button", "Show Statistics", stats_pressed)
+    obs.obs_properties_add_button(props, "stats-reset-button", "Reset Statistics", stats_reset_pressed)
+    
     return props
\ No newline at end of file
@@ -0,0 +1,468 @@
+#!/usr/bin/python
+#
+#   bench_osc.py
+#
+#   benchmarks for OBS_OSC.py that run headless outside OBS
+#   using the obspython stand-in in this directory
+#
+#   python3 tools/bench_osc.py [decode] [dispatch] [latency] [options]
+#
+#   decode      packets decoded per second for common message shapes
+#               (dispatch is a no-op), next to the original decoder
+#               (next_zero and string_from_index) as a baseline
+#   dispatch    cost of dispatch_message for each family of addresses,
+#               including making the (simulated) obspython calls
+#               it queues for OBS's main thread
+#   latency     end-to-end latency over UDP loopback, from sendto() to the
+#               obs_source_set_volume call, under a flood of fader messages
+#               like the ones TouchOSC sends while faders are dragged.
+#               triggers (/obs/recording/start and stop) are sent
+#               during the flood and measured separately.
+#               --cost makes each volume change take that long in OBS,
+#               --queue sets the dispatch queue (0 dispatches inline),
+#               --fps the rate a thread standing in for OBS's main
+#               thread calls script_tick
+#               --legacy-loop receives with the loop OSCListener.listen
+#               used to have, polling select with no timeout and
+#               sleeping a tenth of a second when nothing is ready,
+#               as a baseline for the selector loop (threaded backend only)
+#
+#   with no benchmark named, all three are run
+#
+#  see license included with this distribution or
+#  https://www.claudeheintzdesign.com/lx/opensource.html
+#
+
+import os
+import sys
+import math
+import time
+import socket
+import struct
+import argparse
+import threading
+from select import select
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import obspython as obs
+import OBS_OSC
+
+# fader values carry a sequence number, exact in a float32 below 2**24
+SEQUENCE_SCALE = float(1 << 24)
+
+#########################################
+#
+#   timed(function, seconds)
+#   calls function repeatedly for about seconds
+#   returns the average time per call in seconds
+#
+#########################################
+
+def timed(function, seconds, batch=1000):
+    count = 0
+    start = time.perf_counter()
+    end = start + seconds
+    now = start
+    while now < end:
+        for i in range(batch):
+            function()
+        count += batch
+        now = time.perf_counter()
+    return (now - start) / count
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return float('nan')
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def print_latencies(label, latencies, sent):
+    ordered = sorted(latencies)
+    text = label.ljust(10) + str(len(ordered)).rjust(7) + "/" + str(sent).ljust(7)
+    for fraction in (0.5, 0.9, 0.99, 0.999):
+        text += ("%.0f" % (percentile(ordered, fraction) * 1e6)).rjust(9)
+    text += ("%.0f" % ((ordered[-1] if ordered else float('nan')) * 1e6)).rjust(9)
+    print(text)
+
+def load_obs(source_names):
+    obs.reset(source_names=source_names)
+    OBS_OSC.script_unload()
+    OBS_OSC.script_load(obs.obs_data_create())
+
+#########################################
+#
+#   DecodeListener
+#       counts the messages decoded instead of dispatching them
+#
+#########################################
+
+class DecodeListener(OBS_OSC.OSCListener):
+
+    def __init__(self):
+        super().__init__()
+        self.messages = 0
+
+    def dispatch_message(self, addressPattern, args):
+        self.messages += 1
+
+#########################################
+#
+#   LegacyDecoder
+#       the decoder OSCListener had before process_message_at used
+#       bytes.find and cached struct plans, kept as it was
+#       (including not advancing past 'i' arguments) as the baseline
+#       for bench_decode.  it does not decode bundles
+#
+#########################################
+
+class LegacyDecoder:
+
+    def __init__(self):
+        self.messages = 0
+        self.data = b''
+        self.msglen = 0
+
+    def packet_received(self, packet):
+        self.data = packet
+        self.msglen = len(packet)
+        dataindex = 0
+        while ( (dataindex >= 0 ) and ( dataindex < self.msglen ) ):
+            dataindex = self.process_message_at(dataindex);
+
+    def process_message_at(self, si):
+        oi = 0;
+        dl = 0;
+        zl = self.next_zero(si)
+        
+        #insure that string will terminate with room for 4 bytes of type definition
+        if zl + 4 < self.msglen: 
+            addressPattern = self.string_from_index(si)
+            if addressPattern.startswith('/'):
+                # determine the current index for the type character
+                tl = self.next_index_for_string(addressPattern,si)
+                
+                # determine the current index for the data location
+                dl = self.next_index_for_index(self.next_zero(tl))
+                
+                # if there's space for at least one argument, start a loop extracting
+                # arguments defined in the type string an adding them to the args list
+                if dl+4 <= self.msglen:
+                    if self.data[tl] == ord(','):
+                        tl += 1
+                    args = []
+                    done = False
+                    while ( not done) and ( (dl+4) <= self.msglen ):
+                        if self.data[tl] == 0:
+                            done = True
+                        elif self.data[tl] == ord('f'):
+                            a = struct.unpack_from('>f', self.data, dl)
+                            args.append(float(a[0]))
+                            dl += 4
+                        elif self.data[tl] == ord('i'):
+                            a = struct.unpack_from('>i', self.data, dl)
+                            args.append(int(a[0]))
+                        elif self.data[tl] == ord('s'):
+                            es = self.next_zero(dl)
+                            if es <= self.msglen:
+                                a = self.string_from_index(dl)
+                                args.append(a)
+                                dl = self.next_index_for_index(es)
+                            else:
+                                done = True
+                                oi = -1
+                        else:   #unrecognized argument don't know length
+                            done = True
+                            oi = -1
+                        tl += 1
+                    
+                    # when done with the argument extraction loop, call dispatch_message
+                    self.dispatch_message(addressPattern, args)
+
+                else: # <- no arguments but an address pattern
+                    oi = -1
+                    self.dispatch_message(addressPattern, [])
+        else:
+            oi = -1
+            
+        if oi != -1:
+            oi = dl     #dl could point to another message within the packet
+        
+        return oi   
+
+    def next_zero(self, si):
+        i = si
+        notfound = True
+        s = ''
+        while notfound and i<self.msglen:
+            if self.data[i] == 0:
+                notfound = False
+            else:
+                i += 1
+        return i
+
+    def next_index_for_string(self, s, start):
+        ml = math.trunc(len(s) / 4) + 1;
+        return start + (ml*4);
+
+    def next_index_for_index(self, i):
+        ml = math.trunc(i / 4) + 1;
+        return ml*4;
+
+    def string_from_index(self, si):
+        i = si
+        noterm = True
+        s = ''
+        while noterm and i<len(self.data):
+            if self.data[i] == 0:
+                noterm = False
+            else:
+                s +=  chr(self.data[i])
+                i += 1
+        return s
+
+    def dispatch_message(self, addressPattern, args):
+        self.messages += 1
+
+def messages_per_second(decoder, packet, seconds):
+    per_packet = timed(lambda: decoder.packet_received(packet), seconds)
+    decoder.messages = 0
+    decoder.packet_received(packet)
+    return decoder.messages / per_packet
+
+def bench_decode(options):
+    fader = OBS_OSC.osc_encode_message("/obs/source/Mic/volume", [0.5])
+    packets = (
+        ("fader ,f", fader),
+        ("trigger ,f", OBS_OSC.osc_encode_message("/obs/scene/2/go", [1.0])),
+        ("int ,i", OBS_OSC.osc_encode_message("/obs/transition/duration", [300])),
+        ("batch ,sfsfsf", OBS_OSC.osc_encode_message("/obs/source/volume",
+                                ["Mic", 0.5, "Music", 0.25, "Desktop Audio", 0.75])),
+        ("bundle 8 x ,f", OBS_OSC.osc_encode_bundles([fader] * 8, 1400)[0]),
+    )
+    listener = DecodeListener()
+    legacy = LegacyDecoder()
+    print("decode                  msgs/s   ns/msg   legacy msgs/s   speedup")
+    for label, packet in packets:
+        rate = messages_per_second(listener, packet, options.seconds)
+        text = label.ljust(18) + ("%.0f" % rate).rjust(12) + ("%.0f" % (1e9 / rate)).rjust(9)
+        if not packet.startswith(b'#bundle'):
+            legacy_rate = messages_per_second(legacy, packet, options.seconds)
+            text += ("%.0f" % legacy_rate).rjust(16) + ("%.2fx" % (rate / legacy_rate)).rjust(10)
+        print(text)
+
+def bench_dispatch(options):
+    load_obs(("Mic", "Music", "Desktop Audio"))
+    obs.add_scene_item("Scene 1", "Mic")
+    listener = OBS_OSC.OSCListener()
+    listener.scheduler.start()
+    families = (
+        ("source by name", "/obs/source/Mic/volume", [0.5]),
+        ("source batch 3", "/obs/source/volume", ["Mic", 0.5, "Music", 0.25, "Desktop Audio", 0.75]),
+        ("source wildcard", "/obs/source/*/volume", [0.5]),
+        ("trans duration", "/obs/transition/duration", [300]),
+        ("scene preview NN", "/obs/scene/2/preview", [1.0]),
+        ("scene preview name", "/obs/scene/Scene 2/preview", [1.0]),
+        ("scene item", "/obs/scene/1/item/Mic/position", [10.0, 20.0]),
+        ("recording start", "/obs/recording/start", [1.0]),
+        ("unmatched", "/foo/bar", [1.0]),
+    )
+    print("dispatch                ns/msg")
+    try:
+        for label, address, args in families:
+            def dispatch():
+                listener.dispatch_message(address, args)
+                OBS_OSC.script_tick(0)
+            per_message = timed(dispatch, options.seconds, 100)
+            print(label.ljust(18) + ("%.0f" % (per_message * 1e9)).rjust(12))
+    finally:
+        listener.scheduler.stop()
+        OBS_OSC.script_unload()
+
+#########################################
+#
+#   MainThread
+#       calls script_tick fps times a second, as OBS does
+#
+#########################################
+
+class MainThread(threading.Thread):
+
+    def __init__(self, fps):
+        super().__init__(daemon=True)
+        self.interval = 1.0 / fps
+        self.running = True
+
+    def run(self):
+        due = time.perf_counter()
+        while self.running:
+            OBS_OSC.script_tick(self.interval)
+            due += self.interval
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def stop(self):
+        self.running = False
+        self.join()
+
+#########################################
+#
+#   LegacyLoopListener
+#       an OSCListener whose listen loop polls like the original one did:
+#       select with a timeout of 0, one datagram per pass
+#       and a tenth of a second sleep when no socket is readable
+#
+#########################################
+
+class LegacyLoopListener(OBS_OSC.OSCListener):
+
+    def listen(self):
+        sockets = [endpoint.sock for endpoint in self.endpoints]
+        try:
+            while self.listening:
+                self.heartbeat = time.monotonic()
+                inputready,outputready,exceptready = select(sockets,[],[],0)
+                if len(inputready) > 0:
+                    buffer = self.buffers[self.buffer_index]
+                    self.buffer_index = (self.buffer_index + 1) % len(self.buffers)
+                    try:
+                        nbytes, addr = inputready[0].recvfrom_into(buffer)
+                    except OSError:
+                        continue
+                    self.packet_received(buffer, nbytes, addr)
+                else:
+                    time.sleep(0.1)
+        finally:
+            self.close_sockets()
+            self.listen_thread = None
+
+#########################################
+#
+#   bench_latency
+#   floods options.faders sources at options.rate messages per second
+#   each (as a bundle per tick with --bundle) for options.seconds
+#   and sends a trigger every 100ms
+#
+#########################################
+
+def bench_latency(options):
+    names = ["Fader " + str(i + 1) for i in range(options.faders)]
+    load_obs(names)
+    ticks = int(options.seconds * options.rate)
+    total = ticks * options.faders
+    sent = array('d', bytes(8 * total))
+    received = array('d', bytes(8 * total))
+    trigger_sent = []
+    trigger_received = []
+
+    def call_hook(name, args):
+        if name == "obs_source_set_volume":
+            seq = int(round(args[1] * SEQUENCE_SCALE))
+            if 0 <= seq < total:
+                received[seq] = time.perf_counter()
+            if options.cost:
+                busy = time.perf_counter() + options.cost / 1e6
+                while time.perf_counter() < busy:
+                    pass
+        elif name in ("obs_frontend_recording_start", "obs_frontend_recording_stop"):
+            trigger_received.append(time.perf_counter())
+
+    OBS_OSC.OBS_OSC_PORT = options.port
+    OBS_OSC.OBS_OSC_BACKEND = options.backend
+    OBS_OSC.OBS_OSC_RCVBUF_KB = options.rcvbuf
+    OBS_OSC.OBS_OSC_QUEUE = options.queue
+    listener_class = OBS_OSC.OSCListener
+    if options.legacy_loop:
+        OBS_OSC.OSCListener = LegacyLoopListener
+    try:
+        OBS_OSC.start_osc()
+    finally:
+        OBS_OSC.OSCListener = listener_class
+    metrics = OBS_OSC.oscin.metrics
+    obs.call_hook = call_hook
+    main_thread = MainThread(options.fps)
+    main_thread.start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    destination = ("127.0.0.1", options.port)
+    addresses = ["/obs/source/" + name + "/volume" for name in names]
+    triggers = ("/obs/recording/start", "/obs/recording/stop")
+    trigger_every = max(int(options.rate * 0.1), 1)
+    try:
+        seq = 0
+        start = time.perf_counter()
+        for tick in range(ticks):
+            due = start + tick / options.rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            packets = [OBS_OSC.osc_encode_message(address, [(seq + i) / SEQUENCE_SCALE])
+                       for i, address in enumerate(addresses)]
+            if options.bundle:
+                packets = OBS_OSC.osc_encode_bundles(packets, 1400)
+            now = time.perf_counter()
+            for i in range(options.faders):
+                sent[seq + i] = now
+            seq += options.faders
+            for packet in packets:
+                sender.sendto(packet, destination)
+            if tick % trigger_every == 0:
+                trigger_sent.append(time.perf_counter())
+                sender.sendto(OBS_OSC.osc_encode_message(triggers[len(trigger_sent) % 2], [1.0]), destination)
+        time.sleep(0.5 + total * options.cost / 1e6)
+    finally:
+        main_thread.stop()
+        obs.call_hook = None
+        sender.close()
+        OBS_OSC.stop_osc()
+        OBS_OSC.script_unload()
+    faders = [received[i] - sent[i] for i in range(total) if received[i] != 0.0]
+    triggers = [r - s for s, r in zip(trigger_sent, trigger_received)]
+    print("latency " + options.backend + (" legacy loop" if options.legacy_loop else "") + ", " + str(options.faders) + " faders at "
+          + str(options.rate) + "/s" + (" bundled" if options.bundle else "")
+          + ", queue " + str(options.queue) + ", OBS cost " + str(options.cost) + " us, "
+          + str(options.fps) + " fps (us)")
+    print("          received          p50      p90      p99    p99.9      max")
+    print_latencies("faders", faders, total)
+    print_latencies("triggers", triggers, len(trigger_sent))
+    print("coalesced " + str(metrics.coalesced) + ", dropped " + str(metrics.dropped)
+          + ", collapsed " + str(metrics.collapsed))
+    p50, p90, p99, most = metrics.apply.summary()
+    print("queue to apply us p50 " + str(int(p50)) + ", p90 " + str(int(p90))
+          + ", p99 " + str(int(p99)) + ", max " + str(int(most)))
+
+BENCHMARKS = {
+    "decode": bench_decode,
+    "dispatch": bench_dispatch,
+    "latency": bench_latency,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="OBS_OSC benchmarks")
+    parser.add_argument("benchmarks", nargs="*",
+                        help="benchmarks to run (" + ", ".join(BENCHMARKS) + "), all if none")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time for each measurement")
+    parser.add_argument("--backend", default="threaded", choices=("threaded", "asyncio"))
+    parser.add_argument("--port", type=int, default=18999)
+    parser.add_argument("--faders", type=int, default=8, help="faders moving at once")
+    parser.add_argument("--rate", type=int, default=120, help="messages per second per fader")
+    parser.add_argument("--bundle", action="store_true", help="send each tick's faders as a bundle")
+    parser.add_argument("--rcvbuf", type=int, default=0, help="SO_RCVBUF in KB")
+    parser.add_argument("--queue", type=int, default=OBS_OSC.OBS_OSC_QUEUE, help="dispatch queue size")
+    parser.add_argument("--cost", type=int, default=0, help="us each volume change takes in OBS")
+    parser.add_argument("--fps", type=int, default=60, help="OBS frames per second")
+    parser.add_argument("--legacy-loop", action="store_true",
+                        help="receive with the original select and sleep polling loop")
+    options = parser.parse_args()
+    if options.legacy_loop and options.backend != "threaded":
+        parser.error("--legacy-loop needs the threaded backend")
+    for name in options.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark " + name)
+    for name in options.benchmarks or ("decode", "dispatch", "latency"):
+        BENCHMARKS[name](options)
+        print("")
+
+if __name__ == "__main__":
+    main()
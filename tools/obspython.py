@@ -0,0 +1,685 @@
+#!/usr/bin/python
+#
+#   obspython.py
+#
+#   stand-in for the obspython module that OBS provides to its scripts
+#   so that OBS_OSC.py can be imported and exercised outside OBS
+#   (see bench_osc.py)
+#
+#   simulates a frontend with scenes, transitions and audio sources,
+#   scene items, frontend event callbacks, signal handlers, weak sources,
+#   script settings data and properties
+#
+#   every call into the module is appended to calls as (name, args)
+#   call_hook, if set, is called with (name, args) as well
+#   outstanding counts strong source and scene item references
+#   not yet released
+#
+#  see license included with this distribution or
+#  https://www.claudeheintzdesign.com/lx/opensource.html
+#
+
+import threading
+from collections import deque
+
+
+OBS_TRANSITION_MODE_AUTO = 0
+OBS_TRANSITION_MODE_MANUAL = 1
+OBS_COMBO_TYPE_EDITABLE = 1
+OBS_COMBO_TYPE_LIST = 2
+OBS_COMBO_FORMAT_INT = 1
+OBS_COMBO_FORMAT_FLOAT = 2
+OBS_COMBO_FORMAT_STRING = 3
+OBS_TEXT_DEFAULT = 0
+OBS_TEXT_PASSWORD = 1
+OBS_TEXT_MULTILINE = 2
+OBS_TEXT_INFO = 3
+OBS_EDITABLE_LIST_TYPE_STRINGS = 0
+OBS_PATH_FILE = 0
+OBS_PATH_FILE_SAVE = 1
+OBS_PATH_DIRECTORY = 2
+
+(OBS_FRONTEND_EVENT_STREAMING_STARTING,
+ OBS_FRONTEND_EVENT_STREAMING_STARTED,
+ OBS_FRONTEND_EVENT_STREAMING_STOPPING,
+ OBS_FRONTEND_EVENT_STREAMING_STOPPED,
+ OBS_FRONTEND_EVENT_RECORDING_STARTING,
+ OBS_FRONTEND_EVENT_RECORDING_STARTED,
+ OBS_FRONTEND_EVENT_RECORDING_STOPPING,
+ OBS_FRONTEND_EVENT_RECORDING_STOPPED,
+ OBS_FRONTEND_EVENT_SCENE_CHANGED,
+ OBS_FRONTEND_EVENT_SCENE_LIST_CHANGED,
+ OBS_FRONTEND_EVENT_TRANSITION_CHANGED,
+ OBS_FRONTEND_EVENT_TRANSITION_STOPPED,
+ OBS_FRONTEND_EVENT_TRANSITION_LIST_CHANGED,
+ OBS_FRONTEND_EVENT_SCENE_COLLECTION_CHANGED,
+ OBS_FRONTEND_EVENT_SCENE_COLLECTION_LIST_CHANGED,
+ OBS_FRONTEND_EVENT_PROFILE_CHANGED,
+ OBS_FRONTEND_EVENT_PROFILE_LIST_CHANGED,
+ OBS_FRONTEND_EVENT_EXIT,
+ OBS_FRONTEND_EVENT_REPLAY_BUFFER_STARTING,
+ OBS_FRONTEND_EVENT_REPLAY_BUFFER_STARTED,
+ OBS_FRONTEND_EVENT_REPLAY_BUFFER_STOPPING,
+ OBS_FRONTEND_EVENT_REPLAY_BUFFER_STOPPED,
+ OBS_FRONTEND_EVENT_STUDIO_MODE_ENABLED,
+ OBS_FRONTEND_EVENT_STUDIO_MODE_DISABLED,
+ OBS_FRONTEND_EVENT_PREVIEW_SCENE_CHANGED,
+ OBS_FRONTEND_EVENT_SCENE_COLLECTION_CLEANUP,
+ OBS_FRONTEND_EVENT_FINISHED_LOADING,
+ OBS_FRONTEND_EVENT_RECORDING_PAUSED,
+ OBS_FRONTEND_EVENT_RECORDING_UNPAUSED,
+ OBS_FRONTEND_EVENT_TRANSITION_DURATION_CHANGED,
+ OBS_FRONTEND_EVENT_REPLAY_BUFFER_SAVED,
+ OBS_FRONTEND_EVENT_VIRTUALCAM_STARTED,
+ OBS_FRONTEND_EVENT_VIRTUALCAM_STOPPED,
+ OBS_FRONTEND_EVENT_TBAR_VALUE_CHANGED,
+ OBS_FRONTEND_EVENT_SCENE_COLLECTION_CHANGING,
+ OBS_FRONTEND_EVENT_PROFILE_CHANGING,
+ OBS_FRONTEND_EVENT_SCRIPTING_SHUTDOWN) = range(37)
+
+# record of calls into the module
+calls = deque(maxlen=100000)
+call_hook = None
+outstanding = 0
+lock = threading.RLock()
+
+def record(name, *args):
+    calls.append((name, args))
+    if call_hook is not None:
+        call_hook(name, args)
+
+def strong(source):
+    global outstanding
+    if source is not None:
+        with lock:
+            outstanding += 1
+    return source
+
+def released(count=1):
+    global outstanding
+    with lock:
+        outstanding -= count
+
+#########################################
+#
+#   SignalHandler
+#       connections from signal names to callbacks
+#       emit calls each callback with a calldata dict
+#
+#########################################
+
+class SignalHandler:
+
+    def __init__(self):
+        self.connections = {}
+
+    def connect(self, signal, callback):
+        self.connections.setdefault(signal, []).append(callback)
+
+    def disconnect(self, signal, callback):
+        callbacks = self.connections.get(signal, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def emit(self, signal, **calldata):
+        for callback in list(self.connections.get(signal, ())):
+            callback(calldata)
+
+############################################
+#^^^^^^^^^^ end class SignalHandler ^^^^^^^^
+############################################
+
+#########################################
+#
+#   Source
+#       a simulated scene, transition or input source
+#
+#########################################
+
+class Source:
+
+    def __init__(self, name, id="scene"):
+        self.name = name
+        self.id = id
+        self.volume = 1.0
+        self.duration = 300
+        self.items = []
+        self.signals = SignalHandler()
+
+    def __repr__(self):
+        return "<Source " + self.name + ">"
+
+class WeakSource:
+
+    def __init__(self, source):
+        self.source = source
+
+############################################
+#^^^^^^^^^^ end class Source ^^^^^^^^^^^^^^^
+############################################
+
+#########################################
+#
+#   SceneItem
+#       a source in a simulated scene (a scene is its own obs_scene_t)
+#
+#########################################
+
+class SceneItem:
+
+    def __init__(self, scene, source):
+        self.scene = scene
+        self.source = source
+        self.visible = True
+        self.pos = (0.0, 0.0)
+        self.scale = (1.0, 1.0)
+        self.rot = 0.0
+        self.deferred = 0
+
+    def __repr__(self):
+        return "<SceneItem " + self.scene.name + "/" + self.source.name + ">"
+
+class vec2:
+
+    def __init__(self):
+        self.x = 0.0
+        self.y = 0.0
+
+############################################
+#^^^^^^^^^^ end class SceneItem ^^^^^^^^^^^^
+############################################
+
+# simulated frontend state
+scenes = []
+transitions = []
+sources = []
+signals = SignalHandler()
+event_callbacks = []
+state = {}
+
+#########################################
+#
+#   reset(scene_names, transition_names, source_names)
+#       replaces the simulated frontend and clears the call record
+#
+#########################################
+
+def reset(scene_names=("Scene 1", "Scene 2", "Scene 3"),
+          transition_names=("Fade", "Cut"),
+          source_names=("Mic", "Music", "Desktop Audio")):
+    global outstanding
+    global call_hook
+    scenes[:] = [Source(name, "scene") for name in scene_names]
+    transitions[:] = [Source(name, "fade_transition") for name in transition_names]
+    sources[:] = scenes + transitions + [Source(name, "wasapi_input_capture") for name in source_names]
+    state.clear()
+    state["program"] = scenes[0] if scenes else None
+    state["preview"] = scenes[0] if scenes else None
+    state["transition"] = transitions[0] if transitions else None
+    state["transition_duration"] = 300
+    state["recording"] = False
+    state["streaming"] = False
+    calls.clear()
+    call_hook = None
+    outstanding = 0
+
+def fire_event(event):
+    for callback in list(event_callbacks):
+        callback(event)
+
+def find_source(name):
+    for source in sources:
+        if source.name == name:
+            return source
+    return None
+
+#########################################
+#
+#   create_source, remove_source, rename_source
+#       change the simulated sources and emit the global signals
+#
+#########################################
+
+def create_source(name, id="wasapi_input_capture"):
+    source = Source(name, id)
+    sources.append(source)
+    signals.emit("source_create", source=source)
+    return source
+
+def remove_source(name):
+    source = find_source(name)
+    if source is not None:
+        sources.remove(source)
+        signals.emit("source_destroy", source=source)
+
+def rename_source(name, new_name):
+    source = find_source(name)
+    if source is not None:
+        source.name = new_name
+        signals.emit("source_rename", source=source, prev_name=name, new_name=new_name)
+
+#########################################
+#
+#   add_scene_item, remove_scene_item
+#       change the items of a simulated scene and emit its signals
+#
+#########################################
+
+def add_scene_item(scene_name, source_name):
+    scene = find_source(scene_name)
+    item = SceneItem(scene, find_source(source_name))
+    scene.items.append(item)
+    scene.signals.emit("item_add", scene=scene, item=item)
+    return item
+
+def remove_scene_item(scene_name, source_name):
+    scene = find_source(scene_name)
+    for item in scene.items:
+        if item.source.name == source_name:
+            scene.signals.emit("item_remove", scene=scene, item=item)
+            scene.items.remove(item)
+            return
+
+#########################################
+#
+#   frontend
+#
+#########################################
+
+def obs_frontend_get_scenes():
+    record("obs_frontend_get_scenes")
+    return [strong(scene) for scene in scenes]
+
+def obs_frontend_get_transitions():
+    record("obs_frontend_get_transitions")
+    return [strong(transition) for transition in transitions]
+
+def obs_frontend_get_current_scene():
+    record("obs_frontend_get_current_scene")
+    return strong(state["program"])
+
+def obs_frontend_get_current_preview_scene():
+    record("obs_frontend_get_current_preview_scene")
+    return strong(state["preview"])
+
+def obs_frontend_get_current_transition():
+    record("obs_frontend_get_current_transition")
+    return strong(state["transition"])
+
+def obs_frontend_get_transition_duration():
+    record("obs_frontend_get_transition_duration")
+    return state["transition_duration"]
+
+def obs_frontend_set_transition_duration(duration):
+    record("obs_frontend_set_transition_duration", duration)
+    state["transition_duration"] = duration
+
+def obs_frontend_set_current_scene(scene):
+    record("obs_frontend_set_current_scene", scene)
+    state["program"] = scene
+    fire_event(OBS_FRONTEND_EVENT_SCENE_CHANGED)
+
+def obs_frontend_set_current_preview_scene(scene):
+    record("obs_frontend_set_current_preview_scene", scene)
+    state["preview"] = scene
+    fire_event(OBS_FRONTEND_EVENT_PREVIEW_SCENE_CHANGED)
+
+def obs_frontend_set_current_transition(transition):
+    record("obs_frontend_set_current_transition", transition)
+    state["transition"] = transition
+    fire_event(OBS_FRONTEND_EVENT_TRANSITION_CHANGED)
+
+def obs_frontend_recording_active():
+    return state["recording"]
+
+def obs_frontend_streaming_active():
+    return state["streaming"]
+
+def obs_frontend_recording_start():
+    record("obs_frontend_recording_start")
+    state["recording"] = True
+    fire_event(OBS_FRONTEND_EVENT_RECORDING_STARTED)
+
+def obs_frontend_recording_stop():
+    record("obs_frontend_recording_stop")
+    state["recording"] = False
+    fire_event(OBS_FRONTEND_EVENT_RECORDING_STOPPED)
+
+def obs_frontend_streaming_start():
+    record("obs_frontend_streaming_start")
+    state["streaming"] = True
+    fire_event(OBS_FRONTEND_EVENT_STREAMING_STARTED)
+
+def obs_frontend_streaming_stop():
+    record("obs_frontend_streaming_stop")
+    state["streaming"] = False
+    fire_event(OBS_FRONTEND_EVENT_STREAMING_STOPPED)
+
+def obs_frontend_add_event_callback(callback):
+    event_callbacks.append(callback)
+
+def obs_frontend_remove_event_callback(callback):
+    if callback in event_callbacks:
+        event_callbacks.remove(callback)
+
+#########################################
+#
+#   transitions
+#       a transition completes as soon as it starts
+#
+#########################################
+
+def obs_transition_start(transition, mode, duration, dest):
+    record("obs_transition_start", transition, mode, duration, dest)
+    state["program"] = dest
+    fire_event(OBS_FRONTEND_EVENT_SCENE_CHANGED)
+    transition.signals.emit("transition_stop", source=transition)
+    fire_event(OBS_FRONTEND_EVENT_TRANSITION_STOPPED)
+    return True
+
+def obs_transition_enable_fixed(transition, enable, duration):
+    record("obs_transition_enable_fixed", transition, enable, duration)
+    transition.duration = duration
+
+#########################################
+#
+#   sources
+#
+#########################################
+
+def obs_enum_sources():
+    record("obs_enum_sources")
+    return [strong(source) for source in sources]
+
+def obs_get_source_by_name(name):
+    return strong(find_source(name))
+
+def obs_source_get_name(source):
+    return source.name
+
+def obs_source_get_id(source):
+    return source.id
+
+def obs_source_get_volume(source):
+    return source.volume
+
+def obs_source_set_volume(source, volume):
+    record("obs_source_set_volume", source, volume)
+    source.volume = volume
+    source.signals.emit("volume", source=source, volume=volume)
+
+def obs_source_release(source):
+    if source is not None:
+        released()
+
+def source_list_release(source_list):
+    released(len(source_list))
+
+def obs_source_get_weak_source(source):
+    return WeakSource(source)
+
+def obs_weak_source_get_source(weak):
+    if weak.source in sources:
+        return strong(weak.source)
+    return None
+
+def obs_weak_source_references_source(weak, source):
+    return weak.source is source
+
+def obs_weak_source_release(weak):
+    pass
+
+#########################################
+#
+#   scenes and scene items
+#
+#########################################
+
+def obs_scene_from_source(source):
+    return source
+
+def obs_scene_get_source(scene):
+    return scene
+
+def obs_scene_enum_items(scene):
+    record("obs_scene_enum_items", scene)
+    return [strong(item) for item in scene.items]
+
+def sceneitem_list_release(items):
+    released(len(items))
+
+def obs_sceneitem_addref(item):
+    strong(item)
+
+def obs_sceneitem_release(item):
+    if item is not None:
+        released()
+
+def obs_sceneitem_get_source(item):
+    return item.source
+
+def obs_sceneitem_get_scene(item):
+    return item.scene
+
+def obs_sceneitem_set_visible(item, visible):
+    record("obs_sceneitem_set_visible", item, visible)
+    item.visible = visible
+
+def obs_sceneitem_set_pos(item, pos):
+    record("obs_sceneitem_set_pos", item, (pos.x, pos.y))
+    item.pos = (pos.x, pos.y)
+
+def obs_sceneitem_set_scale(item, scale):
+    record("obs_sceneitem_set_scale", item, (scale.x, scale.y))
+    item.scale = (scale.x, scale.y)
+
+def obs_sceneitem_set_rot(item, rot):
+    record("obs_sceneitem_set_rot", item, rot)
+    item.rot = rot
+
+def obs_sceneitem_defer_update_begin(item):
+    record("obs_sceneitem_defer_update_begin", item)
+    item.deferred += 1
+
+def obs_sceneitem_defer_update_end(item):
+    record("obs_sceneitem_defer_update_end", item)
+    item.deferred -= 1
+
+#########################################
+#
+#   signals and calldata
+#
+#########################################
+
+def obs_get_signal_handler():
+    return signals
+
+def obs_source_get_signal_handler(source):
+    return source.signals
+
+def signal_handler_connect(handler, signal, callback):
+    handler.connect(signal, callback)
+
+def signal_handler_disconnect(handler, signal, callback):
+    handler.disconnect(signal, callback)
+
+def calldata_source(calldata, name):
+    return calldata.get(name)
+
+def calldata_sceneitem(calldata, name):
+    return calldata.get(name)
+
+def calldata_string(calldata, name):
+    return calldata.get(name)
+
+def calldata_float(calldata, name):
+    return calldata.get(name)
+
+def calldata_int(calldata, name):
+    return calldata.get(name)
+
+#########################################
+#
+#   settings data
+#
+#########################################
+
+class Data:
+
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.defaults = {}
+
+    def get(self, name, empty):
+        return self.values.get(name, self.defaults.get(name, empty))
+
+def obs_data_create():
+    return Data()
+
+def obs_data_release(data):
+    pass
+
+def obs_data_get_int(data, name):
+    return data.get(name, 0)
+
+def obs_data_get_double(data, name):
+    return data.get(name, 0.0)
+
+def obs_data_get_bool(data, name):
+    return data.get(name, False)
+
+def obs_data_get_string(data, name):
+    return data.get(name, "")
+
+def obs_data_set_int(data, name, value):
+    data.values[name] = value
+
+def obs_data_set_double(data, name, value):
+    data.values[name] = value
+
+def obs_data_set_bool(data, name, value):
+    data.values[name] = value
+
+def obs_data_set_string(data, name, value):
+    data.values[name] = value
+
+def obs_data_set_default_int(data, name, value):
+    data.defaults[name] = value
+
+def obs_data_set_default_double(data, name, value):
+    data.defaults[name] = value
+
+def obs_data_set_default_bool(data, name, value):
+    data.defaults[name] = value
+
+def obs_data_set_default_string(data, name, value):
+    data.defaults[name] = value
+
+def obs_data_get_array(data, name):
+    strings = data.get(name, None)
+    if strings is None:
+        return None
+    return [Data({"value": string}) for string in strings]
+
+def obs_data_array_count(array):
+    return len(array)
+
+def obs_data_array_item(array, idx):
+    return array[idx]
+
+def obs_data_array_release(array):
+    pass
+
+#########################################
+#
+#   properties
+#
+#########################################
+
+class Property:
+
+    def __init__(self, name, description, kind):
+        self.name = name
+        self.description = description
+        self.kind = kind
+        self.items = []
+        self.callback = None
+
+class Properties:
+
+    def __init__(self):
+        self.properties = []
+
+    def add(self, name, description, kind):
+        prop = Property(name, description, kind)
+        self.properties.append(prop)
+        return prop
+
+def obs_properties_create():
+    return Properties()
+
+def obs_properties_add_button(props, name, text, callback):
+    prop = props.add(name, text, "button")
+    prop.callback = callback
+    return prop
+
+def obs_properties_add_int(props, name, description, minimum, maximum, step):
+    return props.add(name, description, "int")
+
+def obs_properties_add_float(props, name, description, minimum, maximum, step):
+    return props.add(name, description, "float")
+
+def obs_properties_add_bool(props, name, description):
+    return props.add(name, description, "bool")
+
+def obs_properties_add_text(props, name, description, text_type):
+    return props.add(name, description, "text")
+
+def obs_properties_add_path(props, name, description, path_type, filter, default_path):
+    return props.add(name, description, "path")
+
+def obs_properties_add_list(props, name, description, combo_type, combo_format):
+    return props.add(name, description, "list")
+
+def obs_properties_add_editable_list(props, name, description, list_type, filter, default_path):
+    return props.add(name, description, "editable_list")
+
+def obs_property_list_add_string(prop, name, value):
+    prop.items.append((name, value))
+
+def obs_property_set_modified_callback(prop, callback):
+    prop.callback = callback
+
+def obs_property_set_description(prop, description):
+    prop.description = description
+
+def obs_properties_get(props, name):
+    for prop in props.properties:
+        if prop.name == name:
+            return prop
+    return None
+
+#########################################
+#
+#   timers
+#       run_timers calls the timers that are due at now (in ms)
+#
+#########################################
+
+timers = []
+
+def timer_add(callback, ms):
+    timers.append([callback, ms, ms])
+
+def timer_remove(callback):
+    timers[:] = [timer for timer in timers if timer[0] != callback]
+
+def run_timers(elapsed_ms):
+    for timer in list(timers):
+        timer[2] -= elapsed_ms
+        while timer[2] <= 0 and timer in timers:
+            timer[2] += timer[1]
+            timer[0]()
+
+
+reset()
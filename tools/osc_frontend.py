@@ -0,0 +1,76 @@
+#!/usr/bin/python
+#
+#   osc_frontend.py
+#
+#   receives OSC outside of OBS and passes it to OBS_OSC.py as commands
+#   through the command ring set as "Front End Command Ring" in the
+#   script properties, so OBS's python interpreter only applies them
+#
+#   python3 tools/osc_frontend.py RING [--port PORT] [--tcp-port PORT]
+#           [--framing slip|length] [--endpoint SPEC ...] [--rcvbuf KB]
+#           [--queue N] [--overflow POLICY] [--capture LOG] [--trace FILE]
+#
+#   the script creates RING when it starts, start OBS first.
+#   options are the same as the script's receive settings.
+#   Ctrl-C stops and prints the front end's statistics
+#   (and writes the Chrome trace of the front end to --trace FILE)
+#
+#   OBS_OSC.py is imported without obspython, which is only
+#   available inside OBS. the front end makes no obspython calls
+#
+#  see license included with this distribution or
+#  https://www.claudeheintzdesign.com/lx/opensource.html
+#
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import OBS_OSC
+
+def main():
+    parser = argparse.ArgumentParser(description="OSC front end for OBS_OSC.py")
+    parser.add_argument("ring", help="command ring set in the script properties")
+    parser.add_argument("--port", type=int, default=OBS_OSC.OBS_OSC_PORT, help="udp port")
+    parser.add_argument("--tcp-port", type=int, default=0, help="tcp port, 0 for none")
+    parser.add_argument("--framing", default="slip", choices=("slip", "length"), help="tcp framing")
+    parser.add_argument("--endpoint", action="append", default=[],
+                        help="additional endpoint [udp|tcp] [IP:]PORT [GROUP|slip|length]")
+    parser.add_argument("--max-packet", type=int, default=OBS_OSC.OBS_OSC_MAX_PACKET)
+    parser.add_argument("--rcvbuf", type=int, default=0, help="SO_RCVBUF in KB")
+    parser.add_argument("--queue", type=int, default=OBS_OSC.OBS_OSC_QUEUE, help="dispatch queue size")
+    parser.add_argument("--overflow", default=OBS_OSC.OBS_OSC_OVERFLOW, choices=OBS_OSC.OSC_OVERFLOW_POLICIES)
+    parser.add_argument("--capture", help="append received packets to this OSC packet log")
+    parser.add_argument("--trace", help="write a Chrome trace of the front end to this file when stopped")
+    options = parser.parse_args()
+    try:
+        frontend = OBS_OSC.OSCFrontEnd(options.ring)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if options.trace:
+        frontend.trace(OBS_OSC.OSCTracer())
+    frontend.start_listening(options.port, options.max_packet, options.rcvbuf * 1024,
+                             options.tcp_port, options.framing,
+                             OBS_OSC.parse_endpoints(options.endpoint))
+    frontend.set_queue(options.queue, options.overflow)
+    if options.capture:
+        frontend.capture(options.capture)
+    for endpoint in frontend.endpoints:
+        print("OSC front end on " + endpoint.describe())
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        frontend.stop_listening()
+    if options.trace:
+        print(str(frontend.tracer.write(options.trace)) + " spans written to " + options.trace)
+    for line in frontend.metrics.report(frontend.routes.templates):
+        print(line)
+
+if __name__ == "__main__":
+    main()
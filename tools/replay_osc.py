@@ -0,0 +1,98 @@
+#!/usr/bin/python
+#
+#   replay_osc.py
+#
+#   replays an OSC packet log captured by OBS_OSC.py
+#   ("Capture OSC To" in the script properties)
+#
+#   python3 tools/replay_osc.py LOG [--udp HOST:PORT] [--speed S | --max]
+#
+#   --udp       sends the packets to HOST:PORT, for example a running OBS
+#   otherwise   dispatches them in this process to OBS_OSC.py with the
+#               obspython stand-in and prints the listener's statistics
+#               (script_tick makes the queued obspython calls after
+#               each packet)
+#
+#   packets are replayed with their captured timing, --speed 2 replays
+#   twice as fast, --max as fast as possible
+#
+#  see license included with this distribution or
+#  https://www.claudeheintzdesign.com/lx/opensource.html
+#
+
+import os
+import sys
+import time
+import socket
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import obspython as obs
+import OBS_OSC
+
+#########################################
+#
+#   replay(reader, send, speed)
+#   calls send(packet, sender) for each packet of the log
+#   at its captured time divided by speed (0 for no delay)
+#   returns the number of packets and the seconds taken
+#
+#########################################
+
+def replay(reader, send, speed):
+    count = 0
+    first = None
+    start = time.perf_counter()
+    for time_ns, sender, packet in reader:
+        if speed > 0:
+            if first is None:
+                first = time_ns
+            delay = start + (time_ns - first) / 1e9 / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        send(packet, sender)
+        count += 1
+    return count, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="replay an OSC packet log")
+    parser.add_argument("log", help="OSC packet log")
+    parser.add_argument("--udp", help="send to HOST:PORT instead of dispatching here")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 1.0 is real time")
+    parser.add_argument("--max", action="store_true", help="replay as fast as possible")
+    options = parser.parse_args()
+    speed = 0 if options.max else options.speed
+    reader = OBS_OSC.OSCLogReader(options.log)
+    try:
+        if options.udp:
+            host, sep, port = options.udp.rpartition(':')
+            destination = (host or "127.0.0.1", int(port))
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            count, seconds = replay(reader, lambda packet, sender: sock.sendto(packet, destination), speed)
+            sock.close()
+            print(str(count) + " packets sent in " + ("%.3f" % seconds) + " s")
+        else:
+            OBS_OSC.script_load(obs.obs_data_create())
+            listener = OBS_OSC.OSCListener()
+            listener.scheduler.start()
+            OBS_OSC.obs_calls.metrics = listener.metrics
+
+            def dispatch(packet, sender):
+                listener.packet_received(bytes(packet), None, sender)
+                OBS_OSC.script_tick(0)
+
+            try:
+                count, seconds = replay(reader, dispatch, speed)
+            finally:
+                listener.scheduler.stop()
+                OBS_OSC.script_unload()
+            print(str(count) + " packets dispatched in " + ("%.3f" % seconds) + " s")
+            for line in listener.metrics.report(listener.routes.templates):
+                print(line)
+    finally:
+        reader.close()
+
+if __name__ == "__main__":
+    main()